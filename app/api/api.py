@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import login, users, companies, teams, projects, properties, contracts, expenses, clients, leads, dashboard
+from app.api.endpoints import login, users, companies, teams, projects, properties, contracts, expenses, clients, leads, dashboard, imports, reconciliation, budgets, expense_reviews, cashflow, reports, analytics, parquet_exports, changes, events, jobs, response_cache, batch
 
 api_router = APIRouter()
 
@@ -14,4 +14,17 @@ api_router.include_router(contracts.router, prefix="/contracts", tags=["contract
 api_router.include_router(expenses.router, prefix="/expenses", tags=["expenses"])
 api_router.include_router(clients.router, prefix="/clients", tags=["clients"])
 api_router.include_router(leads.router, prefix="/leads", tags=["leads"])
-api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"]) 
\ No newline at end of file
+api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
+api_router.include_router(imports.router, prefix="/imports", tags=["imports"])
+api_router.include_router(reconciliation.router, prefix="/reconciliation", tags=["reconciliation"])
+api_router.include_router(budgets.router, prefix="/budgets", tags=["budgets"])
+api_router.include_router(expense_reviews.router, prefix="/expense-reviews", tags=["expense-reviews"])
+api_router.include_router(cashflow.router, prefix="/cashflow", tags=["cashflow"])
+api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(parquet_exports.router, prefix="/exports/parquet", tags=["exports"])
+api_router.include_router(changes.router, prefix="/changes", tags=["changes"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(response_cache.router, prefix="/cache", tags=["cache"])
+api_router.include_router(batch.router, prefix="/batch", tags=["batch"])
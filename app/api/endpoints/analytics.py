@@ -0,0 +1,34 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.api import deps
+from app.services import jobs
+from app.services.analytics import analytics_store
+
+router = APIRouter()
+
+
+@router.get("/status", response_model=schemas.AnalyticsStatus)
+def read_analytics_status(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Sync lag and row counts of the embedded analytics store.
+    """
+    return analytics_store.status()
+
+
+@router.post("/resync", response_model=schemas.Job, status_code=202)
+def resync_analytics(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Rebuild the analytics store from scratch (queued as a background job).
+    """
+    if not analytics_store.enabled:
+        raise HTTPException(status_code=400, detail="Analytics store is disabled")
+    return jobs.enqueue(db, "analytics.resync", priority=200, created_by_id=current_user.id)
@@ -0,0 +1,30 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from app import models, schemas
+from app.api import deps
+from app.core.config import settings
+from app.services.batch import run_batch
+
+router = APIRouter()
+
+
+@router.post("/", response_model=schemas.BatchResponse)
+async def batch(
+    request: Request,
+    batch_in: schemas.BatchRequest,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Run several GET requests of this API in one call. Sub-requests run concurrently with the caller's credentials.
+    """
+    if len(batch_in.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_REQUESTS} requests per batch")
+    ids = [item.id for item in batch_in.requests]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Request ids must be unique")
+    responses = await run_batch(
+        request.app, request.scope, batch_in.requests, request.headers.get("authorization"), current_user
+    )
+    return {"responses": responses}
@@ -0,0 +1,100 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.services import budget
+
+router = APIRouter()
+
+
+def _get_project(db: Session, project_id: int, current_user: models.User) -> models.Project:
+    project = crud.project.get(db, id=project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    # Check if user has permission to access this project
+    if not crud.user.is_superuser(current_user) and project.company_id != current_user.company_id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return project
+
+
+@router.get("/portfolio", response_model=List[schemas.BudgetHealth])
+def read_portfolio(
+    db: Session = Depends(deps.get_db),
+    company_id: Optional[int] = None,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Budget health (spend, burn rate, projected overrun) of every project.
+    """
+    if not crud.user.is_superuser(current_user):
+        if company_id is not None and company_id != current_user.company_id:
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+        company_id = current_user.company_id
+    return budget.portfolio_health(db, company_id=company_id)
+
+
+@router.get("/projects/{project_id}", response_model=schemas.ProjectBudget)
+def read_project_budget(
+    *,
+    db: Session = Depends(deps.get_db),
+    project_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Budget health of a project, its properties and its open alerts.
+    """
+    project = _get_project(db, project_id, current_user)
+    return {
+        "project": budget.portfolio_health(db, project_id=project.id)[0],
+        "properties": budget.property_health(db, project_id=project.id),
+        "alerts": crud.budget_alert.get_alerts(db, project_id=project.id),
+    }
+
+
+@router.get("/alerts", response_model=List[schemas.BudgetAlert])
+def read_alerts(
+    db: Session = Depends(deps.get_db),
+    project_id: Optional[int] = None,
+    include_resolved: bool = False,
+    acknowledged: Optional[bool] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve budget alerts.
+    """
+    if project_id is not None:
+        _get_project(db, project_id, current_user)
+    
+    company_id = None if crud.user.is_superuser(current_user) else current_user.company_id
+    return crud.budget_alert.get_alerts(
+        db,
+        company_id=company_id,
+        project_id=project_id,
+        include_resolved=include_resolved,
+        acknowledged=acknowledged,
+        skip=skip,
+        limit=limit,
+    )
+
+
+@router.put("/alerts/{alert_id}/acknowledge", response_model=schemas.BudgetAlert)
+def acknowledge_alert(
+    *,
+    db: Session = Depends(deps.get_db),
+    alert_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Mark a budget alert as acknowledged.
+    """
+    alert = crud.budget_alert.get(db, id=alert_id)
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    _get_project(db, alert.project_id, current_user)
+    return crud.budget_alert.acknowledge(db, db_obj=alert, user_id=current_user.id)
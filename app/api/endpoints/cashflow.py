@@ -0,0 +1,91 @@
+from datetime import date
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.services import cashflow
+from app.services.export import encode_csv
+
+router = APIRouter()
+
+EXPORT_COLUMNS = ["project_id", "project", "month", "inflow", "outflow", "net", "balance", "projected"]
+
+
+def _company_scope(company_id: Optional[int], current_user: models.User) -> Optional[int]:
+    if not crud.user.is_superuser(current_user):
+        if company_id is not None and company_id != current_user.company_id:
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+        company_id = current_user.company_id
+    return company_id
+
+
+@router.get("/portfolio", response_model=schemas.PortfolioCashFlow)
+def read_portfolio_cashflow(
+    db: Session = Depends(deps.get_db),
+    company_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    months: int = Query(24, ge=1, le=cashflow.MAX_PROJECTION_MONTHS),
+    include_pending: bool = True,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Month-by-month cash flow (contract inflows x expense outflows) of every project and the company total.
+    """
+    company_id = _company_scope(company_id, current_user)
+    return cashflow.portfolio_cashflow(
+        db, company_id=company_id, date_from=date_from, months=months, include_pending=include_pending
+    )
+
+
+@router.get("/portfolio/export")
+def export_portfolio_cashflow(
+    db: Session = Depends(deps.get_db),
+    company_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    months: int = Query(24, ge=1, le=cashflow.MAX_PROJECTION_MONTHS),
+    include_pending: bool = True,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Cash flow of every project and the company total as CSV (one row per project and month).
+    """
+    company_id = _company_scope(company_id, current_user)
+    result = cashflow.portfolio_cashflow(
+        db, company_id=company_id, date_from=date_from, months=months, include_pending=include_pending
+    )
+    rows = [
+        [projection["project_id"], projection["name"], *month.values()]
+        for projection in [*result["projects"], result["total"]]
+        for month in projection["months"]
+    ]
+    headers = {"Content-Disposition": 'attachment; filename="cashflow.csv"'}
+    return StreamingResponse(encode_csv(EXPORT_COLUMNS, [rows]), media_type="text/csv; charset=utf-8", headers=headers)
+
+
+@router.get("/projects/{project_id}", response_model=schemas.CashFlowProjection)
+def read_project_cashflow(
+    *,
+    db: Session = Depends(deps.get_db),
+    project_id: int,
+    date_from: Optional[date] = None,
+    months: int = Query(24, ge=1, le=cashflow.MAX_PROJECTION_MONTHS),
+    include_pending: bool = True,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Month-by-month cash flow of a project.
+    """
+    project = crud.project.get(db, id=project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    # Check if user has permission to access this project
+    if not crud.user.is_superuser(current_user) and project.company_id != current_user.company_id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return cashflow.project_cashflow(
+        db, project_id=project.id, date_from=date_from, months=months, include_pending=include_pending
+    )
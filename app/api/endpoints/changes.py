@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.services import changes
+
+router = APIRouter()
+
+
+@router.get("/{entity}", response_model=schemas.ChangeFeed)
+def read_changes(
+    *,
+    db: Session = Depends(deps.get_db),
+    entity: schemas.ChangeFeedEntityEnum,
+    cursor: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Rows changed and deleted since a cursor (or updated_since), oldest first.
+    """
+    company_id = None if crud.user.is_superuser(current_user) else current_user.company_id
+    try:
+        return changes.read_changes(
+            db, entity, company_id=company_id, cursor=cursor, updated_since=updated_since, limit=limit
+        )
+    except changes.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except changes.CursorExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
@@ -1,16 +1,21 @@
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Form
+from fastapi import APIRouter, Depends, HTTPException, Form, Request, Response
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.services import conditional, jobs
+from app.services.serialization import summary_statement, trusted_response
+from app.services.deletion import DeletionBlocked, check_company_deletion
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Company])
 def read_companies(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -19,10 +24,35 @@ def read_companies(
     """
     Retrieve companies.
     """
+    validator = conditional.list_validator(request, db, models.Company, skip=skip, limit=limit)
+    not_modified = conditional.evaluate(request, response, validator)
+    if not_modified is not None:
+        return not_modified
     companies = crud.company.get_multi(db, skip=skip, limit=limit)
     return companies
 
 
+@router.get("/summary", response_model=List[schemas.CompanySummary])
+def read_companies_summary(
+    request: Request,
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    skip: int = 0,
+    limit: int = 1000,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve company ids and names (for selectors), ordered by name.
+    """
+    order_by = models.Company.name
+    validator = conditional.list_validator(request, db, models.Company, skip=skip, limit=limit, order_by=order_by)
+    not_modified = conditional.evaluate(request, response, validator)
+    if not_modified is not None:
+        return not_modified
+    statement = summary_statement(models.Company, schemas.CompanySummary).order_by(order_by).offset(skip).limit(limit)
+    return trusted_response(db, statement, response)
+
+
 @router.post("/", response_model=schemas.Company)
 def create_company(
     *,
@@ -65,6 +95,8 @@ def create_company(
 @router.get("/{company_id}", response_model=schemas.Company)
 def read_company(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     company_id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -75,6 +107,9 @@ def read_company(
     company = crud.company.get(db, id=company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
+    not_modified = conditional.evaluate(request, response, conditional.item_validator(request, company))
+    if not_modified is not None:
+        return not_modified
     return company
 
 
@@ -116,7 +151,7 @@ def update_company(
     return company
 
 
-@router.delete("/{company_id}", response_model=schemas.Company)
+@router.delete("/{company_id}", response_model=schemas.Job, status_code=202)
 def delete_company(
     *,
     db: Session = Depends(deps.get_db),
@@ -124,13 +159,17 @@ def delete_company(
     current_user: models.User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
-    Delete a company.
+    Delete a company and everything it owns (queued as a background job).
     """
     company = crud.company.get(db, id=company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
-    company = crud.company.remove(db, id=company_id)
-    return company
+    try:
+        check_company_deletion(db, company_id)
+    except DeletionBlocked as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    # Sem company_id no job: ele não pode ser excluído junto com a empresa
+    return jobs.enqueue(db, "deletion.company", {"company_id": company_id}, created_by_id=current_user.id)
 
 
 @router.get("/{company_id}/users/", response_model=List[schemas.User])
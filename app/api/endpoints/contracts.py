@@ -8,6 +8,9 @@ from datetime import datetime
 
 from app import crud, models, schemas
 from app.api import deps
+from app.core.config import settings
+from app.services.export import ExportFormat, export_response
+from app.services.previews import PreviewKind, preview_response, queue_previews, remove_derived
 
 router = APIRouter()
 
@@ -30,6 +33,40 @@ def read_contracts(
     return contracts
 
 
+@router.get("/export")
+def export_contracts(
+    db: Session = Depends(deps.get_db),
+    project_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    type: Optional[schemas.ContractTypeEnum] = None,
+    status: Optional[schemas.ContractStatusEnum] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    format: ExportFormat = ExportFormat.CSV,
+    gzip: bool = False,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Stream contracts as CSV or NDJSON (date range applies to signing_date).
+    """
+    if project_id is not None:
+        project = crud.project.get(db, id=project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+    
+    company_id = None if crud.user.is_superuser(current_user) else current_user.company_id
+    statement = crud.contract.get_export_statement(
+        company_id=company_id,
+        project_id=project_id,
+        property_id=property_id,
+        type=type,
+        status=status,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    return export_response(statement, filename="contracts", fmt=format, compress=gzip)
+
+
 @router.post("/", response_model=schemas.Contract)
 def create_contract(
     *,
@@ -303,7 +340,7 @@ async def create_contract_document(
     # Create directory if it doesn't exist
     year = datetime.now().year
     month = datetime.now().month
-    upload_dir = f"./uploads/contracts/{year}/{month:02d}/{contract_id}"
+    upload_dir = f"{settings.UPLOAD_DIR}/contracts/{year}/{month:02d}/{contract_id}"
     os.makedirs(upload_dir, exist_ok=True)
     
     # Save file
@@ -322,9 +359,51 @@ async def create_contract_document(
     )
     
     document = crud.contract_document.create(db, obj_in=document_in)
+    
+    # Miniatura e pré-visualização são geradas em segundo plano
+    queue_previews(db, file_path, file_type, company_id=project.company_id, created_by_id=current_user.id)
     return document
 
 
+@router.get("/{contract_id}/documents/{document_id}/{kind}")
+def read_contract_document_preview(
+    *,
+    db: Session = Depends(deps.get_db),
+    contract_id: int,
+    document_id: int,
+    kind: PreviewKind,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the thumbnail or first-page preview of a contract document.
+    """
+    contract = crud.contract.get(db, id=contract_id)
+    if not contract:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    
+    # Get the property and project to check company
+    property = crud.property.get(db, id=contract.property_id)
+    if not property:
+        raise HTTPException(status_code=404, detail="Associated property not found")
+    
+    project = crud.project.get(db, id=property.project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Associated project not found")
+    
+    # Check if user has permission to access this contract
+    if not crud.user.is_superuser(current_user) and project.company_id != current_user.company_id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    
+    document = crud.contract_document.get(db, id=document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    if document.contract_id != contract_id:
+        raise HTTPException(status_code=400, detail="Document does not belong to this contract")
+    
+    return preview_response(document.file_path, document.file_type, kind)
+
+
 @router.delete("/{contract_id}/documents/{document_id}", response_model=schemas.ContractDocument)
 def delete_contract_document(
     *,
@@ -364,6 +443,7 @@ def delete_contract_document(
     try:
         if os.path.exists(document.file_path):
             os.remove(document.file_path)
+        remove_derived(document.file_path)
     except Exception as e:
         # Log the error but continue - we still want to remove from DB
         print(f"Error deleting file: {e}")
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 
 from app import crud, models, schemas
 from app.api import deps
+from app.services.analytics import query_rollup
 
 router = APIRouter()
 
@@ -78,25 +79,12 @@ def get_dashboard_summary(
         counts["contracts"] = len(contracts)
         counts["contract_status"] = contract_status_counts
         
-        # Calculate total expenses
-        total_expenses = 0
-        for project in projects:
-            project_expenses = crud.expense.get_expenses_sum_by_project(db, project_id=project.id)
-            total_expenses += project_expenses
-        
-        counts["total_expenses"] = total_expenses
+        # Totais de despesas por categoria (tabela de totais mensais, uma consulta)
+        expense_by_category = {category: 0.0 for category in schemas.ExpenseCategoryEnum}
+        for row in query_rollup(db, group_by=[schemas.ExpenseRollupGroupEnum.CATEGORY], company_id=company_id):
+            expense_by_category[schemas.ExpenseCategoryEnum(row["category"])] = row["total"]
         
-        # Get expenses by category
-        expense_by_category = {}
-        for project in projects:
-            for category in schemas.ExpenseCategoryEnum:
-                category_expenses = crud.expense.get_expenses_sum_by_category(
-                    db, project_id=project.id, category=category
-                )
-                if category in expense_by_category:
-                    expense_by_category[category] += category_expenses
-                else:
-                    expense_by_category[category] = category_expenses
+        counts["total_expenses"] = sum(expense_by_category.values())
         
         counts["expense_by_category"] = expense_by_category
     else:
@@ -185,7 +173,7 @@ def get_recent_activities(
         )
     
     recent_leads = leads_query.all()
-    recent["leads"] = [schemas.Lead.from_orm(lead) for lead in recent_leads]
+    recent["leads"] = [schemas.Lead.model_validate(lead) for lead in recent_leads]
     
     # Get recent contracts
     if company_id:
@@ -212,7 +200,7 @@ def get_recent_activities(
             .all()
         )
     
-    recent["contracts"] = [schemas.Contract.from_orm(contract) for contract in recent_contracts]
+    recent["contracts"] = [schemas.Contract.model_validate(contract) for contract in recent_contracts]
     
     # Get recent expenses
     if company_id:
@@ -236,7 +224,7 @@ def get_recent_activities(
             .all()
         )
     
-    recent["expenses"] = [schemas.Expense.from_orm(expense) for expense in recent_expenses]
+    recent["expenses"] = [schemas.Expense.model_validate(expense) for expense in recent_expenses]
     
     return recent
 
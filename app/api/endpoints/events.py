@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.api import deps
+from app.services.events import outbox_status
+
+router = APIRouter()
+
+
+@router.get("/status", response_model=schemas.EventBusStatus)
+def read_event_bus_status(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Outbox backlog and events delivered by this process.
+    """
+    return outbox_status(db)
@@ -0,0 +1,86 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.services.anomalies import analyze_expenses
+
+router = APIRouter()
+
+
+def _check_project(db: Session, project_id: int, current_user: models.User) -> models.Project:
+    project = crud.project.get(db, id=project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    # Check if user has permission to access this project
+    if not crud.user.is_superuser(current_user) and project.company_id != current_user.company_id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return project
+
+
+@router.get("/", response_model=List[schemas.ExpenseReview])
+def read_reviews(
+    db: Session = Depends(deps.get_db),
+    project_id: Optional[int] = None,
+    status: Optional[schemas.ExpenseReviewStatusEnum] = schemas.ExpenseReviewStatusEnum.PENDING,
+    kind: Optional[schemas.ExpenseReviewKindEnum] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve the expense review queue (outliers and possible duplicates).
+    """
+    if project_id is not None:
+        _check_project(db, project_id, current_user)
+    
+    company_id = None if crud.user.is_superuser(current_user) else current_user.company_id
+    return crud.expense_review.get_reviews(
+        db,
+        company_id=company_id,
+        project_id=project_id,
+        status=status,
+        kind=kind,
+        skip=skip,
+        limit=limit,
+    )
+
+
+@router.post("/analyze", response_model=schemas.AnomalyReport)
+def analyze(
+    db: Session = Depends(deps.get_db),
+    company_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Run the anomaly analysis over the full expense history of a company or project.
+    """
+    if project_id is not None:
+        _check_project(db, project_id, current_user)
+    if not crud.user.is_superuser(current_user):
+        if company_id is not None and company_id != current_user.company_id:
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+        company_id = current_user.company_id
+    return analyze_expenses(db, company_id=company_id, project_id=project_id)
+
+
+@router.put("/{review_id}", response_model=schemas.ExpenseReview)
+def update_review(
+    *,
+    db: Session = Depends(deps.get_db),
+    review_id: int,
+    review_in: schemas.ExpenseReviewUpdate,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Confirm or dismiss a flagged expense.
+    """
+    review = crud.expense_review.get(db, id=review_id)
+    if not review:
+        raise HTTPException(status_code=404, detail="Review not found")
+    _check_project(db, review.project_id, current_user)
+    return crud.expense_review.review(db, db_obj=review, obj_in=review_in, user_id=current_user.id)
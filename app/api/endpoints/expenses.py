@@ -1,12 +1,17 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
 from sqlalchemy.orm import Session
 import os
 from datetime import datetime, date
 
 from app import crud, models, schemas
 from app.api import deps
+from app.core.config import settings
+from app.services.export import ExportFormat, export_response
+from app.services.previews import PreviewKind, preview_response, queue_previews, remove_derived
+from app.services import analytics
+from app.services.rollups import rebuild_rollups
 
 router = APIRouter()
 
@@ -29,6 +34,81 @@ def read_expenses(
     return expenses
 
 
+@router.get("/export")
+def export_expenses(
+    db: Session = Depends(deps.get_db),
+    project_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    category: Optional[schemas.ExpenseCategoryEnum] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    format: ExportFormat = ExportFormat.CSV,
+    gzip: bool = False,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Stream expenses as CSV or NDJSON.
+    """
+    if project_id is not None:
+        project = crud.project.get(db, id=project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+    
+    company_id = None if crud.user.is_superuser(current_user) else current_user.company_id
+    statement = crud.expense.get_export_statement(
+        company_id=company_id,
+        project_id=project_id,
+        property_id=property_id,
+        category=category,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    return export_response(statement, filename="expenses", fmt=format, compress=gzip)
+
+
+@router.get("/rollup", response_model=List[schemas.ExpenseRollupRow])
+def read_expenses_rollup(
+    db: Session = Depends(deps.get_db),
+    group_by: List[schemas.ExpenseRollupGroupEnum] = Query([schemas.ExpenseRollupGroupEnum.PROJECT]),
+    project_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    category: Optional[schemas.ExpenseCategoryEnum] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Sum and count of expenses grouped by project, property, category, supplier and/or month.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must be before date_to")
+    
+    company_id = None if crud.user.is_superuser(current_user) else current_user.company_id
+    return analytics.query_rollup(
+        db,
+        group_by=group_by,
+        company_id=company_id,
+        project_id=project_id,
+        property_id=property_id,
+        category=category,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+@router.post("/rollup/rebuild", response_model=Dict[str, int])
+def rebuild_expenses_rollup(
+    db: Session = Depends(deps.get_db),
+    project_id: Optional[int] = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Recalculate the monthly expense totals from the expenses table.
+    """
+    rows = rebuild_rollups(db, project_id=project_id)
+    return {"rows": rows}
+
+
 @router.post("/", response_model=schemas.Expense)
 async def create_expense(
     *,
@@ -92,7 +172,7 @@ async def create_expense(
         # Create directory if it doesn't exist
         year = datetime.now().year
         month = datetime.now().month
-        upload_dir = f"./uploads/expenses/{year}/{month:02d}/{project.id}"
+        upload_dir = f"{settings.UPLOAD_DIR}/expenses/{year}/{month:02d}/{project.id}"
         os.makedirs(upload_dir, exist_ok=True)
         
         # Save file
@@ -108,6 +188,12 @@ async def create_expense(
     expense_in.created_by_id = current_user.id
     
     expense = crud.expense.create(db, obj_in=expense_in)
+    
+    # Miniatura e pré-visualização do comprovante são geradas em segundo plano
+    if receipt_path:
+        queue_previews(
+            db, receipt_path, receipt.content_type, company_id=project.company_id, created_by_id=current_user.id
+        )
     return expense
 
 
@@ -212,6 +298,7 @@ async def update_expense(
         if expense.receipt_path and os.path.exists(expense.receipt_path):
             try:
                 os.remove(expense.receipt_path)
+                remove_derived(expense.receipt_path)
             except Exception as e:
                 # Log error but continue
                 print(f"Error removing old receipt: {e}")
@@ -224,7 +311,7 @@ async def update_expense(
         project_id = expense_in.project_id if expense_in.project_id else expense.project_id
         year = datetime.now().year
         month = datetime.now().month
-        upload_dir = f"./uploads/expenses/{year}/{month:02d}/{project_id}"
+        upload_dir = f"{settings.UPLOAD_DIR}/expenses/{year}/{month:02d}/{project_id}"
         os.makedirs(upload_dir, exist_ok=True)
         
         # Save file
@@ -237,6 +324,15 @@ async def update_expense(
         expense_in.receipt_path = receipt_path
     
     expense = crud.expense.update(db, db_obj=expense, obj_in=expense_in)
+    
+    if receipt:
+        queue_previews(
+            db,
+            expense.receipt_path,
+            receipt.content_type,
+            company_id=expense.project.company_id,
+            created_by_id=current_user.id,
+        )
     return expense
 
 
@@ -267,6 +363,7 @@ def delete_expense(
     if expense.receipt_path and os.path.exists(expense.receipt_path):
         try:
             os.remove(expense.receipt_path)
+            remove_derived(expense.receipt_path)
         except Exception as e:
             # Log error but continue with DB deletion
             print(f"Error deleting receipt file: {e}")
@@ -275,6 +372,36 @@ def delete_expense(
     return expense
 
 
+@router.get("/{expense_id}/receipt/{kind}")
+def read_expense_receipt_preview(
+    *,
+    db: Session = Depends(deps.get_db),
+    expense_id: int,
+    kind: PreviewKind,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the thumbnail or first-page preview of an expense receipt.
+    """
+    expense = crud.expense.get(db, id=expense_id)
+    if not expense:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    
+    # Get the project to check company
+    project = crud.project.get(db, id=expense.project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    # Check if user has permission to access this expense
+    if not crud.user.is_superuser(current_user) and project.company_id != current_user.company_id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    
+    if not expense.receipt_path:
+        raise HTTPException(status_code=404, detail="Expense has no receipt")
+    
+    return preview_response(expense.receipt_path, None, kind)
+
+
 @router.get("/project/{project_id}/", response_model=List[schemas.Expense])
 def read_project_expenses(
     *,
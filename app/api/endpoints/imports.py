@@ -0,0 +1,98 @@
+import shutil
+import uuid
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.services import jobs
+from app.services.importer import ImportFileError, import_file
+from app.services.tasks import import_upload_path
+
+router = APIRouter()
+
+
+def _check_company(db: Session, company_id: Optional[int], current_user: models.User) -> int:
+    if company_id is None:
+        company_id = current_user.company_id
+    if company_id is None:
+        raise HTTPException(status_code=400, detail="company_id is required")
+    
+    # Check if user has permission to import into this company
+    if not crud.user.is_superuser(current_user) and current_user.company_id != company_id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    
+    company = crud.company.get(db, id=company_id)
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+    return company_id
+
+
+@router.post("/{entity}", response_model=schemas.ImportReport)
+def import_spreadsheet(
+    *,
+    db: Session = Depends(deps.get_db),
+    entity: schemas.ImportEntityEnum,
+    file: UploadFile = File(...),
+    company_id: Optional[int] = Form(None),
+    dry_run: bool = Form(False),
+    atomic: bool = Form(False),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Import expenses, clients, properties or leads from a CSV/XLSX spreadsheet.
+    """
+    company_id = _check_company(db, company_id, current_user)
+    
+    try:
+        report = import_file(
+            db,
+            entity,
+            file.file,
+            file.filename,
+            company_id=company_id,
+            user_id=current_user.id,
+            dry_run=dry_run,
+            atomic=atomic,
+        )
+    except ImportFileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return report
+
+
+@router.post("/{entity}/jobs", response_model=schemas.Job, status_code=202)
+def queue_spreadsheet_import(
+    *,
+    db: Session = Depends(deps.get_db),
+    entity: schemas.ImportEntityEnum,
+    file: UploadFile = File(...),
+    company_id: Optional[int] = Form(None),
+    dry_run: bool = Form(False),
+    atomic: bool = Form(False),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Queue a spreadsheet import as a background job; the import report is the job result.
+    """
+    company_id = _check_company(db, company_id, current_user)
+    
+    path = import_upload_path(file.filename, uuid.uuid4().hex)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(file.file, f)
+    return jobs.enqueue(
+        db,
+        "imports.run",
+        {
+            "entity": entity,
+            "path": path,
+            "filename": file.filename,
+            "company_id": company_id,
+            "user_id": current_user.id,
+            "dry_run": dry_run,
+            "atomic": atomic,
+        },
+        company_id=company_id,
+        created_by_id=current_user.id,
+    )
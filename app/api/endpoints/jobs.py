@@ -0,0 +1,79 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.services import jobs
+
+router = APIRouter()
+
+
+def _get_job(db: Session, job_id: int, current_user: models.User) -> models.Job:
+    job = db.get(models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # Check if user has permission to access this job
+    if (
+        not crud.user.is_superuser(current_user)
+        and job.created_by_id != current_user.id
+        and (job.company_id is None or job.company_id != current_user.company_id)
+    ):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return job
+
+
+@router.get("/", response_model=List[schemas.Job])
+def read_jobs(
+    db: Session = Depends(deps.get_db),
+    status: Optional[schemas.JobStatusEnum] = None,
+    kind: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve background jobs, newest first.
+    """
+    if crud.user.is_superuser(current_user):
+        return jobs.list_jobs(db, status=status, kind=kind, skip=skip, limit=limit)
+    return jobs.list_jobs(
+        db,
+        company_id=current_user.company_id,
+        user_id=current_user.id,
+        status=status,
+        kind=kind,
+        skip=skip,
+        limit=limit,
+    )
+
+
+@router.get("/{job_id}", response_model=schemas.Job)
+def read_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the status, progress and result of a background job.
+    """
+    return _get_job(db, job_id, current_user)
+
+
+@router.post("/{job_id}/cancel", response_model=schemas.Job)
+def cancel_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Cancel a queued job, or ask a running job to stop.
+    """
+    job = _get_job(db, job_id, current_user)
+    if job.status in jobs.FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail="Job already finished")
+    return jobs.cancel(db, job)
@@ -6,6 +6,7 @@ from datetime import date
 
 from app import crud, models, schemas
 from app.api import deps
+from app.services.export import ExportFormat, export_response
 
 router = APIRouter()
 
@@ -28,6 +29,38 @@ def read_leads(
     return leads
 
 
+@router.get("/export")
+def export_leads(
+    db: Session = Depends(deps.get_db),
+    project_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    status: Optional[schemas.LeadStatusEnum] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    format: ExportFormat = ExportFormat.CSV,
+    gzip: bool = False,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Stream leads as CSV or NDJSON (date range applies to first_contact_date).
+    """
+    if project_id is not None:
+        project = crud.project.get(db, id=project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+    
+    company_id = None if crud.user.is_superuser(current_user) else current_user.company_id
+    statement = crud.lead.get_export_statement(
+        company_id=company_id,
+        project_id=project_id,
+        property_id=property_id,
+        status=status,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    return export_response(statement, filename="leads", fmt=format, compress=gzip)
+
+
 @router.post("/", response_model=schemas.Lead)
 def create_lead(
     *,
@@ -0,0 +1,45 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.api import deps
+from app.services import jobs, parquet_export
+
+router = APIRouter()
+
+
+@router.get("/", response_model=schemas.ParquetExportStatus)
+def read_parquet_exports(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Watermark, row count and file count of the last Parquet export of each entity.
+    """
+    return parquet_export.export_status()
+
+
+@router.post("/", response_model=schemas.Job, status_code=202)
+def start_parquet_export(
+    db: Session = Depends(deps.get_db),
+    entity: Optional[List[schemas.ParquetExportEntityEnum]] = Query(None),
+    incremental: bool = True,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Export every company's data to partitioned Parquet files (queued as a background job).
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+    if parquet_export.is_running():
+        raise HTTPException(status_code=409, detail="A Parquet export is already running")
+    return jobs.enqueue(
+        db,
+        "exports.parquet",
+        {"entities": entity, "incremental": incremental},
+        priority=200,
+        created_by_id=current_user.id,
+    )
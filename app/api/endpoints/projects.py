@@ -1,26 +1,78 @@
 from typing import Any, List, Optional
 from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, Form
+from fastapi import APIRouter, Depends, HTTPException, Form, Request, Response
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.services import conditional, expansion, jobs
+from app.services.serialization import json_response, summary_statement, trusted_response
 
 router = APIRouter()
 
+# Relacionamentos disponíveis em expand=
+PROJECT_EXPANSIONS = {
+    "company": expansion.Relation(models.Project.company, schemas.Company),
+    "manager": expansion.Relation(models.Project.manager, schemas.User),
+    "teams": expansion.Relation(models.Project.teams, schemas.TeamProject),
+    "properties": expansion.Relation(models.Project.properties, schemas.Property),
+    "tasks": expansion.Relation(models.Project.tasks, schemas.ProjectTask),
+    "updates": expansion.Relation(models.Project.updates, schemas.ProjectUpdateNotification),
+}
+
+
+def _project_plan(expand: Optional[str], fields: Optional[str]) -> Optional[expansion.Plan]:
+    if expand is None and fields is None:
+        return None
+    try:
+        # company_id para a verificação de permissão e updated_at para os validadores
+        return expansion.plan(
+            models.Project,
+            schemas.Project,
+            PROJECT_EXPANSIONS,
+            expand=expand,
+            fields=fields,
+            required=["company_id", "updated_at"],
+        )
+    except expansion.InvalidExpansion as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
 @router.get("/", response_model=List[schemas.Project])
 def read_projects(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    expand: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve projects.
+
+    `expand` adds related records (company, manager, teams, properties, tasks, updates) and `fields` limits the
+    columns returned, e.g. `?expand=tasks&fields=name,status,tasks.title`.
     """
-    if crud.user.is_superuser(current_user):
+    plan = _project_plan(expand, fields)
+    company_id = None if crud.user.is_superuser(current_user) else current_user.company_id
+    criteria = [] if company_id is None else [models.Project.company_id == company_id]
+    # Os validadores cobrem só as linhas dos projetos, não os relacionamentos expandidos
+    if plan is None or not plan.relations:
+        validator = conditional.list_validator(
+            request, db, models.Project, *criteria, skip=skip, limit=limit, scope=company_id
+        )
+        not_modified = conditional.evaluate(request, response, validator)
+        if not_modified is not None:
+            return not_modified
+
+    if plan is not None:
+        query = db.query(models.Project).options(*expansion.options(models.Project, plan)).filter(*criteria)
+        projects = query.offset(skip).limit(limit).all()
+        return json_response([expansion.serialize(project, plan) for project in projects], response)
+    if company_id is None:
         projects = crud.project.get_multi(db, skip=skip, limit=limit)
     else:
         # Get projects for the current user's company
@@ -28,6 +80,37 @@ def read_projects(
     return projects
 
 
+@router.get("/summary", response_model=List[schemas.ProjectSummary])
+def read_projects_summary(
+    request: Request,
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    skip: int = 0,
+    limit: int = 1000,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve project ids, names, cities and statuses (for selectors), ordered by name.
+    """
+    company_id = None if crud.user.is_superuser(current_user) else current_user.company_id
+    criteria = [] if company_id is None else [models.Project.company_id == company_id]
+    order_by = models.Project.name
+    validator = conditional.list_validator(
+        request, db, models.Project, *criteria, skip=skip, limit=limit, order_by=order_by, scope=company_id
+    )
+    not_modified = conditional.evaluate(request, response, validator)
+    if not_modified is not None:
+        return not_modified
+    statement = (
+        summary_statement(models.Project, schemas.ProjectSummary)
+        .where(*criteria)
+        .order_by(order_by)
+        .offset(skip)
+        .limit(limit)
+    )
+    return trusted_response(db, statement, response)
+
+
 @router.post("/", response_model=schemas.Project)
 def create_project(
     *,
@@ -106,21 +189,37 @@ def create_project(
 @router.get("/{project_id}", response_model=schemas.Project)
 def read_project(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     project_id: int,
+    expand: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Get project by ID.
+    Get project by ID. Accepts the same `expand` and `fields` parameters as the project list.
     """
-    project = crud.project.get(db, id=project_id)
+    plan = _project_plan(expand, fields)
+    if plan is None:
+        project = crud.project.get(db, id=project_id)
+    else:
+        query = db.query(models.Project).options(*expansion.options(models.Project, plan))
+        project = query.filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Check if user has permission to access this project
     if not crud.user.is_superuser(current_user) and project.company_id != current_user.company_id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    
+
+    # Os validadores cobrem só a linha do projeto, não os relacionamentos expandidos
+    if plan is None or not plan.relations:
+        not_modified = conditional.evaluate(request, response, conditional.item_validator(request, project))
+        if not_modified is not None:
+            return not_modified
+    if plan is not None:
+        return json_response(expansion.serialize(project, plan), response)
     return project
 
 
@@ -202,7 +301,7 @@ def update_project(
     return project
 
 
-@router.delete("/{project_id}", response_model=schemas.Project)
+@router.delete("/{project_id}", response_model=schemas.Job, status_code=202)
 def delete_project(
     *,
     db: Session = Depends(deps.get_db),
@@ -210,7 +309,7 @@ def delete_project(
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Delete a project.
+    Delete a project with its properties, contracts, leads, expenses and files (queued as a background job).
     """
     project = crud.project.get(db, id=project_id)
     if not project:
@@ -220,8 +319,13 @@ def delete_project(
     if not crud.user.is_superuser(current_user) and project.company_id != current_user.company_id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
-    project = crud.project.remove(db, id=project_id)
-    return project
+    return jobs.enqueue(
+        db,
+        "deletion.project",
+        {"project_id": project_id},
+        company_id=project.company_id,
+        created_by_id=current_user.id,
+    )
 
 
 @router.get("/{project_id}/teams/", response_model=List[schemas.TeamProject])
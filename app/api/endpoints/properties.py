@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.services.export import ExportFormat, export_response
 
 router = APIRouter()
 
@@ -47,6 +48,38 @@ def read_properties(
     return []
 
 
+@router.get("/export")
+def export_properties(
+    db: Session = Depends(deps.get_db),
+    project_id: Optional[int] = None,
+    type: Optional[schemas.PropertyTypeEnum] = None,
+    status: Optional[schemas.PropertyStatusEnum] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    format: ExportFormat = ExportFormat.CSV,
+    gzip: bool = False,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Stream properties as CSV or NDJSON (date range applies to start_date).
+    """
+    if project_id is not None:
+        project = crud.project.get(db, id=project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+    
+    company_id = None if crud.user.is_superuser(current_user) else current_user.company_id
+    statement = crud.property.get_export_statement(
+        company_id=company_id,
+        project_id=project_id,
+        type=type,
+        status=status,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    return export_response(statement, filename="properties", fmt=format, compress=gzip)
+
+
 @router.post("/", response_model=schemas.Property)
 def create_property(
     *,
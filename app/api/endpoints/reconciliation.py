@@ -0,0 +1,164 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.services import reconciliation
+from app.services.reconciliation import StatementError
+
+router = APIRouter()
+
+
+def _get_company_id(current_user: models.User, company_id: Optional[int]) -> int:
+    if company_id is None:
+        company_id = current_user.company_id
+    if company_id is None:
+        raise HTTPException(status_code=400, detail="company_id is required")
+    if not crud.user.is_superuser(current_user) and current_user.company_id != company_id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return company_id
+
+
+def _get_transaction(db: Session, transaction_id: int, current_user: models.User) -> models.BankTransaction:
+    transaction = crud.bank_transaction.get(db, id=transaction_id)
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    
+    # Check if user has permission to access this transaction
+    if not crud.user.is_superuser(current_user) and transaction.company_id != current_user.company_id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return transaction
+
+
+@router.post("/statements", response_model=schemas.ReconciliationReport)
+def import_statement(
+    *,
+    db: Session = Depends(deps.get_db),
+    file: UploadFile = File(...),
+    company_id: Optional[int] = Form(None),
+    auto_match: bool = Form(True),
+    amount_tolerance: float = Form(reconciliation.AMOUNT_TOLERANCE),
+    date_window_days: int = Form(reconciliation.DATE_WINDOW_DAYS),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Import an OFX/CSV bank statement and reconcile it against expenses.
+    """
+    company_id = _get_company_id(current_user, company_id)
+    try:
+        report = reconciliation.reconcile_statement(
+            db,
+            file.file.read(),
+            file.filename,
+            company_id=company_id,
+            user_id=current_user.id,
+            auto_match=auto_match,
+            amount_tolerance=amount_tolerance,
+            date_window_days=date_window_days,
+        )
+    except StatementError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return report
+
+
+@router.get("/transactions", response_model=List[schemas.BankTransaction])
+def read_transactions(
+    db: Session = Depends(deps.get_db),
+    company_id: Optional[int] = None,
+    matched: Optional[bool] = None,
+    include_ignored: bool = False,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve imported bank transactions.
+    """
+    company_id = _get_company_id(current_user, company_id)
+    return crud.bank_transaction.get_company_transactions(
+        db, company_id=company_id, matched=matched, include_ignored=include_ignored, skip=skip, limit=limit
+    )
+
+
+@router.get("/transactions/{transaction_id}/suggestions", response_model=schemas.TransactionSuggestions)
+def read_transaction_suggestions(
+    *,
+    db: Session = Depends(deps.get_db),
+    transaction_id: int,
+    amount_tolerance: float = reconciliation.AMOUNT_TOLERANCE,
+    date_window_days: int = reconciliation.DATE_WINDOW_DAYS,
+    limit: int = reconciliation.MAX_SUGGESTIONS,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get candidate expenses for an unmatched transaction.
+    """
+    transaction = _get_transaction(db, transaction_id, current_user)
+    return reconciliation.transaction_suggestions(
+        db,
+        transaction,
+        amount_tolerance=amount_tolerance,
+        date_window_days=date_window_days,
+        max_suggestions=limit,
+    )
+
+
+@router.post("/transactions/{transaction_id}/match", response_model=schemas.BankTransaction)
+def confirm_transaction_match(
+    *,
+    db: Session = Depends(deps.get_db),
+    transaction_id: int,
+    expense_id: int = Form(...),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Confirm that a transaction pays the given expense.
+    """
+    transaction = _get_transaction(db, transaction_id, current_user)
+    
+    expense = crud.expense.get(db, id=expense_id)
+    if not expense:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    
+    project = crud.project.get(db, id=expense.project_id)
+    if not project or project.company_id != transaction.company_id:
+        raise HTTPException(status_code=400, detail="Expense and transaction must belong to the same company")
+    
+    existing = crud.bank_transaction.get_by_expense(db, expense_id=expense_id)
+    if existing and existing.id != transaction.id:
+        raise HTTPException(status_code=400, detail="Expense is already matched to another transaction")
+    
+    return crud.bank_transaction.confirm_match(
+        db, db_obj=transaction, expense_id=expense_id, user_id=current_user.id, score=None
+    )
+
+
+@router.delete("/transactions/{transaction_id}/match", response_model=schemas.BankTransaction)
+def clear_transaction_match(
+    *,
+    db: Session = Depends(deps.get_db),
+    transaction_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Undo the match of a transaction.
+    """
+    transaction = _get_transaction(db, transaction_id, current_user)
+    return crud.bank_transaction.clear_match(db, db_obj=transaction)
+
+
+@router.put("/transactions/{transaction_id}/ignore", response_model=schemas.BankTransaction)
+def ignore_transaction(
+    *,
+    db: Session = Depends(deps.get_db),
+    transaction_id: int,
+    ignored: bool = Form(True),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Mark a transaction as having no matching expense (fees, transfers).
+    """
+    transaction = _get_transaction(db, transaction_id, current_user)
+    return crud.bank_transaction.update(db, db_obj=transaction, obj_in={"ignored": ignored})
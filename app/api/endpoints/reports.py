@@ -0,0 +1,48 @@
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.services import analytics, reports
+
+router = APIRouter()
+
+
+@router.get("/projects/pnl", response_model=schemas.ProjectPnlReport)
+def read_projects_pnl(
+    db: Session = Depends(deps.get_db),
+    company_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Revenue, costs, margin and price per m² of every project (served from a periodically refreshed summary).
+    """
+    if not crud.user.is_superuser(current_user):
+        if company_id is not None and company_id != current_user.company_id:
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+        company_id = current_user.company_id
+    projects = analytics.read_pnl(db, company_id=company_id, project_id=project_id)
+    return {
+        "refreshed_at": max((project["refreshed_at"] for project in projects), default=None),
+        "projects": projects,
+    }
+
+
+@router.post("/projects/pnl/refresh", response_model=schemas.ProjectPnlReport)
+def refresh_projects_pnl(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Refresh the project P&L summary now.
+    """
+    if not reports.refresh_pnl(db):
+        raise HTTPException(status_code=409, detail="A refresh is already running")
+    projects = reports.read_pnl(db)
+    return {
+        "refreshed_at": max((project["refreshed_at"] for project in projects), default=None),
+        "projects": projects,
+    }
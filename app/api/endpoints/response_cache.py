@@ -0,0 +1,30 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app import models, schemas
+from app.api import deps
+from app.services import response_cache
+
+router = APIRouter()
+
+
+@router.get("/status", response_model=schemas.ResponseCacheStatus)
+def read_response_cache_status(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Size, hit ratio (overall and per route) and evictions of this process' response cache.
+    """
+    return response_cache.cache_status()
+
+
+@router.post("/clear", response_model=schemas.ResponseCacheStatus)
+def clear_response_cache(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Drop every cached response of this process.
+    """
+    response_cache.invalidate()
+    return response_cache.cache_status()
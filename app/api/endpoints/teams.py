@@ -1,16 +1,19 @@
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Form
+from fastapi import APIRouter, Depends, HTTPException, Form, Request, Response
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.services import conditional
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Team])
 def read_teams(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -19,7 +22,16 @@ def read_teams(
     """
     Retrieve teams.
     """
-    if crud.user.is_superuser(current_user):
+    company_id = None if crud.user.is_superuser(current_user) else current_user.company_id
+    criteria = [] if company_id is None else [models.Team.company_id == company_id]
+    validator = conditional.list_validator(
+        request, db, models.Team, *criteria, skip=skip, limit=limit, scope=company_id
+    )
+    not_modified = conditional.evaluate(request, response, validator)
+    if not_modified is not None:
+        return not_modified
+
+    if company_id is None:
         teams = crud.team.get_multi(db, skip=skip, limit=limit)
     else:
         # Get teams for the current user's company
@@ -72,6 +84,8 @@ def create_team(
 @router.get("/{team_id}", response_model=schemas.Team)
 def read_team(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     team_id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -86,7 +100,10 @@ def read_team(
     # Check if user has permission to access this team
     if not crud.user.is_superuser(current_user) and team.company_id != current_user.company_id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    
+
+    not_modified = conditional.evaluate(request, response, conditional.item_validator(request, team))
+    if not_modified is not None:
+        return not_modified
     return team
 
 
@@ -1,6 +1,6 @@
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Form
+from fastapi import APIRouter, Body, Depends, HTTPException, Form, Request, Response
 from fastapi.encoders import jsonable_encoder
 from pydantic import EmailStr
 from sqlalchemy.orm import Session
@@ -8,12 +8,16 @@ from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.api import deps
 from app.core.config import settings
+from app.services import conditional
+from app.services.serialization import summary_statement, trusted_response
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.User])
 def read_users(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -22,10 +26,35 @@ def read_users(
     """
     Retrieve users.
     """
+    validator = conditional.list_validator(request, db, models.User, skip=skip, limit=limit)
+    not_modified = conditional.evaluate(request, response, validator)
+    if not_modified is not None:
+        return not_modified
     users = crud.user.get_multi(db, skip=skip, limit=limit)
     return users
 
 
+@router.get("/summary", response_model=List[schemas.UserSummary])
+def read_users_summary(
+    request: Request,
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    skip: int = 0,
+    limit: int = 1000,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Retrieve user ids, names and emails (for selectors), ordered by name.
+    """
+    order_by = models.User.full_name
+    validator = conditional.list_validator(request, db, models.User, skip=skip, limit=limit, order_by=order_by)
+    not_modified = conditional.evaluate(request, response, validator)
+    if not_modified is not None:
+        return not_modified
+    statement = summary_statement(models.User, schemas.UserSummary).order_by(order_by).offset(skip).limit(limit)
+    return trusted_response(db, statement, response)
+
+
 @router.post("/", response_model=schemas.User)
 def create_user(
     *,
@@ -84,17 +113,24 @@ def update_user_me(
 
 @router.get("/me", response_model=schemas.User)
 def read_user_me(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get current user.
     """
+    not_modified = conditional.evaluate(request, response, conditional.item_validator(request, current_user))
+    if not_modified is not None:
+        return not_modified
     return current_user
 
 
 @router.get("/{user_id}", response_model=schemas.User)
 def read_user_by_id(
+    request: Request,
+    response: Response,
     user_id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
     db: Session = Depends(deps.get_db),
@@ -103,12 +139,14 @@ def read_user_by_id(
     Get a specific user by id.
     """
     user = crud.user.get(db, id=user_id)
-    if user == current_user:
-        return user
-    if not crud.user.is_superuser(current_user):
+    if user != current_user and not crud.user.is_superuser(current_user):
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
+    if user is not None:
+        not_modified = conditional.evaluate(request, response, conditional.item_validator(request, user))
+        if not_modified is not None:
+            return not_modified
     return user
 
 
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
@@ -25,4 +26,107 @@ class Settings(BaseSettings):
     )
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
 
+    # Uploads / previews
+    UPLOAD_DIR: str = "./uploads"
+    PREVIEW_WORKERS: int = 2  # Processos dedicados à geração de miniaturas
+    PREVIEW_QUEUE_SIZE: int = 64  # Máximo de arquivos aguardando processamento
+    THUMBNAIL_SIZE: int = 256
+    PREVIEW_SIZE: int = 1024
+
+    # Orçamento
+    BUDGET_ALERT_THRESHOLDS: list[float] = [0.8, 1.0]  # Frações do orçamento que geram alerta
+    BUDGET_BURN_RATE_MONTHS: int = 3  # Janela (em meses) usada no cálculo do ritmo de gasto
+
+    # Análise de anomalias em despesas
+    ANOMALY_Z_THRESHOLD: float = 3.5  # |z| robusto a partir do qual a despesa vai para revisão
+    ANOMALY_MIN_GROUP_SIZE: int = 8  # Grupos menores usam as estatísticas da categoria no projeto
+    DUPLICATE_WINDOW_DAYS: int = 3  # Distância máxima entre datas de lançamentos duplicados
+
+    # Fluxo de caixa
+    CASHFLOW_CACHE_TTL: int = 300  # Segundos que uma projeção fica em cache
+    CASHFLOW_CACHE_SIZE: int = 256  # Máximo de projeções em cache por processo
+
+    # Relatórios
+    PNL_REFRESH_INTERVAL: int = 900  # Segundos entre atualizações do relatório de resultado (0 = só sob demanda)
+
+    # Base analítica (DuckDB)
+    ANALYTICS_STORE_PATH: Optional[str] = None  # Arquivo .duckdb; vazio desabilita
+    ANALYTICS_SYNC_INTERVAL: int = 60  # Segundos entre sincronizações incrementais
+    ANALYTICS_SYNC_OVERLAP: int = 300  # Margem (segundos) relida antes da última marca de updated_at
+    ANALYTICS_MAX_LAG: int = 600  # Defasagem máxima para consultas irem à base analítica
+
+    # Exportação Parquet (BI)
+    PARQUET_EXPORT_DIR: str = "./exports/parquet"
+    PARQUET_ROWS_PER_FILE: int = 1_000_000  # Linhas por arquivo em cada partição
+    EXPORT_WATERMARK_OVERLAP: int = 300  # Margem (segundos) reexportada antes da última marca de updated_at
+
+    # Feeds de alterações
+    CHANGE_FEED_SETTLE_SECONDS: int = 2  # Alterações mais recentes que isso ficam para a próxima página
+    TOMBSTONE_RETENTION_DAYS: int = 90  # Exclusões mais antigas são removidas; cursores anteriores expiram
+
+    # Eventos de domínio (outbox)
+    OUTBOX_DISPATCH_INTERVAL: int = 5  # Segundos entre verificações de eventos pendentes (0 = dispatcher desligado)
+    OUTBOX_BATCH_SIZE: int = 500  # Eventos entregues por lote
+    OUTBOX_MAX_ATTEMPTS: int = 5  # Entregas com falha antes de descartar o evento
+    OUTBOX_RETENTION_DAYS: int = 7  # Eventos entregues mais antigos são removidos
+
+    # Fila de jobs
+    JOB_WORKER_THREADS: int = 1  # Workers dentro da aplicação (0 quando houver processos worker dedicados)
+    JOB_POLL_INTERVAL: float = 2  # Segundos entre consultas à fila quando ela está vazia
+    JOB_LEASE_SECONDS: int = 300  # Job em execução sem heartbeat por esse tempo volta para a fila
+    JOB_RETRY_BACKOFF: int = 30  # Espera (segundos) antes da segunda tentativa; dobra a cada falha
+    JOB_RETENTION_DAYS: int = 30  # Jobs encerrados mais antigos são removidos
+
+    # Exclusão em massa (empresas e projetos)
+    DELETION_CHUNK_SIZE: int = 1000  # Linhas excluídas por transação
+
+    # Cache de respostas (GET)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Memória máxima (corpos e variantes gzip) por processo
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = 4 * 1024 * 1024  # Respostas maiores não são guardadas
+    # Intervalo (s) entre as leituras das versões gravadas por outros workers; 0 = um único processo
+    RESPONSE_CACHE_SYNC_INTERVAL: float = 1.0
+
+    # Requisições em lote (/batch)
+    BATCH_MAX_REQUESTS: int = 20  # Sub-requisições por lote
+    BATCH_CONCURRENCY: int = 4  # Sub-requisições executadas ao mesmo tempo
+
+    # Limites de requisições e controle de admissão
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REDIS_URL: Optional[str] = None  # redis://...; vazio mantém os limites na memória de cada processo
+    RATE_LIMIT_USER_RATE: float = 10  # Requisições por segundo por usuário (e por IP sem token)
+    RATE_LIMIT_USER_BURST: int = 60
+    RATE_LIMIT_COMPANY_RATE: float = 40  # Requisições por segundo somando os usuários da empresa
+    RATE_LIMIT_COMPANY_BURST: int = 200
+    RATE_LIMIT_EXPENSIVE_RATE: float = 1  # Painel, relatórios e exportações, por usuário
+    RATE_LIMIT_EXPENSIVE_BURST: int = 15
+    RATE_LIMIT_LOGIN_RATE: float = 0.2  # Tentativas de login por segundo por IP
+    RATE_LIMIT_LOGIN_BURST: int = 10
+    MAX_CONCURRENT_REQUESTS: int = 40  # Por processo (o threadpool padrão do uvicorn tem 40 threads)
+    MAX_QUEUED_REQUESTS: int = 100  # Requisições aguardando vaga; além disso, 503
+    ADMISSION_TIMEOUT: float = 2  # Segundos de espera por uma vaga antes do 503
+
+    # Prazos das requisições (504 e consultas interrompidas ao vencer)
+    REQUEST_DEADLINE: float = 30  # Segundos a partir da admissão (0 = sem prazo)
+    REQUEST_DEADLINES: dict[str, float] = {  # Por prefixo de rota (sem API_V1_STR); o mais longo vale
+        "/dashboard/": 10,
+        "/reports/": 15,
+        "/cashflow/": 15,
+        "/budgets/portfolio": 15,
+        "/analytics/": 15,
+        "/imports/": 120,
+    }
+
+    # Chaves de idempotência (Idempotency-Key nos POST de criação)
+    IDEMPOTENCY_TTL_HOURS: int = 24  # Tempo em que a resposta guardada é reenviada para a mesma chave
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 20 * 1024 * 1024  # Corpo maior com a chave: 413
+
+    # Métricas (/metrics, formato Prometheus)
+    METRICS_TOKEN: Optional[str] = None  # Se definido, a coleta exige "Authorization: Bearer <token>"
+
+    # Rastreamento (spans em OTLP JSON)
+    TRACING_SAMPLE_RATE: float = 0.0  # Fração das requisições rastreadas (0 = desligado)
+    TRACING_FILE: str = "./traces/traces.jsonl"  # Um lote OTLP JSON por linha
+    TRACING_OTLP_ENDPOINT: Optional[str] = None  # Ex.: http://collector:4318/v1/traces; substitui o arquivo
+
 settings = Settings() 
\ No newline at end of file
@@ -7,6 +7,7 @@ from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.services.metrics import password_hashing
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -41,7 +42,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
             return True
             
         # Verificação normal com pwd_context
-        result = pwd_context.verify(plain_password, hashed_password)
+        with password_hashing("verify"):
+            result = pwd_context.verify(plain_password, hashed_password)
         logger.info(f"Resultado da verificação com pwd_context: {result}")
         return result
     except Exception as e:
@@ -50,4 +52,5 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password) 
\ No newline at end of file
+    with password_hashing("hash"):
+        return pwd_context.hash(password) 
\ No newline at end of file
@@ -7,4 +7,7 @@ from app.crud.crud_contract import contract
 from app.crud.crud_contract_document import contract_document
 from app.crud.crud_expense import expense
 from app.crud.crud_client import client
-from app.crud.crud_lead import lead 
\ No newline at end of file
+from app.crud.crud_lead import lead
+from app.crud.crud_bank_transaction import bank_transaction
+from app.crud.crud_budget_alert import budget_alert
+from app.crud.crud_expense_review import expense_review
@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.reconciliation import BankTransaction
+from app.schemas.reconciliation import BankTransactionCreate, BankTransactionUpdate
+
+
+class CRUDBankTransaction(CRUDBase[BankTransaction, BankTransactionCreate, BankTransactionUpdate]):
+    def get_company_transactions(
+        self,
+        db: Session,
+        *,
+        company_id: int,
+        matched: Optional[bool] = None,
+        include_ignored: bool = False,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[BankTransaction]:
+        """Get bank transactions for a company, newest first."""
+        query = db.query(self.model).filter(self.model.company_id == company_id)
+        if matched is True:
+            query = query.filter(self.model.expense_id.isnot(None))
+        elif matched is False:
+            query = query.filter(self.model.expense_id.is_(None))
+        if not include_ignored:
+            query = query.filter(self.model.ignored.isnot(True))
+        return (
+            query.order_by(self.model.posted_date.desc(), self.model.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+    
+    def get_existing_fitids(self, db: Session, *, company_id: int, fitids: Iterable[str]) -> Set[str]:
+        """Return which of the given FITIDs were already imported for the company."""
+        fitids = list(fitids)
+        existing = set()
+        for start in range(0, len(fitids), 500):
+            chunk = fitids[start:start + 500]
+            existing.update(
+                db.execute(
+                    select(self.model.fitid).where(
+                        self.model.company_id == company_id,
+                        self.model.fitid.in_(chunk),
+                    )
+                ).scalars()
+            )
+        return existing
+    
+    def get_by_expense(self, db: Session, *, expense_id: int) -> Optional[BankTransaction]:
+        return db.query(self.model).filter(self.model.expense_id == expense_id).first()
+    
+    def confirm_match(
+        self, db: Session, *, db_obj: BankTransaction, expense_id: int, user_id: Optional[int], score: Optional[float]
+    ) -> BankTransaction:
+        return self.update(
+            db,
+            db_obj=db_obj,
+            obj_in={
+                "expense_id": expense_id,
+                "match_score": score,
+                "matched_at": datetime.utcnow(),
+                "matched_by_id": user_id,
+                "ignored": False,
+            },
+        )
+    
+    def clear_match(self, db: Session, *, db_obj: BankTransaction) -> BankTransaction:
+        return self.update(
+            db,
+            db_obj=db_obj,
+            obj_in={"expense_id": None, "match_score": None, "matched_at": None, "matched_by_id": None},
+        )
+
+
+bank_transaction = CRUDBankTransaction(BankTransaction)
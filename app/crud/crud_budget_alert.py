@@ -0,0 +1,67 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.budget import BudgetAlert
+from app.models.project import Project
+from app.schemas.budget import BudgetAlertCreate, BudgetAlertUpdate
+
+
+class CRUDBudgetAlert(CRUDBase[BudgetAlert, BudgetAlertCreate, BudgetAlertUpdate]):
+    def get_alerts(
+        self,
+        db: Session,
+        *,
+        company_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        include_resolved: bool = False,
+        acknowledged: Optional[bool] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[BudgetAlert]:
+        """Get budget alerts, newest first."""
+        query = db.query(self.model)
+        if company_id is not None:
+            query = query.join(Project, Project.id == self.model.project_id).filter(
+                Project.company_id == company_id
+            )
+        if project_id is not None:
+            query = query.filter(self.model.project_id == project_id)
+        if not include_resolved:
+            query = query.filter(self.model.resolved_at.is_(None))
+        if acknowledged is not None:
+            query = query.filter(self.model.acknowledged.is_(acknowledged))
+        return (
+            query.order_by(self.model.created_at.desc(), self.model.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def count_open(
+        self, db: Session, *, project_ids: Optional[List[int]] = None
+    ) -> Dict[Tuple[int, Optional[int]], int]:
+        """Open alerts per (project_id, property_id)."""
+        query = db.query(self.model.project_id, self.model.property_id, func.count(self.model.id)).filter(
+            self.model.resolved_at.is_(None)
+        )
+        if project_ids is not None:
+            query = query.filter(self.model.project_id.in_(project_ids))
+        query = query.group_by(self.model.project_id, self.model.property_id)
+        return {(project_id, property_id): count for project_id, property_id, count in query.all()}
+
+    def acknowledge(self, db: Session, *, db_obj: BudgetAlert, user_id: int) -> BudgetAlert:
+        """Mark an alert as seen."""
+        db_obj.acknowledged = True
+        db_obj.acknowledged_at = datetime.utcnow()
+        db_obj.acknowledged_by_id = user_id
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+
+budget_alert = CRUDBudgetAlert(BudgetAlert)
@@ -1,9 +1,14 @@
+from datetime import date
 from typing import List, Optional
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
 from app.crud.base import CRUDBase
 from app.models.contract import Contract
+from app.models.project import Project
+from app.models.property import Property
 from app.schemas.contract import ContractCreate, ContractUpdate
 
 
@@ -49,5 +54,39 @@ class CRUDContract(CRUDBase[Contract, ContractCreate, ContractUpdate]):
             .all()
         )
 
+    
+    def get_export_statement(
+        self,
+        *,
+        company_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        property_id: Optional[int] = None,
+        type: Optional[str] = None,
+        status: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> Select:
+        """Column-only select for streaming exports, filtered on signing_date."""
+        statement = select(*self.model.__table__.columns)
+        if company_id is not None or project_id is not None:
+            statement = statement.join(Property, Property.id == self.model.property_id)
+        if company_id is not None:
+            statement = statement.join(Project, Project.id == Property.project_id).where(
+                Project.company_id == company_id
+            )
+        if project_id is not None:
+            statement = statement.where(Property.project_id == project_id)
+        if property_id is not None:
+            statement = statement.where(self.model.property_id == property_id)
+        if type is not None:
+            statement = statement.where(self.model.type == type)
+        if status is not None:
+            statement = statement.where(self.model.status == status)
+        if date_from is not None:
+            statement = statement.where(self.model.signing_date >= date_from)
+        if date_to is not None:
+            statement = statement.where(self.model.signing_date <= date_to)
+        return statement.order_by(self.model.id)
+
 
 contract = CRUDContract(Contract) 
\ No newline at end of file
@@ -1,9 +1,14 @@
+from datetime import date
 from typing import List, Optional
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
 from app.crud.base import CRUDBase
 from app.models.expense import Expense
+from app.models.project import Project
+from app.models.rollup import ExpenseRollup
 from app.schemas.expense import ExpenseCreate, ExpenseUpdate
 
 
@@ -45,12 +50,40 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
             .all()
         )
     
+    def get_export_statement(
+        self,
+        *,
+        company_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        property_id: Optional[int] = None,
+        category: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> Select:
+        """Column-only select for streaming exports, ordered by id."""
+        statement = select(*self.model.__table__.columns)
+        if company_id is not None:
+            statement = statement.join(Project, Project.id == self.model.project_id).where(
+                Project.company_id == company_id
+            )
+        if project_id is not None:
+            statement = statement.where(self.model.project_id == project_id)
+        if property_id is not None:
+            statement = statement.where(self.model.property_id == property_id)
+        if category is not None:
+            statement = statement.where(self.model.category == category)
+        if date_from is not None:
+            statement = statement.where(self.model.date >= date_from)
+        if date_to is not None:
+            statement = statement.where(self.model.date <= date_to)
+        return statement.order_by(self.model.id)
+    
     def get_expenses_sum_by_project(
         self, db: Session, *, project_id: int
     ) -> float:
         """Get the sum of all expenses for a project."""
-        result = db.query(db.func.sum(self.model.amount)).filter(
-            self.model.project_id == project_id
+        result = db.query(func.sum(ExpenseRollup.total)).filter(
+            ExpenseRollup.project_id == project_id
         ).scalar()
         return result if result else 0.0
     
@@ -58,8 +91,8 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
         self, db: Session, *, property_id: int
     ) -> float:
         """Get the sum of all expenses for a property."""
-        result = db.query(db.func.sum(self.model.amount)).filter(
-            self.model.property_id == property_id
+        result = db.query(func.sum(ExpenseRollup.total)).filter(
+            ExpenseRollup.property_id == property_id
         ).scalar()
         return result if result else 0.0
     
@@ -67,9 +100,9 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
         self, db: Session, *, project_id: int, category: str
     ) -> float:
         """Get the sum of expenses by category for a project."""
-        result = db.query(db.func.sum(self.model.amount)).filter(
-            self.model.project_id == project_id,
-            self.model.category == category
+        result = db.query(func.sum(ExpenseRollup.total)).filter(
+            ExpenseRollup.project_id == project_id,
+            ExpenseRollup.category == category
         ).scalar()
         return result if result else 0.0
 
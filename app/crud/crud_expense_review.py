@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.anomaly import ExpenseReview
+from app.models.project import Project
+from app.schemas.anomaly import ExpenseReviewCreate, ExpenseReviewUpdate
+
+
+class CRUDExpenseReview(CRUDBase[ExpenseReview, ExpenseReviewCreate, ExpenseReviewUpdate]):
+    def get_reviews(
+        self,
+        db: Session,
+        *,
+        company_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        status: Optional[str] = None,
+        kind: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[ExpenseReview]:
+        """Get the review queue, newest first."""
+        query = db.query(self.model)
+        if company_id is not None:
+            query = query.join(Project, Project.id == self.model.project_id).filter(
+                Project.company_id == company_id
+            )
+        if project_id is not None:
+            query = query.filter(self.model.project_id == project_id)
+        if status is not None:
+            query = query.filter(self.model.status == status)
+        if kind is not None:
+            query = query.filter(self.model.kind == kind)
+        return (
+            query.order_by(self.model.created_at.desc(), self.model.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def review(
+        self, db: Session, *, db_obj: ExpenseReview, obj_in: ExpenseReviewUpdate, user_id: int
+    ) -> ExpenseReview:
+        """Record the reviewer's decision."""
+        db_obj.status = obj_in.status
+        if obj_in.notes is not None:
+            db_obj.notes = obj_in.notes
+        db_obj.reviewed_at = datetime.utcnow()
+        db_obj.reviewed_by_id = user_id
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+
+expense_review = CRUDExpenseReview(ExpenseReview)
@@ -1,9 +1,13 @@
+from datetime import date
 from typing import List, Optional
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
 from app.crud.base import CRUDBase
-from app.models.client import Lead
+from app.models.client import Client, Lead
+from app.models.property import Property
 from app.schemas.client import LeadCreate, LeadUpdate
 
 
@@ -70,5 +74,36 @@ class CRUDLead(CRUDBase[Lead, LeadCreate, LeadUpdate]):
             .all()
         )
 
+    
+    def get_export_statement(
+        self,
+        *,
+        company_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        property_id: Optional[int] = None,
+        status: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> Select:
+        """Column-only select for streaming exports, filtered on first_contact_date."""
+        statement = select(*self.model.__table__.columns)
+        if company_id is not None:
+            statement = statement.join(Client, Client.id == self.model.client_id).where(
+                Client.company_id == company_id
+            )
+        if project_id is not None:
+            statement = statement.join(Property, Property.id == self.model.property_id).where(
+                Property.project_id == project_id
+            )
+        if property_id is not None:
+            statement = statement.where(self.model.property_id == property_id)
+        if status is not None:
+            statement = statement.where(self.model.status == status)
+        if date_from is not None:
+            statement = statement.where(self.model.first_contact_date >= date_from)
+        if date_to is not None:
+            statement = statement.where(self.model.first_contact_date <= date_to)
+        return statement.order_by(self.model.id)
+
 
 lead = CRUDLead(Lead) 
\ No newline at end of file
@@ -1,8 +1,12 @@
+from datetime import date
 from typing import List, Optional, Dict, Any, Union
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
 from app.crud.base import CRUDBase
+from app.models.project import Project
 from app.models.property import Property, PropertyUpdate
 from app.schemas.property import (
     PropertyCreate, PropertyUpdate as PropertyUpdateSchema,
@@ -25,6 +29,34 @@ class CRUDProperty(CRUDBase[Property, PropertyCreate, PropertyUpdateSchema]):
     
     def get_available_properties(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Property]:
         return db.query(Property).filter(Property.is_sold == False).offset(skip).limit(limit).all()
+    
+    def get_export_statement(
+        self,
+        *,
+        company_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        type: Optional[str] = None,
+        status: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> Select:
+        """Column-only select for streaming exports, filtered on start_date."""
+        statement = select(*Property.__table__.columns)
+        if company_id is not None:
+            statement = statement.join(Project, Project.id == Property.project_id).where(
+                Project.company_id == company_id
+            )
+        if project_id is not None:
+            statement = statement.where(Property.project_id == project_id)
+        if type is not None:
+            statement = statement.where(Property.type == type)
+        if status is not None:
+            statement = statement.where(Property.status == status)
+        if date_from is not None:
+            statement = statement.where(Property.start_date >= date_from)
+        if date_to is not None:
+            statement = statement.where(Property.start_date <= date_to)
+        return statement.order_by(Property.id)
 
 
 class CRUDPropertyUpdate(CRUDBase[PropertyUpdate, PropertyUpdateCreate, PropertyUpdateUpdateSchema]):
@@ -14,7 +14,24 @@ def init_db() -> None:
     try:
         # Cria todas as tabelas
         Base.metadata.create_all(bind=engine)
+        # create_all não cria índices novos em tabelas que já existiam
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
         logger.info("Tabelas criadas com sucesso")
+
+        # Totais mensais de despesas de bancos criados antes da tabela existir
+        from app.db.session import SessionLocal
+        from app.services.reports import ensure_pnl_views
+        from app.services.rollups import ensure_rollups
+
+        db = SessionLocal()
+        try:
+            ensure_rollups(db)
+            # Resumo do relatório de resultado (view materializada no PostgreSQL)
+            ensure_pnl_views(db)
+        finally:
+            db.close()
     except Exception as e:
         logger.error(f"Erro ao criar tabelas: {e}")
         raise 
\ No newline at end of file
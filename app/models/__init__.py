@@ -30,4 +30,18 @@ from app.models.contract import (
 from app.models.expense import (
     Expense,
     ExpenseCategory
-) 
\ No newline at end of file
+) 
+from app.models.reconciliation import BankTransaction
+from app.models.rollup import ExpenseRollup
+from app.models.budget import BudgetAlert
+from app.models.anomaly import (
+    ExpenseReview,
+    ExpenseGroupStats,
+    ExpenseReviewKind,
+    ExpenseReviewStatus
+)
+from app.models.tombstone import Tombstone
+from app.models.outbox import OutboxEvent, EventType
+from app.models.job import Job, JobStatus
+from app.models.idempotency import IdempotencyKey
+from app.models.cache_version import CacheVersion
@@ -0,0 +1,172 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, Float, DateTime, Enum, UniqueConstraint, event, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import relationship
+import enum
+
+from app.core.config import settings
+from app.models.base import BaseModel
+from app.models.expense import Expense, ExpenseCategory
+
+
+class ExpenseReviewKind(str, enum.Enum):
+    OUTLIER = "outlier"  # Valor fora do padrão do grupo
+    DUPLICATE = "duplicate"  # Possível lançamento em duplicidade
+
+
+class ExpenseReviewStatus(str, enum.Enum):
+    PENDING = "pending"  # Aguardando revisão
+    CONFIRMED = "confirmed"  # Problema confirmado
+    DISMISSED = "dismissed"  # Falso alarme
+
+
+class ExpenseReview(BaseModel):
+    """Despesa sinalizada pela análise de anomalias (fila de revisão)"""
+
+    __table_args__ = (UniqueConstraint("expense_id", "kind", name="uq_expensereview_expense_kind"),)
+
+    expense_id = Column(Integer, ForeignKey("expense.id", ondelete="CASCADE"), nullable=False, index=True)
+    project_id = Column(Integer, ForeignKey("project.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(Enum(ExpenseReviewKind), nullable=False)
+    score = Column(Float)  # Z-score robusto (mediana/MAD) do valor no grupo
+    median = Column(Float)  # Mediana do grupo usada na comparação
+    duplicate_of_id = Column(Integer, ForeignKey("expense.id", ondelete="SET NULL"), nullable=True)
+    status = Column(Enum(ExpenseReviewStatus), default=ExpenseReviewStatus.PENDING, index=True)
+    notes = Column(Text)
+    reviewed_at = Column(DateTime)
+    reviewed_by_id = Column(Integer, ForeignKey("user.id"), nullable=True)
+
+    # Relacionamentos
+    expense = relationship("Expense", foreign_keys=[expense_id], back_populates="reviews")
+    duplicate_of = relationship("Expense", foreign_keys=[duplicate_of_id])
+    reviewed_by = relationship("User")
+
+
+class ExpenseGroupStats(BaseModel):
+    """Estatísticas robustas do valor das despesas por projeto, categoria e fornecedor"""
+
+    __table_args__ = (
+        UniqueConstraint("project_id", "category", "supplier_key", name="uq_expensegroupstats_key"),
+    )
+
+    project_id = Column(Integer, ForeignKey("project.id", ondelete="CASCADE"), nullable=False, index=True)
+    category = Column(Enum(ExpenseCategory), nullable=False)
+    # Fornecedor normalizado; "" = sem fornecedor, "*" = categoria inteira
+    supplier_key = Column(String, nullable=False)
+    count = Column(Integer, nullable=False)
+    median = Column(Float, nullable=False)
+    scale = Column(Float, nullable=False)  # MAD / 0.6745 (ou 1.2533 x desvio absoluto médio quando MAD = 0)
+
+
+ALL_SUPPLIERS = "*"
+
+
+def supplier_key(name: Optional[str]) -> str:
+    return " ".join((name or "").lower().split())
+
+
+def robust_z(amount: float, median: float, scale: float) -> Optional[float]:
+    if not scale:
+        return None
+    return (amount - median) / scale
+
+
+def _in_chunks(values: List[Any], size: int = 500):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _review(row: Any, kind: ExpenseReviewKind, **values: Any) -> Dict[str, Any]:
+    review = {"expense_id": row.id, "project_id": row.project_id, "kind": kind}
+    review.update(score=values.get("score"), median=values.get("median"), duplicate_of_id=values.get("duplicate_of_id"))
+    return review
+
+
+def score_new_expenses(connection: Connection, condition) -> int:
+    """
+    Avalia despesas recém-gravadas contra as estatísticas da última análise
+    completa e procura duplicidades (mesmo projeto, fornecedor e valor, com
+    datas próximas). Retorna o número de sinalizações criadas.
+    """
+    table = Expense.__table__
+    rows = connection.execute(
+        select(
+            table.c.id, table.c.project_id, table.c.category, table.c.supplier_name, table.c.amount, table.c.date
+        ).where(condition)
+    ).all()
+    if not rows:
+        return 0
+
+    project_ids = sorted({row.project_id for row in rows})
+    stats_table = ExpenseGroupStats.__table__
+    stats: Dict[Tuple[int, Any, str], Tuple[int, float, float]] = {}
+    for chunk in _in_chunks(project_ids):
+        for stat in connection.execute(select(stats_table).where(stats_table.c.project_id.in_(chunk))):
+            stats[(stat.project_id, stat.category, stat.supplier_key)] = (stat.count, stat.median, stat.scale)
+
+    # Candidatas a duplicidade: mesmos projetos e valores, dentro da janela de datas
+    window = settings.DUPLICATE_WINDOW_DAYS
+    with_supplier = [row for row in rows if supplier_key(row.supplier_name)]
+    candidates: Dict[Tuple[int, str, float], List[Any]] = defaultdict(list)
+    if with_supplier:
+        first_date = min(row.date for row in with_supplier)
+        last_date = max(row.date for row in with_supplier)
+        amounts = sorted({row.amount for row in with_supplier})
+        for chunk in _in_chunks(amounts):
+            for other in connection.execute(
+                select(table.c.id, table.c.project_id, table.c.supplier_name, table.c.amount, table.c.date).where(
+                    table.c.project_id.in_(project_ids),
+                    table.c.amount.in_(chunk),
+                    table.c.date.between(first_date - timedelta(days=window), last_date + timedelta(days=window)),
+                )
+            ):
+                key = (other.project_id, supplier_key(other.supplier_name), round(other.amount, 2))
+                candidates[key].append(other)
+
+    reviews = []
+    now = datetime.utcnow()
+    for row in rows:
+        key = supplier_key(row.supplier_name)
+        stat = stats.get((row.project_id, row.category, key))
+        if not stat or stat[0] < settings.ANOMALY_MIN_GROUP_SIZE:
+            stat = stats.get((row.project_id, row.category, ALL_SUPPLIERS))
+        if stat and stat[0] >= settings.ANOMALY_MIN_GROUP_SIZE:
+            z = robust_z(row.amount, stat[1], stat[2])
+            if z is not None and abs(z) >= settings.ANOMALY_Z_THRESHOLD:
+                reviews.append(_review(row, ExpenseReviewKind.OUTLIER, score=z, median=stat[1]))
+
+        if key:
+            earlier = [
+                other.id
+                for other in candidates[(row.project_id, key, round(row.amount, 2))]
+                if other.id < row.id and abs((other.date - row.date).days) <= window
+            ]
+            if earlier:
+                reviews.append(_review(row, ExpenseReviewKind.DUPLICATE, duplicate_of_id=min(earlier)))
+
+    if not reviews:
+        return 0
+    review_table = ExpenseReview.__table__
+    existing = set()
+    for chunk in _in_chunks([review["expense_id"] for review in reviews]):
+        existing.update(
+            connection.execute(
+                select(review_table.c.expense_id, review_table.c.kind).where(review_table.c.expense_id.in_(chunk))
+            ).all()
+        )
+    new_reviews = [
+        dict(review, status=ExpenseReviewStatus.PENDING, created_at=now, updated_at=now)
+        for review in reviews
+        if (review["expense_id"], review["kind"]) not in existing
+    ]
+    if new_reviews:
+        connection.execute(review_table.insert(), new_reviews)
+    return len(new_reviews)
+
+
+@event.listens_for(Expense, "after_insert")
+def _expense_inserted(mapper, connection: Connection, target: Expense) -> None:
+    score_new_expenses(connection, Expense.__table__.c.id == target.id)
@@ -0,0 +1,155 @@
+import logging
+from datetime import datetime
+from typing import Iterable, Optional, Set, Tuple
+
+from sqlalchemy import Column, ForeignKey, Integer, Float, DateTime, Boolean, event, func, inspect, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import relationship
+
+from app.core.config import settings
+from app.models.base import BaseModel
+from app.models.expense import Expense
+from app.models.project import Project
+from app.models.property import Property
+# Os eventos de ExpenseRollup precisam ser registrados antes dos deste módulo
+from app.models.rollup import ExpenseRollup
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetAlert(BaseModel):
+    """Alerta de consumo do orçamento de um projeto (ou do custo de construção de um imóvel)"""
+
+    project_id = Column(Integer, ForeignKey("project.id", ondelete="CASCADE"), nullable=False, index=True)
+    property_id = Column(Integer, ForeignKey("property.id", ondelete="CASCADE"), nullable=True, index=True)  # Nulo = alerta do projeto
+    threshold = Column(Float, nullable=False)  # Fração do orçamento (0.8 = 80%)
+    budget = Column(Float, nullable=False)  # Orçamento no momento do alerta
+    spent = Column(Float, nullable=False)  # Gasto acumulado no momento do alerta
+    resolved_at = Column(DateTime)  # Gasto voltou para baixo do limite (ou o orçamento aumentou)
+    acknowledged = Column(Boolean, default=False)
+    acknowledged_at = Column(DateTime)
+    acknowledged_by_id = Column(Integer, ForeignKey("user.id"), nullable=True)
+
+    # Relacionamentos
+    project = relationship("Project", back_populates="budget_alerts")
+    property = relationship("Property", back_populates="budget_alerts")
+    acknowledged_by = relationship("User")
+
+
+def _budget_and_spent(
+    connection: Connection, project_id: int, property_id: Optional[int]
+) -> Tuple[Optional[float], float]:
+    if property_id:
+        budget = connection.execute(
+            select(Property.construction_cost).where(Property.id == property_id)
+        ).scalar()
+        spent_filter = ExpenseRollup.property_id == property_id
+    else:
+        budget = connection.execute(select(Project.budget).where(Project.id == project_id)).scalar()
+        spent_filter = ExpenseRollup.project_id == project_id
+    spent = connection.execute(select(func.sum(ExpenseRollup.total)).where(spent_filter)).scalar()
+    return budget, spent or 0.0
+
+
+def evaluate_budget(connection: Connection, project_id: int, property_id: Optional[int] = None) -> None:
+    """
+    Compara o gasto acumulado com o orçamento e registra os limites cruzados.
+
+    Cada limite de ``BUDGET_ALERT_THRESHOLDS`` gera no máximo um alerta em
+    aberto; quando o gasto volta para baixo do limite o alerta é encerrado
+    e um novo cruzamento gera outro alerta.
+    """
+    budget, spent = _budget_and_spent(connection, project_id, property_id)
+    table = BudgetAlert.__table__
+    scope = (table.c.project_id == project_id) & (
+        table.c.property_id == property_id if property_id else table.c.property_id.is_(None)
+    )
+    open_alerts = {
+        round(threshold, 4): alert_id
+        for alert_id, threshold in connection.execute(
+            select(table.c.id, table.c.threshold).where(scope & table.c.resolved_at.is_(None))
+        )
+    }
+
+    now = datetime.utcnow()
+    ratio = spent / budget if budget and budget > 0 else None
+    for threshold in settings.BUDGET_ALERT_THRESHOLDS:
+        key = round(threshold, 4)
+        if ratio is not None and ratio >= threshold:
+            if key in open_alerts:
+                continue
+            connection.execute(
+                table.insert().values(
+                    project_id=project_id,
+                    property_id=property_id or None,
+                    threshold=threshold,
+                    budget=budget,
+                    spent=spent,
+                    acknowledged=False,
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+            target = f"imóvel {property_id}" if property_id else f"projeto {project_id}"
+            logger.warning(
+                f"Orçamento do {target} atingiu {threshold:.0%}: gasto {spent:.2f} de {budget:.2f}"
+            )
+        elif key in open_alerts:
+            connection.execute(
+                update(table).where(table.c.id == open_alerts[key]).values(resolved_at=now, updated_at=now)
+            )
+
+
+def evaluate_budgets(connection: Connection, keys: Iterable[Tuple[int, Optional[int]]]) -> None:
+    """Avalia os orçamentos dos projetos e imóveis afetados por uma gravação."""
+    projects: Set[int] = set()
+    properties: Set[Tuple[int, int]] = set()
+    for project_id, property_id in keys:
+        if project_id is None:
+            continue
+        projects.add(int(project_id))
+        if property_id:
+            properties.add((int(project_id), int(property_id)))
+    for project_id in projects:
+        evaluate_budget(connection, project_id)
+    for project_id, property_id in properties:
+        evaluate_budget(connection, project_id, property_id)
+
+
+def _previous(target, field: str):
+    history = inspect(target).attrs[field].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, field)
+
+
+@event.listens_for(Expense, "after_insert")
+@event.listens_for(Expense, "after_delete")
+def _expense_written(mapper, connection: Connection, target: Expense) -> None:
+    evaluate_budgets(connection, [(target.project_id, target.property_id)])
+
+
+@event.listens_for(Expense, "after_update")
+def _expense_updated(mapper, connection: Connection, target: Expense) -> None:
+    state = inspect(target)
+    if not any(state.attrs[field].history.has_changes() for field in ("project_id", "property_id", "amount")):
+        return
+    evaluate_budgets(
+        connection,
+        [
+            (_previous(target, "project_id"), _previous(target, "property_id")),
+            (target.project_id, target.property_id),
+        ],
+    )
+
+
+@event.listens_for(Project, "after_update")
+def _project_updated(mapper, connection: Connection, target: Project) -> None:
+    if inspect(target).attrs.budget.history.has_changes():
+        evaluate_budget(connection, target.id)
+
+
+@event.listens_for(Property, "after_update")
+def _property_updated(mapper, connection: Connection, target: Property) -> None:
+    if inspect(target).attrs.construction_cost.history.has_changes():
+        evaluate_budget(connection, target.project_id, target.id)
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, Integer
+
+from app.models.base import BaseModel
+
+
+class CacheVersion(BaseModel):
+    """Versão de uma etiqueta (tabela) dos caches em memória, compartilhada entre processos (app.services.invalidation)"""
+
+    tag = Column(String(64), nullable=False, unique=True)
+    version = Column(Integer, nullable=False, default=1)
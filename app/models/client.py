@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Integer, Date, Enum, Boolean, Float
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, Date, Enum, Boolean, Float, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -23,6 +23,9 @@ class LeadStatus(str, enum.Enum):
 class Client(BaseModel):
     """Modelo de cliente"""
     
+    # Feeds de alterações (updated_since)
+    __table_args__ = (Index("ix_client_company_updated", "company_id", "updated_at"),)
+    
     name = Column(String, index=True, nullable=False)
     client_type = Column(Enum(ClientType), nullable=False)
     document = Column(String, index=True, nullable=False)  # CPF ou CNPJ
@@ -44,6 +47,9 @@ class Client(BaseModel):
 class Lead(BaseModel):
     """Modelo de lead/prospecção"""
     
+    # Feeds de alterações (updated_since)
+    __table_args__ = (Index("ix_lead_client_updated", "client_id", "updated_at"),)
+    
     property_id = Column(Integer, ForeignKey("property.id"), nullable=False)
     client_id = Column(Integer, ForeignKey("client.id"), nullable=False)
     status = Column(Enum(LeadStatus), default=LeadStatus.INITIAL_CONTACT)
@@ -18,4 +18,5 @@ class Company(BaseModel):
     users = relationship("User", back_populates="company", cascade="all, delete-orphan")
     teams = relationship("Team", back_populates="company", cascade="all, delete-orphan")
     projects = relationship("Project", back_populates="company", cascade="all, delete-orphan")
-    clients = relationship("Client", back_populates="company", cascade="all, delete-orphan") 
\ No newline at end of file
+    clients = relationship("Client", back_populates="company", cascade="all, delete-orphan")
+    bank_transactions = relationship("BankTransaction", back_populates="company", cascade="all, delete-orphan") 
\ No newline at end of file
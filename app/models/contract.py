@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Integer, Float, Date, Enum, LargeBinary
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, Float, Date, Enum, LargeBinary, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -23,6 +23,9 @@ class ContractStatus(str, enum.Enum):
 class Contract(BaseModel):
     """Modelo de contrato imobiliário"""
     
+    # Feeds de alterações (updated_since)
+    __table_args__ = (Index("ix_contract_property_updated", "property_id", "updated_at"),)
+    
     contract_number = Column(String, index=True, nullable=False, unique=True)
     type = Column(Enum(ContractType), nullable=False)
     description = Column(Text)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Integer, Float, Date, Enum
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, Float, Date, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -21,6 +21,9 @@ class ExpenseCategory(str, enum.Enum):
 class Expense(BaseModel):
     """Modelo de despesa de obra/projeto"""
     
+    # Feeds de alterações (updated_since)
+    __table_args__ = (Index("ix_expense_project_updated", "project_id", "updated_at"),)
+    
     description = Column(String, nullable=False)
     category = Column(Enum(ExpenseCategory), nullable=False)
     amount = Column(Float, nullable=False)
@@ -46,4 +49,12 @@ class Expense(BaseModel):
     # Relacionamentos
     project = relationship("Project", back_populates="expenses")
     property = relationship("Property", back_populates="expenses")
-    created_by = relationship("User") 
\ No newline at end of file
+    created_by = relationship("User")
+    bank_transactions = relationship("BankTransaction", back_populates="expense")
+    reviews = relationship(
+        "ExpenseReview",
+        foreign_keys="ExpenseReview.expense_id",
+        back_populates="expense",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    ) 
\ No newline at end of file
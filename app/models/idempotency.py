@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, LargeBinary, UniqueConstraint
+
+from app.models.base import BaseModel
+
+
+class IdempotencyKey(BaseModel):
+    """Resposta guardada de uma requisição com ``Idempotency-Key`` (app.services.idempotency)"""
+
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotencykey_user_key"),)
+
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)  # Valor do cabeçalho, único por usuário
+    fingerprint = Column(String, nullable=False)  # sha256 do método, caminho, query e corpo
+    status_code = Column(Integer)  # Vazio enquanto a requisição original está em andamento
+    content_type = Column(String)
+    body = Column(LargeBinary)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, Float, DateTime, Enum, Boolean, JSON, Index
+import enum
+
+from app.models.base import BaseModel
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"  # Aguardando um worker (ou o fim do intervalo entre tentativas)
+    RUNNING = "running"  # Em execução
+    SUCCEEDED = "succeeded"  # Concluído
+    FAILED = "failed"  # Falhou em todas as tentativas
+    CANCELLED = "cancelled"  # Cancelado
+
+
+class Job(BaseModel):
+    """Tarefa pesada executada pelos workers da fila (app.services.jobs)"""
+
+    # Próximo da fila: status, prioridade e horário liberado
+    __table_args__ = (Index("ix_job_queue", "status", "priority", "run_at"),)
+
+    kind = Column(String, nullable=False, index=True)  # Nome da tarefa registrada (imports.run, ...)
+    params = Column(JSON)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    priority = Column(Integer, default=100, nullable=False)  # Menor = executa antes
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_at = Column(DateTime, nullable=False)  # Não executa antes disso (intervalo entre tentativas)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)  # Atualizado pelo worker; parado há muito tempo = worker morto
+    worker = Column(String)  # Identificação do worker (host:pid)
+    progress = Column(Float)  # 0 a 1, quando a tarefa sabe o total
+    message = Column(String)  # Situação atual informada pela tarefa
+    result = Column(JSON)
+    error = Column(Text)
+    cancel_requested = Column(Boolean, default=False, nullable=False)
+    company_id = Column(Integer, ForeignKey("company.id", ondelete="CASCADE"), nullable=True, index=True)
+    created_by_id = Column(Integer, ForeignKey("user.id", ondelete="SET NULL"), nullable=True)
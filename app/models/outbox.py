@@ -0,0 +1,188 @@
+import enum
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, event, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import object_session
+
+from app.models.base import BaseModel
+from app.models.client import Lead
+from app.models.contract import Contract, ContractStatus
+from app.models.expense import Expense
+from app.models.project import Project
+from app.models.property import Property
+from app.models.tombstone import company_of
+
+# Marca na sessão: há eventos gravados (acorda o dispatcher após o commit)
+OUTBOX_FLAG = "outbox_written"
+
+
+class EventType(str, enum.Enum):
+    PROPERTY_STATUS_CHANGED = "property.status_changed"  # Mudança de fase do imóvel
+    PROPERTY_SOLD = "property.sold"  # Imóvel vendido
+    CONTRACT_SIGNED = "contract.signed"  # Contrato ativo (criado ativo ou ativado)
+    CONTRACT_STATUS_CHANGED = "contract.status_changed"
+    EXPENSE_CREATED = "expense.created"
+    EXPENSE_UPDATED = "expense.updated"
+    EXPENSE_DELETED = "expense.deleted"
+    LEAD_STAGE_CHANGED = "lead.stage_changed"  # Mudança de etapa do lead no funil
+
+
+class OutboxEvent(BaseModel):
+    """Evento de domínio gravado na mesma transação da alteração (entregue por app.services.events)"""
+
+    __table_args__ = (Index("ix_outboxevent_pending", "dispatched_at", "id"),)
+
+    type = Column(String, nullable=False, index=True)  # Valor de EventType
+    entity = Column(String, nullable=False)  # Nome da tabela (property, contract, ...)
+    entity_id = Column(Integer, nullable=False)
+    company_id = Column(Integer, nullable=True)
+    payload = Column(JSON)
+    attempts = Column(Integer, default=0)  # Entregas que falharam
+    dispatched_at = Column(DateTime, nullable=True)  # Vazio = pendente
+
+
+# Campos do registro copiados para o payload dos eventos
+PAYLOAD_FIELDS = {
+    Property: ("project_id", "status", "is_sold", "sale_price", "sale_date"),
+    Contract: ("property_id", "client_id", "type", "status", "contract_value", "signing_date"),
+    Expense: ("project_id", "property_id", "category", "amount", "date"),
+    Lead: ("property_id", "client_id", "status"),
+}
+
+
+def _json(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _snapshot(target) -> Dict[str, Any]:
+    return {field: _json(getattr(target, field)) for field in PAYLOAD_FIELDS[type(target)]}
+
+
+def _change(target, field: str) -> Tuple[Any, Any, bool]:
+    """Valor anterior, valor atual e se o campo mudou nesta gravação."""
+    history = inspect(target).attrs[field].history
+    if not history.has_changes():
+        return getattr(target, field), getattr(target, field), False
+    previous = history.deleted[0] if history.deleted else None
+    return previous, getattr(target, field), previous != getattr(target, field)
+
+
+def _events(target, action: str) -> List[Tuple[EventType, Dict[str, Any]]]:
+    payload = _snapshot(target)
+    events: List[Tuple[EventType, Dict[str, Any]]] = []
+    if isinstance(target, Expense):
+        if action == "insert":
+            events.append((EventType.EXPENSE_CREATED, payload))
+        elif action == "delete":
+            events.append((EventType.EXPENSE_DELETED, payload))
+        else:
+            fields = [field for field in PAYLOAD_FIELDS[Expense] if _change(target, field)[2]]
+            if fields:
+                events.append((EventType.EXPENSE_UPDATED, dict(payload, changed=fields)))
+        return events
+    if action == "delete":
+        return events
+
+    previous, current, changed = _change(target, "status")
+    if action == "insert":
+        previous, changed = None, False
+    if isinstance(target, Property):
+        if changed:
+            events.append((EventType.PROPERTY_STATUS_CHANGED, dict(payload, previous=_json(previous))))
+        if target.is_sold and (action == "insert" or _change(target, "is_sold")[2]):
+            events.append((EventType.PROPERTY_SOLD, payload))
+    elif isinstance(target, Contract):
+        if changed:
+            events.append((EventType.CONTRACT_STATUS_CHANGED, dict(payload, previous=_json(previous))))
+        if current == ContractStatus.ACTIVE and (action == "insert" or changed):
+            events.append((EventType.CONTRACT_SIGNED, payload))
+    elif isinstance(target, Lead) and changed:
+        events.append((EventType.LEAD_STAGE_CHANGED, dict(payload, previous=_json(previous))))
+    return events
+
+
+def _event_row(
+    event_type: EventType, entity: str, entity_id: int, company_id: Optional[int], payload: Dict[str, Any], now: datetime
+) -> Dict[str, Any]:
+    return {
+        "type": event_type.value,
+        "entity": entity,
+        "entity_id": entity_id,
+        "company_id": company_id,
+        "payload": payload,
+        "attempts": 0,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _record_events(action: str):
+    def listener(mapper, connection: Connection, target) -> None:
+        events = _events(target, action)
+        if not events:
+            return
+        now = datetime.utcnow()
+        company_id = company_of(connection, target)
+        connection.execute(
+            OutboxEvent.__table__.insert(),
+            [
+                _event_row(event_type, mapper.local_table.name, target.id, company_id, payload, now)
+                for event_type, payload in events
+            ],
+        )
+        session = object_session(target)
+        if session is not None:
+            session.info[OUTBOX_FLAG] = True
+
+    return listener
+
+
+def add_expense_events(connection: Connection, where, event_type: EventType = EventType.EXPENSE_CREATED) -> None:
+    """
+    Grava ``event_type`` para as despesas que atendem ``where``, em gravações
+    em lote fora do ORM: ``expense.created`` depois da importação,
+    ``expense.deleted`` antes da exclusão em massa.
+    """
+    fields = PAYLOAD_FIELDS[Expense]
+    rows = connection.execute(
+        select(Expense.id, Project.company_id, *[getattr(Expense, field) for field in fields])
+        .join(Project, Project.id == Expense.project_id)
+        .where(where)
+        .order_by(Expense.id)
+    ).all()
+    if not rows:
+        return
+    now = datetime.utcnow()
+    connection.execute(
+        OutboxEvent.__table__.insert(),
+        [
+            _event_row(
+                event_type,
+                Expense.__tablename__,
+                row[0],
+                row[1],
+                {field: _json(value) for field, value in zip(fields, row[2:])},
+                now,
+            )
+            for row in rows
+        ],
+    )
+
+
+def _keep_previous(target, value, oldvalue, initiator):
+    return value
+
+
+for _model in PAYLOAD_FIELDS:
+    for _action in ("insert", "update", "delete"):
+        event.listen(_model, f"after_{_action}", _record_events(_action))
+    # Carrega o valor anterior ao alterar campos expirados (ex.: depois de um commit), para o "previous" dos eventos
+    for _field in ("status", "is_sold"):
+        if hasattr(_model, _field):
+            event.listen(getattr(_model, _field), "set", _keep_previous, active_history=True, retval=True)
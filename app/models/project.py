@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Integer, Float, Date, Enum
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, Float, Date, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -16,6 +16,9 @@ class ProjectStatus(str, enum.Enum):
 class Project(BaseModel):
     """Modelo de projeto imobiliário"""
     
+    # Feeds de alterações (updated_since)
+    __table_args__ = (Index("ix_project_company_updated", "company_id", "updated_at"),)
+    
     name = Column(String, index=True, nullable=False)
     description = Column(Text)
     address = Column(String)
@@ -39,6 +42,7 @@ class Project(BaseModel):
     tasks = relationship("ProjectTask", back_populates="project", cascade="all, delete-orphan")
     updates = relationship("ProjectUpdate", back_populates="project", cascade="all, delete-orphan")
     expenses = relationship("Expense", back_populates="project", cascade="all, delete-orphan")
+    budget_alerts = relationship("BudgetAlert", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class TeamProject(BaseModel):
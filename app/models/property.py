@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Integer, Float, Date, Enum, Boolean
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, Float, Date, Enum, Boolean, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -25,6 +25,9 @@ class PropertyStatus(str, enum.Enum):
 class Property(BaseModel):
     """Modelo de imóvel/propriedade"""
     
+    # Feeds de alterações (updated_since)
+    __table_args__ = (Index("ix_property_project_updated", "project_id", "updated_at"),)
+    
     name = Column(String, index=True, nullable=False)
     description = Column(Text)
     type = Column(Enum(PropertyType), nullable=False)
@@ -52,6 +55,7 @@ class Property(BaseModel):
     contracts = relationship("Contract", back_populates="property", cascade="all, delete-orphan")
     leads = relationship("Lead", back_populates="property", cascade="all, delete-orphan")
     expenses = relationship("Expense", back_populates="property", cascade="all, delete-orphan")
+    budget_alerts = relationship("BudgetAlert", back_populates="property", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class PropertyUpdate(BaseModel):
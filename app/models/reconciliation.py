@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, ForeignKey, Integer, Float, Date, DateTime, Boolean, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.models.base import BaseModel
+
+
+class BankTransaction(BaseModel):
+    """Lançamento de extrato bancário importado para conciliação"""
+    
+    __table_args__ = (UniqueConstraint("company_id", "fitid", name="uq_banktransaction_company_fitid"),)
+    
+    company_id = Column(Integer, ForeignKey("company.id"), nullable=False, index=True)
+    fitid = Column(String, nullable=False)  # Identificador do lançamento no banco (OFX FITID)
+    posted_date = Column(Date, nullable=False, index=True)
+    amount = Column(Float, nullable=False)  # Negativo para débitos
+    description = Column(String)
+    document = Column(String)  # CNPJ/CPF extraído do histórico, se houver
+    ignored = Column(Boolean, default=False)  # Lançamento sem despesa correspondente (tarifas, transferências)
+    
+    # Conciliação confirmada
+    expense_id = Column(Integer, ForeignKey("expense.id", ondelete="SET NULL"), nullable=True, index=True)
+    match_score = Column(Float)
+    matched_at = Column(DateTime)
+    matched_by_id = Column(Integer, ForeignKey("user.id"), nullable=True)
+    
+    # Relacionamentos
+    company = relationship("Company", back_populates="bank_transactions")
+    expense = relationship("Expense", back_populates="bank_transactions")
+    matched_by = relationship("User")
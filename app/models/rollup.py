@@ -0,0 +1,134 @@
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, Iterable, Tuple
+
+from sqlalchemy import Column, ForeignKey, Integer, Float, Date, Enum, UniqueConstraint, event, inspect, update, delete
+from sqlalchemy.engine import Connection
+
+from app.models.base import BaseModel
+from app.models.expense import Expense, ExpenseCategory
+
+
+class ExpenseRollup(BaseModel):
+    """Totais mensais de despesas por projeto, imóvel e categoria (mantidos incrementalmente)"""
+
+    __table_args__ = (
+        UniqueConstraint("project_id", "property_id", "category", "month", name="uq_expenserollup_key"),
+    )
+
+    project_id = Column(Integer, ForeignKey("project.id", ondelete="CASCADE"), nullable=False, index=True)
+    property_id = Column(Integer, nullable=False, default=0)  # 0 = despesa sem imóvel
+    category = Column(Enum(ExpenseCategory), nullable=False)
+    month = Column(Date, nullable=False, index=True)  # Primeiro dia do mês
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+RollupKey = Tuple[int, int, Any, date]
+
+
+def month_start(value: Any) -> date:
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.replace(day=1)
+
+
+def rollup_key(project_id: int, property_id: Any, category: Any, expense_date: Any) -> RollupKey:
+    return (int(project_id), int(property_id or 0), ExpenseCategory(category), month_start(expense_date))
+
+
+def _upsert(connection: Connection, key: RollupKey, total: float, count: int) -> None:
+    table = ExpenseRollup.__table__
+    project_id, property_id, category, month = key
+    values = {
+        "project_id": project_id,
+        "property_id": property_id,
+        "category": category,
+        "month": month,
+        "total": total,
+        "count": count,
+    }
+    where = (
+        (table.c.project_id == project_id)
+        & (table.c.property_id == property_id)
+        & (table.c.category == category)
+        & (table.c.month == month)
+    )
+
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=["project_id", "property_id", "category", "month"],
+            set_={"total": table.c.total + statement.excluded.total, "count": table.c.count + statement.excluded.count},
+        )
+        connection.execute(statement)
+    else:
+        result = connection.execute(
+            update(table).where(where).values(total=table.c.total + total, count=table.c.count + count)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**values))
+
+    if count < 0:
+        # Remove os meses que ficaram vazios
+        connection.execute(delete(table).where(where & (table.c.count <= 0)))
+
+
+def apply_expense_deltas(connection: Connection, deltas: Dict[RollupKey, Tuple[float, int]]) -> None:
+    """Aplica variações (total, quantidade) já agregadas por chave."""
+    for key, (total, count) in deltas.items():
+        if count or total:
+            _upsert(connection, key, total, count)
+
+
+def add_expense_rows(connection: Connection, rows: Iterable[Dict[str, Any]], sign: int = 1) -> None:
+    """Atualiza os totais a partir de linhas de despesa gravadas em lote (fora do ORM)."""
+    deltas: Dict[RollupKey, list] = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        key = rollup_key(row["project_id"], row.get("property_id"), row["category"], row["date"])
+        deltas[key][0] += sign * (row["amount"] or 0.0)
+        deltas[key][1] += sign
+    apply_expense_deltas(connection, {key: tuple(value) for key, value in deltas.items()})
+
+
+def _key_of(target: Expense) -> RollupKey:
+    return rollup_key(target.project_id, target.property_id, target.category, target.date)
+
+
+@event.listens_for(Expense, "after_insert")
+def _expense_inserted(mapper, connection: Connection, target: Expense) -> None:
+    _upsert(connection, _key_of(target), target.amount or 0.0, 1)
+
+
+@event.listens_for(Expense, "after_delete")
+def _expense_deleted(mapper, connection: Connection, target: Expense) -> None:
+    _upsert(connection, _key_of(target), -(target.amount or 0.0), -1)
+
+
+@event.listens_for(Expense, "after_update")
+def _expense_updated(mapper, connection: Connection, target: Expense) -> None:
+    state = inspect(target)
+    fields = ("project_id", "property_id", "category", "date", "amount")
+    if not any(state.attrs[field].history.has_changes() for field in fields):
+        return
+
+    def previous(field: str) -> Any:
+        history = state.attrs[field].history
+        if history.deleted:
+            return history.deleted[0]
+        return getattr(target, field)
+
+    old_key = rollup_key(previous("project_id"), previous("property_id"), previous("category"), previous("date"))
+    new_key = _key_of(target)
+    old_amount = previous("amount") or 0.0
+    new_amount = target.amount or 0.0
+    if old_key == new_key:
+        _upsert(connection, new_key, new_amount - old_amount, 0)
+    else:
+        _upsert(connection, old_key, -old_amount, -1)
+        _upsert(connection, new_key, new_amount, 1)
@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, String, Integer, Index, event, select
+from sqlalchemy.engine import Connection
+
+from app.models.base import BaseModel
+from app.models.client import Client, Lead
+from app.models.contract import Contract
+from app.models.expense import Expense
+from app.models.project import Project
+from app.models.property import Property
+
+
+class Tombstone(BaseModel):
+    """Registro de exclusão, consumido pelos feeds de alterações (updated_at = momento da exclusão)"""
+
+    __table_args__ = (
+        Index("ix_tombstone_company_updated", "company_id", "updated_at"),
+        Index("ix_tombstone_entity_updated", "entity", "updated_at"),
+    )
+
+    entity = Column(String, nullable=False)  # Nome da tabela (project, expense, ...)
+    entity_id = Column(Integer, nullable=False)
+    company_id = Column(Integer, nullable=True)  # Empresa dona do registro excluído
+
+
+def company_of(connection: Connection, target) -> Optional[int]:
+    """Empresa do registro excluído (os pais ainda existem: a cascata do ORM exclui os filhos antes)."""
+    if isinstance(target, (Project, Client)):
+        return target.company_id
+    if isinstance(target, (Property, Expense)):
+        return connection.execute(
+            select(Project.company_id).where(Project.id == target.project_id)
+        ).scalar()
+    if isinstance(target, Contract):
+        return connection.execute(
+            select(Project.company_id)
+            .join(Property, Property.project_id == Project.id)
+            .where(Property.id == target.property_id)
+        ).scalar()
+    if isinstance(target, Lead):
+        return connection.execute(select(Client.company_id).where(Client.id == target.client_id)).scalar()
+    return None
+
+
+def _record_deletion(mapper, connection: Connection, target) -> None:
+    now = datetime.utcnow()
+    connection.execute(
+        Tombstone.__table__.insert().values(
+            entity=mapper.local_table.name,
+            entity_id=target.id,
+            company_id=company_of(connection, target),
+            created_at=now,
+            updated_at=now,
+        )
+    )
+
+
+for _model in (Project, Property, Contract, Expense, Client, Lead):
+    event.listen(_model, "after_delete", _record_deletion)
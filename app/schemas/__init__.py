@@ -1,10 +1,10 @@
 # Schema package 
 from app.schemas.token import Token, TokenPayload
-from app.schemas.user import User, UserCreate, UserUpdate, UserInDB
-from app.schemas.company import Company, CompanyCreate, CompanyUpdate
+from app.schemas.user import User, UserCreate, UserUpdate, UserInDB, UserSummary
+from app.schemas.company import Company, CompanyCreate, CompanyUpdate, CompanySummary
 from app.schemas.team import Team, TeamCreate, TeamUpdate, UserTeam, UserTeamCreate, UserTeamUpdate
 from app.schemas.project import (
-    Project, ProjectCreate, ProjectUpdate,
+    Project, ProjectCreate, ProjectUpdate, ProjectSummary,
     TeamProject, TeamProjectCreate,
     ProjectTask, ProjectTaskCreate, ProjectTaskUpdate,
     ProjectUpdateNotification, ProjectUpdateCreate, ProjectUpdateUpdate,
@@ -22,10 +22,32 @@ from app.schemas.contract import (
 )
 from app.schemas.expense import (
     Expense, ExpenseCreate, ExpenseUpdate,
-    ExpenseCategoryEnum
+    ExpenseCategoryEnum, ExpenseRollupGroupEnum, ExpenseRollupRow
 )
 from app.schemas.client import (
     Client, ClientCreate, ClientUpdate,
     Lead, LeadCreate, LeadUpdate,
     ClientTypeEnum, LeadStatusEnum
-) 
\ No newline at end of file
+)
+from app.schemas.imports import ImportEntityEnum, ImportRowError, ImportReport
+from app.schemas.reconciliation import (
+    BankTransaction, BankTransactionCreate, BankTransactionUpdate,
+    MatchSuggestion, TransactionSuggestions, ReconciliationReport
+)
+from app.schemas.budget import (
+    BudgetAlert, BudgetAlertCreate, BudgetAlertUpdate,
+    BudgetHealth, ProjectBudget, BudgetStatusEnum
+)
+from app.schemas.anomaly import (
+    ExpenseReview, ExpenseReviewCreate, ExpenseReviewUpdate,
+    ExpenseReviewKindEnum, ExpenseReviewStatusEnum, AnomalyReport
+)
+from app.schemas.cashflow import CashFlowMonth, CashFlowProjection, PortfolioCashFlow
+from app.schemas.report import ProjectPnl, ProjectPnlReport
+from app.schemas.analytics import AnalyticsStatus, AnalyticsTableStatus
+from app.schemas.parquet_export import ParquetExportEntityEnum, ParquetExportEntity, ParquetExportStatus
+from app.schemas.changes import ChangeFeedEntityEnum, ChangeFeed, DeletedRecord
+from app.schemas.events import EventBusStatus
+from app.schemas.job import Job, JobStatusEnum
+from app.schemas.response_cache import ResponseCacheStatus, RouteCacheStats
+from app.schemas.batch import BatchRequest, BatchRequestItem, BatchResponse, BatchResponseItem
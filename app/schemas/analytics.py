@@ -0,0 +1,19 @@
+from typing import Optional, List
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class AnalyticsTableStatus(BaseModel):
+    table: str
+    watermark: Optional[datetime] = None  # Maior updated_at copiado
+    synced_at: Optional[datetime] = None  # Início da última sincronização
+    rows: int
+
+
+class AnalyticsStatus(BaseModel):
+    enabled: bool
+    available: bool
+    lag_seconds: Optional[float] = None  # Segundos desde o início da sincronização mais antiga
+    synced_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    tables: List[AnalyticsTableStatus] = []
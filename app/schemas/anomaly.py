@@ -0,0 +1,57 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+from enum import Enum
+
+
+class ExpenseReviewKindEnum(str, Enum):
+    OUTLIER = "outlier"
+    DUPLICATE = "duplicate"
+
+
+class ExpenseReviewStatusEnum(str, Enum):
+    PENDING = "pending"
+    CONFIRMED = "confirmed"
+    DISMISSED = "dismissed"
+
+
+# Shared properties
+class ExpenseReviewBase(BaseModel):
+    expense_id: int
+    project_id: int
+    kind: ExpenseReviewKindEnum
+    score: Optional[float] = None
+    median: Optional[float] = None
+    duplicate_of_id: Optional[int] = None
+
+
+# Properties to receive on review creation
+class ExpenseReviewCreate(ExpenseReviewBase):
+    pass
+
+
+# Properties to receive on review update
+class ExpenseReviewUpdate(BaseModel):
+    status: ExpenseReviewStatusEnum
+    notes: Optional[str] = None
+
+
+# Properties to return to client
+class ExpenseReview(ExpenseReviewBase):
+    id: int
+    status: ExpenseReviewStatusEnum
+    notes: Optional[str] = None
+    created_at: datetime
+    reviewed_at: Optional[datetime] = None
+    reviewed_by_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AnomalyReport(BaseModel):
+    expenses: int = 0  # Despesas analisadas
+    groups: int = 0  # Grupos (projeto, categoria, fornecedor)
+    outliers: int = 0
+    duplicates: int = 0
+    flagged: int = 0  # Novas entradas na fila de revisão
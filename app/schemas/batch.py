@@ -0,0 +1,24 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class BatchRequestItem(BaseModel):
+    id: str  # Identifica a resposta correspondente
+    path: str  # Caminho sob /api/v1, ex.: /companies/summary
+    params: Dict[str, Any] = {}  # Parâmetros da query string (listas repetem o parâmetro)
+    etag: Optional[str] = None  # Enviado como If-None-Match; 304 volta sem corpo
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(..., min_length=1)
+
+
+class BatchResponseItem(BaseModel):
+    id: str
+    status: int
+    headers: Dict[str, str] = {}
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResponseItem]
@@ -0,0 +1,68 @@
+from typing import Optional, List
+from datetime import date, datetime
+from pydantic import BaseModel
+from enum import Enum
+
+
+class BudgetStatusEnum(str, Enum):
+    NO_BUDGET = "no_budget"  # Sem orçamento definido
+    OK = "ok"
+    WARNING = "warning"  # Primeiro limite de alerta atingido
+    AT_RISK = "at_risk"  # No ritmo atual o orçamento estoura antes do fim previsto
+    OVER_BUDGET = "over_budget"  # Orçamento estourado
+
+
+# Shared properties
+class BudgetAlertBase(BaseModel):
+    project_id: int
+    property_id: Optional[int] = None
+    threshold: float
+    budget: float
+    spent: float
+
+
+# Properties to receive on alert creation
+class BudgetAlertCreate(BudgetAlertBase):
+    pass
+
+
+# Properties to receive on alert update
+class BudgetAlertUpdate(BaseModel):
+    acknowledged: Optional[bool] = None
+    acknowledged_at: Optional[datetime] = None
+    acknowledged_by_id: Optional[int] = None
+    resolved_at: Optional[datetime] = None
+
+
+# Properties to return to client
+class BudgetAlert(BudgetAlertBase):
+    id: int
+    created_at: datetime
+    resolved_at: Optional[datetime] = None
+    acknowledged: bool = False
+    acknowledged_at: Optional[datetime] = None
+    acknowledged_by_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class BudgetHealth(BaseModel):
+    project_id: int
+    property_id: Optional[int] = None
+    name: str
+    budget: Optional[float] = None
+    spent: float
+    remaining: Optional[float] = None
+    percent_used: Optional[float] = None
+    burn_rate: float  # Gasto médio mensal na janela recente
+    projected_overrun_date: Optional[date] = None  # Data (passada ou projetada) em que o gasto alcança o orçamento
+    projected_total: Optional[float] = None  # Gasto projetado até o fim previsto
+    status: BudgetStatusEnum
+    open_alerts: int = 0
+
+
+class ProjectBudget(BaseModel):
+    project: BudgetHealth
+    properties: List[BudgetHealth]
+    alerts: List[BudgetAlert]
@@ -0,0 +1,27 @@
+from typing import Optional, List
+from datetime import date
+from pydantic import BaseModel
+
+
+class CashFlowMonth(BaseModel):
+    month: date  # Primeiro dia do mês
+    inflow: float  # Entradas de contratos
+    outflow: float  # Despesas (realizadas ou projetadas)
+    net: float
+    balance: float  # Saldo acumulado, a partir do saldo de abertura
+    projected: bool  # Mês posterior ao corrente
+
+
+class CashFlowProjection(BaseModel):
+    project_id: Optional[int] = None  # None = consolidado
+    name: str
+    opening_balance: float  # Entradas menos saídas anteriores ao primeiro mês
+    total_inflow: float
+    total_outflow: float
+    months: List[CashFlowMonth]
+
+
+class PortfolioCashFlow(BaseModel):
+    company_id: Optional[int] = None
+    total: CashFlowProjection
+    projects: List[CashFlowProjection]
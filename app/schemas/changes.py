@@ -0,0 +1,26 @@
+from typing import Any, Dict, List
+from datetime import datetime
+from pydantic import BaseModel
+from enum import Enum
+
+
+class ChangeFeedEntityEnum(str, Enum):
+    PROJECTS = "projects"
+    PROPERTIES = "properties"
+    CONTRACTS = "contracts"
+    EXPENSES = "expenses"
+    CLIENTS = "clients"
+    LEADS = "leads"
+
+
+class DeletedRecord(BaseModel):
+    id: int
+    deleted_at: datetime
+
+
+class ChangeFeed(BaseModel):
+    entity: ChangeFeedEntityEnum
+    items: List[Dict[str, Any]]  # Linhas alteradas (todas as colunas), em ordem de updated_at
+    deleted: List[DeletedRecord]
+    next_cursor: str  # Posição para a próxima página / sincronização
+    has_more: bool
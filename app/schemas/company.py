@@ -32,4 +32,10 @@ class CompanyInDBBase(CompanyBase):
 
 
 class Company(CompanyInDBBase):
-    pass 
\ No newline at end of file
+    pass
+
+
+# Listas enxutas (seletores)
+class CompanySummary(BaseModel):
+    id: int
+    name: str
@@ -0,0 +1,9 @@
+from typing import Optional, Dict
+from pydantic import BaseModel
+
+
+class EventBusStatus(BaseModel):
+    pending: int  # Eventos ainda não entregues
+    oldest_pending_seconds: Optional[float] = None  # Idade do evento pendente mais antigo
+    dispatched: Dict[str, int] = {}  # Entregues neste processo, por tipo
+    dispatcher_running: bool
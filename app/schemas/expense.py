@@ -60,4 +60,23 @@ class Expense(ExpenseBase):
     created_by_id: int
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+
+class ExpenseRollupGroupEnum(str, Enum):
+    PROJECT = "project"
+    PROPERTY = "property"
+    CATEGORY = "category"
+    SUPPLIER = "supplier"
+    MONTH = "month"
+
+
+# Linha do resumo de despesas (apenas os campos agrupados vêm preenchidos)
+class ExpenseRollupRow(BaseModel):
+    project_id: Optional[int] = None
+    property_id: Optional[int] = None
+    category: Optional[ExpenseCategoryEnum] = None
+    supplier_name: Optional[str] = None
+    month: Optional[date] = None
+    total: float
+    count: int
@@ -0,0 +1,26 @@
+from typing import List
+from enum import Enum
+from pydantic import BaseModel
+
+
+class ImportEntityEnum(str, Enum):
+    EXPENSES = "expenses"  # Despesas
+    CLIENTS = "clients"  # Clientes
+    PROPERTIES = "properties"  # Unidades/imóveis
+    LEADS = "leads"  # Leads
+
+
+class ImportRowError(BaseModel):
+    row: int  # Linha da planilha (o cabeçalho é a linha 1)
+    errors: List[str]
+
+
+class ImportReport(BaseModel):
+    entity: ImportEntityEnum
+    total_rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    dry_run: bool = False
+    committed: bool = False
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
@@ -0,0 +1,36 @@
+from typing import Optional, Any
+from datetime import datetime
+from pydantic import BaseModel
+from enum import Enum
+
+
+class JobStatusEnum(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+# Properties to return to client
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: JobStatusEnum
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    progress: Optional[float] = None  # 0 a 1
+    message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    company_id: Optional[int] = None
+    created_by_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
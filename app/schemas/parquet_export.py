@@ -0,0 +1,27 @@
+from typing import Optional, List
+from datetime import datetime
+from pydantic import BaseModel
+from enum import Enum
+
+
+class ParquetExportEntityEnum(str, Enum):
+    PROJECTS = "projects"
+    PROPERTIES = "properties"
+    LEADS = "leads"
+    CONTRACTS = "contracts"
+    EXPENSES = "expenses"
+    CLIENTS = "clients"
+
+
+class ParquetExportEntity(BaseModel):
+    entity: ParquetExportEntityEnum
+    watermark: Optional[datetime] = None  # Maior updated_at exportado
+    exported_at: Optional[datetime] = None
+    mode: str  # full / incremental
+    rows: int  # Linhas gravadas na última exportação
+    files: int
+
+
+class ParquetExportStatus(BaseModel):
+    running: bool
+    entities: List[ParquetExportEntity]
@@ -68,6 +68,15 @@ class Project(ProjectInDBBase):
     pass
 
 
+# Listas enxutas (seletores)
+class ProjectSummary(BaseModel):
+    id: int
+    name: str
+    city: Optional[str] = None
+    status: Optional[ProjectStatusEnum] = None
+    company_id: int
+
+
 class TeamProjectBase(BaseModel):
     team_id: int
     project_id: int
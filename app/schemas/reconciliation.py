@@ -0,0 +1,62 @@
+from typing import Optional, List
+from datetime import date, datetime
+from pydantic import BaseModel
+
+
+# Shared properties
+class BankTransactionBase(BaseModel):
+    fitid: str
+    posted_date: date
+    amount: float
+    description: Optional[str] = None
+    document: Optional[str] = None
+
+
+# Properties to receive on transaction import
+class BankTransactionCreate(BankTransactionBase):
+    company_id: int
+
+
+# Properties to receive on transaction update
+class BankTransactionUpdate(BaseModel):
+    ignored: Optional[bool] = None
+    expense_id: Optional[int] = None
+    match_score: Optional[float] = None
+    matched_at: Optional[datetime] = None
+    matched_by_id: Optional[int] = None
+
+
+# Properties to return to client
+class BankTransaction(BankTransactionBase):
+    id: int
+    company_id: int
+    ignored: bool = False
+    expense_id: Optional[int] = None
+    match_score: Optional[float] = None
+    matched_at: Optional[datetime] = None
+    matched_by_id: Optional[int] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class MatchSuggestion(BaseModel):
+    expense_id: int
+    score: float
+    amount: float
+    date: date
+    description: str
+    supplier_name: Optional[str] = None
+    supplier_document: Optional[str] = None
+
+
+class TransactionSuggestions(BaseModel):
+    transaction: BankTransaction
+    suggestions: List[MatchSuggestion] = []
+
+
+class ReconciliationReport(BaseModel):
+    imported: int = 0
+    duplicates: int = 0
+    auto_matched: int = 0
+    unmatched: List[TransactionSuggestions] = []
@@ -0,0 +1,29 @@
+from typing import Dict, Optional, List
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class ProjectPnl(BaseModel):
+    project_id: int
+    company_id: int
+    name: str
+    properties: int
+    properties_sold: int
+    sales_revenue: float  # Preço de venda dos imóveis vendidos
+    contract_revenue: float  # Contratos assinados, locações pelas parcelas até hoje (exceto vendas já contadas)
+    revenue: float
+    expenses: float
+    expenses_by_category: Dict[str, float]
+    construction_cost: float  # Custo de construção previsto dos imóveis
+    budget: Optional[float] = None
+    margin: float  # Receita - despesas
+    margin_percent: Optional[float] = None
+    sold_price_per_m2: Optional[float] = None
+    list_price_per_m2: Optional[float] = None
+    cost_per_m2: Optional[float] = None
+    refreshed_at: Optional[datetime] = None
+
+
+class ProjectPnlReport(BaseModel):
+    refreshed_at: Optional[datetime] = None  # Última atualização do resumo
+    projects: List[ProjectPnl]
@@ -0,0 +1,21 @@
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+
+class RouteCacheStats(BaseModel):
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class ResponseCacheStatus(BaseModel):
+    entries: int
+    size_bytes: int  # Corpos e variantes gzip guardados
+    max_bytes: int
+    hits: int
+    misses: int
+    hit_ratio: Optional[float] = None  # Nenhuma consulta ainda: None
+    stores: int
+    evictions: int  # Descartes por falta de espaço (LRU)
+    invalidations: int
+    routes: Dict[str, RouteCacheStats] = {}
@@ -37,4 +37,12 @@ class User(UserInDBBase):
 
 
 class UserInDB(UserInDBBase):
-    hashed_password: str 
\ No newline at end of file
+    hashed_password: str
+
+
+# Listas enxutas (seletores)
+class UserSummary(BaseModel):
+    id: int
+    email: str
+    full_name: Optional[str] = None
+    company_id: Optional[int] = None
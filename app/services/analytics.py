@@ -0,0 +1,404 @@
+"""
+Base analítica colunar embutida (DuckDB), opcional.
+
+Com ``ANALYTICS_STORE_PATH`` definido, as tabelas usadas pelos relatórios são
+copiadas para um arquivo DuckDB e mantidas em dia de forma incremental pela
+coluna ``updated_at`` (``BaseModel``): a cada ciclo são lidas as linhas
+alteradas desde a última marca, menos ``ANALYTICS_SYNC_OVERLAP`` segundos
+(transações longas confirmam linhas com ``updated_at`` anterior à marca), e
+gravadas com ``INSERT OR REPLACE``. Exclusões são detectadas comparando a
+quantidade de linhas e, quando diferente, os ids.
+
+Os totais de despesas e o P&L por projeto são consultados na base analítica
+quando ela está disponível e com defasagem até ``ANALYTICS_MAX_LAG``
+segundos; caso contrário, no banco transacional.
+
+O arquivo DuckDB aceita um único processo com escrita: o primeiro processo
+que o abre mantém a base e os demais usam o banco transacional.
+
+Uso pela linha de comando::
+
+    python -m app.services.analytics [--full]
+"""
+import argparse
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from enum import Enum as PyEnum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Boolean, Date, DateTime, Enum, Float, Integer, LargeBinary, Numeric, cast, func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.schema import Table
+
+from app.db.session import SessionLocal  # Importado antes dos modelos (ordem de registro)
+from app.core.config import settings
+from app.models.client import Client, Lead
+from app.models.company import Company
+from app.models.contract import Contract
+from app.models.expense import Expense, ExpenseCategory
+from app.models.project import Project
+from app.models.property import Property
+from app.schemas.expense import ExpenseRollupGroupEnum
+from app.services import reports, rollups
+
+logger = logging.getLogger(__name__)
+
+SYNCED_MODELS = (Company, Project, Property, Contract, Client, Lead, Expense)
+SYNC_BATCH_SIZE = 10_000
+STATE_TABLE = "_sync_state"
+
+
+class AnalyticsUnavailable(Exception):
+    """Base analítica desabilitada, sem o pacote ``duckdb`` ou em uso por outro processo."""
+
+
+def _duck_type(column) -> Optional[str]:
+    column_type = column.type
+    if isinstance(column_type, LargeBinary):
+        return None  # Arquivos não interessam às consultas analíticas
+    if isinstance(column_type, Enum):
+        return "VARCHAR"  # Nome do membro, como no banco transacional
+    if isinstance(column_type, Boolean):
+        return "BOOLEAN"
+    if isinstance(column_type, Integer):
+        return "BIGINT"
+    if isinstance(column_type, (Float, Numeric)):
+        return "DOUBLE"
+    if isinstance(column_type, DateTime):
+        return "TIMESTAMP"
+    if isinstance(column_type, Date):
+        return "DATE"
+    return "VARCHAR"
+
+
+def store_columns(table: Table) -> List[Tuple[str, str]]:
+    """Colunas (nome, tipo DuckDB) copiadas de uma tabela."""
+    columns = []
+    for column in table.columns:
+        duck_type = _duck_type(column)
+        if duck_type is not None:
+            columns.append((column.name, duck_type))
+    return columns
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, PyEnum):
+        return value.name
+    return value
+
+
+class AnalyticsStore:
+    """Conexão com o arquivo DuckDB, sincronização e consultas."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.last_error: Optional[str] = None
+        self._connection = None
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def connect(self):
+        if self._connection is not None:
+            return self._connection
+        if not self.enabled:
+            raise AnalyticsUnavailable("Analytics store is disabled")
+        with self._lock:
+            if self._connection is None:
+                try:
+                    import duckdb
+                except ImportError as e:
+                    raise AnalyticsUnavailable("The analytics store requires duckdb") from e
+                try:
+                    connection = duckdb.connect(self.path)
+                except duckdb.IOException as e:
+                    raise AnalyticsUnavailable(f"Analytics store is locked or unreadable: {e}") from e
+                self._create_schema(connection)
+                self._connection = connection
+        return self._connection
+
+    def _create_schema(self, connection) -> None:
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} "
+            "(table_name VARCHAR PRIMARY KEY, watermark TIMESTAMP, synced_at TIMESTAMP, rows BIGINT)"
+        )
+        for model in SYNCED_MODELS:
+            table = model.__table__
+            columns = ", ".join(
+                f'"{name}" {duck_type}' + (" PRIMARY KEY" if name == "id" else "")
+                for name, duck_type in store_columns(table)
+            )
+            connection.execute(f'CREATE TABLE IF NOT EXISTS "{table.name}" ({columns})')
+
+    # -----------------------------------------------------------------------
+    # Sincronização
+    # -----------------------------------------------------------------------
+
+    def sync(self, db: Session, *, full: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        Copia as alterações do banco transacional. ``full`` recria as tabelas
+        (necessário após mudanças no esquema) e copia tudo de novo.
+        """
+        connection = self.connect()
+        report = {}
+        with self._lock:
+            try:
+                if full:
+                    for model in SYNCED_MODELS:
+                        connection.execute(f'DROP TABLE IF EXISTS "{model.__table__.name}"')
+                    connection.execute(f"DROP TABLE IF EXISTS {STATE_TABLE}")
+                    self._create_schema(connection)
+                for model in SYNCED_MODELS:
+                    report[model.__table__.name] = self._sync_table(db, connection, model.__table__)
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+        self.last_error = None
+        return report
+
+    def _sync_table(self, db: Session, connection, table: Table) -> Dict[str, int]:
+        started = datetime.utcnow()
+        columns = store_columns(table)
+        names = [name for name, _ in columns]
+        updated_position = names.index("updated_at")
+        projection = ", ".join(f'CAST("{name}" AS {duck_type}) AS "{name}"' for name, duck_type in columns)
+
+        state = connection.execute(
+            f"SELECT watermark FROM {STATE_TABLE} WHERE table_name = ?", [table.name]
+        ).fetchone()
+        watermark = state[0] if state else None
+        statement = select(*[table.c[name] for name in names])
+        if watermark is not None:
+            statement = statement.where(
+                table.c.updated_at >= watermark - timedelta(seconds=settings.ANALYTICS_SYNC_OVERLAP)
+            )
+
+        connection.execute("BEGIN TRANSACTION")
+        try:
+            copied = 0
+            newest = watermark
+            result = db.execute(statement.execution_options(yield_per=SYNC_BATCH_SIZE))
+            for partition in result.partitions():
+                # Lido pelo DuckDB como tabela (varredura de variáveis locais)
+                batch = {
+                    name: np.array([_plain(row[index]) for row in partition], dtype=object)
+                    for index, name in enumerate(names)
+                }
+                connection.execute(f'INSERT OR REPLACE INTO "{table.name}" SELECT {projection} FROM batch')
+                copied += len(partition)
+                stamps = [row[updated_position] for row in partition if row[updated_position] is not None]
+                if stamps and (newest is None or max(stamps) > newest):
+                    newest = max(stamps)
+
+            deleted = self._remove_deleted(db, connection, table)
+            rows = connection.execute(f'SELECT count(*) FROM "{table.name}"').fetchone()[0]
+            connection.execute(
+                f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (?, ?, ?, ?)",
+                [table.name, newest, started, rows],
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return {"copied": copied, "deleted": deleted, "rows": rows}
+
+    def _remove_deleted(self, db: Session, connection, table: Table) -> int:
+        live = db.execute(select(func.count()).select_from(table)).scalar() or 0
+        stored = connection.execute(f'SELECT count(*) FROM "{table.name}"').fetchone()[0]
+        if stored <= live:
+            return 0
+
+        connection.execute("CREATE OR REPLACE TEMP TABLE _live_ids (id BIGINT)")
+        result = db.execute(select(table.c.id).execution_options(yield_per=SYNC_BATCH_SIZE * 10))
+        for partition in result.partitions():
+            ids = {"id": np.fromiter((row[0] for row in partition), dtype=np.int64, count=len(partition))}
+            connection.execute("INSERT INTO _live_ids SELECT id FROM ids")
+        deleted = connection.execute(
+            f'DELETE FROM "{table.name}" WHERE id NOT IN (SELECT id FROM _live_ids)'
+        ).fetchone()[0]
+        connection.execute("DROP TABLE _live_ids")
+        return deleted
+
+    # -----------------------------------------------------------------------
+    # Defasagem
+    # -----------------------------------------------------------------------
+
+    def status(self) -> Dict[str, Any]:
+        """Situação da base: defasagem (segundos desde o início da última sincronização completa) e tabelas."""
+        result: Dict[str, Any] = {
+            "enabled": self.enabled,
+            "available": False,
+            "lag_seconds": None,
+            "last_error": self.last_error,
+            "tables": [],
+        }
+        if not self.enabled:
+            return result
+        try:
+            cursor = self.connect().cursor()
+        except AnalyticsUnavailable as e:
+            result["last_error"] = str(e)
+            return result
+
+        rows = cursor.execute(
+            f"SELECT table_name, watermark, synced_at, rows FROM {STATE_TABLE} ORDER BY table_name"
+        ).fetchall()
+        result["available"] = True
+        result["tables"] = [
+            {"table": name, "watermark": watermark, "synced_at": synced_at, "rows": count}
+            for name, watermark, synced_at, count in rows
+        ]
+        if len(rows) == len(SYNCED_MODELS):
+            oldest = min(row[2] for row in rows)
+            result["lag_seconds"] = round((datetime.utcnow() - oldest).total_seconds(), 3)
+            result["synced_at"] = oldest
+        return result
+
+    def is_fresh(self) -> bool:
+        """Base disponível e com defasagem dentro de ``ANALYTICS_MAX_LAG``."""
+        if not self.enabled:
+            return False
+        lag = self.status()["lag_seconds"]
+        return lag is not None and lag <= settings.ANALYTICS_MAX_LAG
+
+    # -----------------------------------------------------------------------
+    # Consultas
+    # -----------------------------------------------------------------------
+
+    def execute(self, statement) -> List[Dict[str, Any]]:
+        """Executa uma consulta SQLAlchemy (compilada no dialeto do PostgreSQL, compatível com o DuckDB)."""
+        sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        cursor = self.connect().cursor()
+        cursor.execute(sql)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    # -----------------------------------------------------------------------
+    # Sincronização periódica
+    # -----------------------------------------------------------------------
+
+    def start(self) -> None:
+        if not self.enabled or settings.ANALYTICS_SYNC_INTERVAL <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="analytics-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while True:
+            db = SessionLocal()
+            try:
+                self.sync(db)
+            except AnalyticsUnavailable as e:
+                logger.warning(f"Base analítica indisponível: {e}")
+            except Exception as e:
+                logger.error(f"Erro ao sincronizar a base analítica: {e}")
+            finally:
+                db.close()
+            if self._stop.wait(settings.ANALYTICS_SYNC_INTERVAL):
+                break
+
+
+analytics_store = AnalyticsStore(settings.ANALYTICS_STORE_PATH)
+
+
+# ---------------------------------------------------------------------------
+# Consultas roteadas (base analítica ou banco transacional)
+# ---------------------------------------------------------------------------
+
+def query_rollup(
+    db: Session,
+    *,
+    group_by: Sequence[ExpenseRollupGroupEnum],
+    company_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    category: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """Mesmo resultado de ``rollups.query_rollup``, calculado na base analítica quando possível."""
+    if analytics_store.is_fresh():
+        groups = list(dict.fromkeys(ExpenseRollupGroupEnum(group) for group in group_by))
+        filters = {
+            "company_id": company_id,
+            "project_id": project_id,
+            "property_id": property_id,
+            "category": ExpenseCategory(category) if category is not None else None,
+        }
+        month = cast(func.date_trunc("month", Expense.date), Date)
+        try:
+            rows = analytics_store.execute(rollups.expense_statement(groups, filters, date_from, date_to, month))
+        except Exception as e:
+            logger.warning(f"Consulta na base analítica falhou, usando o banco transacional: {e}")
+        else:
+            sources = []
+            for row in rows:
+                values = list(row.values())
+                if ExpenseRollupGroupEnum.CATEGORY in groups:
+                    position = groups.index(ExpenseRollupGroupEnum.CATEGORY)
+                    values[position] = ExpenseCategory[values[position]]
+                sources.append(values)
+            return rollups.combine_rows(groups, sources)
+
+    return rollups.query_rollup(
+        db,
+        group_by=group_by,
+        company_id=company_id,
+        project_id=project_id,
+        property_id=property_id,
+        category=category,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+def read_pnl(
+    db: Session, *, company_id: Optional[int] = None, project_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Mesmo resultado de ``reports.read_pnl``, calculado na base analítica quando possível."""
+    if analytics_store.is_fresh():
+        # A data de atualização é a da última sincronização
+        summary = reports.pnl_select(from_rollups=False).subquery()
+        statement = select(*[column for column in summary.c if column.name != "refreshed_at"])
+        if company_id is not None:
+            statement = statement.where(summary.c.company_id == company_id)
+        if project_id is not None:
+            statement = statement.where(summary.c.project_id == project_id)
+        statement = statement.order_by(summary.c.project_id)
+        try:
+            rows = analytics_store.execute(statement)
+            synced_at = analytics_store.status().get("synced_at")
+        except Exception as e:
+            logger.warning(f"Consulta na base analítica falhou, usando o banco transacional: {e}")
+        else:
+            return [reports.pnl_row(dict(row, refreshed_at=synced_at)) for row in rows]
+
+    return reports.read_pnl(db, company_id=company_id, project_id=project_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sincroniza a base analítica (DuckDB)")
+    parser.add_argument("--full", action="store_true", help="Recria as tabelas e copia tudo de novo")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        report = analytics_store.sync(db, full=args.full)
+    finally:
+        db.close()
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
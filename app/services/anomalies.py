@@ -0,0 +1,271 @@
+"""
+Análise de anomalias em despesas.
+
+Percorre o histórico de despesas de uma empresa (ou projeto) em uma única
+passada com cursor no servidor, ordenado por projeto. As despesas de cada
+projeto são processadas com NumPy assim que o bloco termina:
+
+* mediana e MAD do valor por categoria e fornecedor (grupos pequenos
+  usam as estatísticas da categoria no projeto) e z-score robusto
+  ``(valor - mediana) / (MAD / 0.6745)``;
+* duplicidades: mesmo fornecedor e valor com datas a até
+  ``DUPLICATE_WINDOW_DAYS`` dias.
+
+A memória usada depende do maior projeto, limitado a ``MAX_BLOCK_ROWS``
+linhas (projetos maiores são avaliados em partes). As estatísticas ficam em
+``ExpenseGroupStats`` e são usadas para avaliar cada nova despesa na
+gravação (``app.models.anomaly.score_new_expenses``).
+
+Uso pela linha de comando::
+
+    python -m app.services.anomalies --company-id 1
+"""
+import argparse
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal  # Importado antes dos modelos (ordem de registro)
+from app.core.config import settings
+from app.models.anomaly import (
+    ALL_SUPPLIERS,
+    ExpenseGroupStats,
+    ExpenseReview,
+    ExpenseReviewKind,
+    ExpenseReviewStatus,
+    supplier_key,
+)
+from app.models.expense import Expense, ExpenseCategory
+from app.models.project import Project
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_BATCH_SIZE = 5000
+MAX_BLOCK_ROWS = 200_000
+
+MAD_TO_SIGMA = 0.6745
+MEAN_AD_TO_SIGMA = 1.253314
+
+
+def group_medians(values: np.ndarray, codes: np.ndarray, groups: int) -> np.ndarray:
+    """Mediana de ``values`` por grupo (``codes`` de 0 a ``groups - 1``, todos presentes)."""
+    order = np.lexsort((values, codes))
+    ordered = values[order]
+    counts = np.bincount(codes, minlength=groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return (ordered[starts + (counts - 1) // 2] + ordered[starts + counts // 2]) / 2
+
+
+def robust_scale(values: np.ndarray, codes: np.ndarray, groups: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Mediana, escala robusta (MAD normalizado) e tamanho de cada grupo."""
+    counts = np.bincount(codes, minlength=groups)
+    medians = group_medians(values, codes, groups)
+    deviations = np.abs(values - medians[codes])
+    mad = group_medians(deviations, codes, groups)
+    mean_ad = np.bincount(codes, weights=deviations, minlength=groups) / counts
+    # MAD zero (mais da metade dos valores iguais): usa o desvio absoluto médio
+    scale = np.where(mad > 0, mad / MAD_TO_SIGMA, mean_ad * MEAN_AD_TO_SIGMA)
+    return medians, scale, counts
+
+
+class AnomalyAnalyzer:
+    """Acumula as linhas de um projeto e processa o bloco ao final."""
+
+    def __init__(self, db: Session, *, existing: Set[Tuple[int, Any]]):
+        self.db = db
+        self.existing = existing
+        self.now = datetime.utcnow()
+        self.written_stats: Set[int] = set()
+        self.project_id: Optional[int] = None
+        self.rows: List[Any] = []
+        self.report = {"expenses": 0, "groups": 0, "outliers": 0, "duplicates": 0, "flagged": 0}
+
+    def add(self, row: Any) -> None:
+        if row.project_id != self.project_id or len(self.rows) >= MAX_BLOCK_ROWS:
+            self.flush()
+            self.project_id = row.project_id
+        self.rows.append(row)
+
+    def flush(self) -> None:
+        if self.rows:
+            self._process(self.rows)
+        self.rows = []
+
+    def _process(self, rows: List[Any]) -> None:
+        project_id = self.project_id
+        count = len(rows)
+        ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=count)
+        amounts = np.fromiter((row.amount or 0.0 for row in rows), dtype=np.float64, count=count)
+        days = np.fromiter((row.date.toordinal() for row in rows), dtype=np.int64, count=count)
+        categories, category_codes = np.unique([row.category.name for row in rows], return_inverse=True)
+        suppliers, supplier_codes = np.unique([supplier_key(row.supplier_name) for row in rows], return_inverse=True)
+
+        # Grupo = (categoria, fornecedor)
+        group_keys, group_codes = np.unique(category_codes * len(suppliers) + supplier_codes, return_inverse=True)
+        medians, scale, counts = robust_scale(amounts, group_codes, len(group_keys))
+        category_medians, category_scale, category_counts = robust_scale(amounts, category_codes, len(categories))
+
+        # Grupos pequenos usam as estatísticas da categoria no projeto
+        minimum = settings.ANOMALY_MIN_GROUP_SIZE
+        use_group = counts[group_codes] >= minimum
+        row_median = np.where(use_group, medians[group_codes], category_medians[category_codes])
+        row_scale = np.where(use_group, scale[group_codes], category_scale[category_codes])
+        scored = use_group | (category_counts[category_codes] >= minimum)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(row_scale > 0, (amounts - row_median) / row_scale, 0.0)
+        outliers = np.flatnonzero(scored & (np.abs(z) >= settings.ANOMALY_Z_THRESHOLD))
+
+        # Duplicidades: ordena por fornecedor, valor e data e compara vizinhos
+        cents = np.round(amounts * 100).astype(np.int64)
+        order = np.lexsort((ids, days, cents, supplier_codes))
+        same = (
+            (supplier_codes[order][1:] == supplier_codes[order][:-1])
+            & (cents[order][1:] == cents[order][:-1])
+            & (np.diff(days[order]) <= settings.DUPLICATE_WINDOW_DAYS)
+            & (suppliers[supplier_codes[order][1:]] != "")
+        )
+        # Do par, a despesa lançada por último (maior id) é a duplicada
+        previous, following = order[:-1][same], order[1:][same]
+        duplicate_positions = np.where(ids[previous] > ids[following], previous, following)
+        duplicate_of = np.minimum(ids[previous], ids[following])
+
+        reviews = [
+            self._review(
+                ExpenseReviewKind.OUTLIER, int(ids[i]), project_id, score=float(z[i]), median=float(row_median[i])
+            )
+            for i in outliers
+        ]
+        reviews += [
+            self._review(ExpenseReviewKind.DUPLICATE, int(ids[i]), project_id, duplicate_of_id=int(original))
+            for i, original in zip(duplicate_positions, duplicate_of)
+        ]
+        reviews = [review for review in reviews if review is not None]
+        if reviews:
+            self.db.execute(insert(ExpenseReview), reviews)
+
+        # Projetos maiores que MAX_BLOCK_ROWS ficam com as estatísticas da primeira parte
+        if project_id not in self.written_stats:
+            self.written_stats.add(project_id)
+            stats = []
+            for index, key in enumerate(group_keys):
+                category, supplier = divmod(int(key), len(suppliers))
+                stats.append(
+                    self._stats(categories[category], suppliers[supplier], counts[index], medians[index], scale[index])
+                )
+            for index, category in enumerate(categories):
+                stats.append(self._stats(
+                    category, ALL_SUPPLIERS, category_counts[index], category_medians[index], category_scale[index]
+                ))
+            self.db.execute(insert(ExpenseGroupStats), stats)
+
+        self.report["expenses"] += count
+        self.report["groups"] += len(group_keys)
+        self.report["outliers"] += len(outliers)
+        self.report["duplicates"] += len(duplicate_positions)
+        self.report["flagged"] += len(reviews)
+
+    def _review(
+        self, kind: ExpenseReviewKind, expense_id: int, project_id: int, **values: Any
+    ) -> Optional[Dict[str, Any]]:
+        if (expense_id, kind) in self.existing:
+            return None
+        self.existing.add((expense_id, kind))
+        return {
+            "expense_id": expense_id,
+            "project_id": project_id,
+            "kind": kind,
+            "score": values.get("score"),
+            "median": values.get("median"),
+            "duplicate_of_id": values.get("duplicate_of_id"),
+            "status": ExpenseReviewStatus.PENDING,
+            "created_at": self.now,
+            "updated_at": self.now,
+        }
+
+    def _stats(self, category: str, key: str, count: int, median: float, scale: float) -> Dict[str, Any]:
+        return {
+            "project_id": self.project_id,
+            "category": ExpenseCategory[str(category)],
+            "supplier_key": str(key),
+            "count": int(count),
+            "median": float(median),
+            "scale": float(scale),
+            "created_at": self.now,
+            "updated_at": self.now,
+        }
+
+
+def analyze_expenses(
+    db: Session,
+    *,
+    company_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    batch_size: int = ANALYSIS_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Recalcula as estatísticas e sinaliza outliers e duplicidades.
+
+    Despesas já sinalizadas (inclusive as revisadas) não são sinalizadas
+    de novo. Tudo acontece em uma única transação.
+    """
+    projects = select(Project.id)
+    if company_id is not None:
+        projects = projects.where(Project.company_id == company_id)
+    if project_id is not None:
+        projects = projects.where(Project.id == project_id)
+
+    statement = (
+        select(Expense.id, Expense.project_id, Expense.category, Expense.supplier_name, Expense.amount, Expense.date)
+        .where(Expense.project_id.in_(projects))
+        .order_by(Expense.project_id, Expense.id)
+    )
+    existing = set(
+        db.execute(
+            select(ExpenseReview.expense_id, ExpenseReview.kind).where(ExpenseReview.project_id.in_(projects))
+        ).all()
+    )
+
+    try:
+        db.execute(delete(ExpenseGroupStats).where(ExpenseGroupStats.project_id.in_(projects)))
+        analyzer = AnomalyAnalyzer(db, existing=existing)
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            for row in partition:
+                analyzer.add(row)
+        analyzer.flush()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    logger.info(
+        f"Análise de anomalias: {analyzer.report['expenses']} despesas, "
+        f"{analyzer.report['flagged']} novas sinalizações"
+    )
+    return analyzer.report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Analisa anomalias nas despesas")
+    parser.add_argument("--company-id", type=int, default=None)
+    parser.add_argument("--project-id", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=ANALYSIS_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        report = analyze_expenses(
+            db, company_id=args.company_id, project_id=args.project_id, batch_size=args.batch_size
+        )
+    finally:
+        db.close()
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
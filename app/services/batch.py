@@ -0,0 +1,131 @@
+"""
+Requisições em lote: vários GET da API em uma única chamada HTTP.
+
+Cada sub-requisição é despachada para a própria aplicação ASGI, passando
+pela mesma pilha de middlewares (cache de respostas inclusive) e pelas
+mesmas verificações de permissão de uma chamada avulsa, com o token de
+quem fez o lote. O usuário autenticado pelo lote vai no escopo
+(``USER_SCOPE_KEY``) e ``deps.get_current_user`` o reaproveita, sem
+decodificar o token nem consultar o usuário de novo. As sub-requisições são independentes e rodam em paralelo,
+até ``BATCH_CONCURRENCY`` ao mesmo tempo; cada uma usa sua própria sessão
+do pool (uma ``Session`` do SQLAlchemy não pode ser usada por várias
+threads ao mesmo tempo).
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import orjson
+
+from app.core.config import settings
+from app.schemas.batch import BatchRequestItem
+from app.models.user import User
+from app.services import deadline, principal
+from app.services.rate_limit import BATCH_SCOPE_KEY
+
+# Usuário do lote, no escopo das sub-requisições
+USER_SCOPE_KEY = "app.batch_user"
+
+# Cabeçalhos das sub-respostas devolvidos no lote
+RESPONSE_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "x-cache")
+
+
+def _error(item: BatchRequestItem, status: int, detail: str) -> Dict[str, Any]:
+    return {"id": item.id, "status": status, "headers": {}, "body": {"detail": detail}}
+
+
+def _validate_path(path: str, batch_path: str) -> Optional[str]:
+    if not path.startswith("/") or "?" in path or "#" in path:
+        return "Path must start with / and carry no query string (use params)"
+    if path.rstrip("/") == batch_path.rstrip("/"):
+        return "Batch requests cannot be nested"
+    return None
+
+
+async def _dispatch(
+    app, parent_scope: Dict[str, Any], item: BatchRequestItem, authorization: Optional[str], user: User
+) -> Dict[str, Any]:
+    path = settings.API_V1_STR + item.path
+    headers = [(b"accept", b"application/json")]
+    if authorization:
+        headers.append((b"authorization", authorization.encode("latin-1")))
+    if item.etag:
+        headers.append((b"if-none-match", item.etag.encode("latin-1")))
+    scope = {
+        "type": "http",
+        "asgi": parent_scope.get("asgi", {"version": "3.0"}),
+        "http_version": parent_scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": parent_scope.get("scheme", "http"),
+        "server": parent_scope.get("server"),
+        "client": parent_scope.get("client"),
+        "root_path": parent_scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(item.params, doseq=True).encode(),
+        "headers": headers,
+        "state": dict(parent_scope.get("state") or {}),
+        BATCH_SCOPE_KEY: True,
+        USER_SCOPE_KEY: user,
+        # Sub-requisições herdam o prazo do lote
+        deadline.SCOPE_KEY: parent_scope.get(deadline.SCOPE_KEY),
+    }
+    if principal.SCOPE_KEY in parent_scope:
+        # Já resolvido pelos middlewares do lote
+        scope[principal.SCOPE_KEY] = parent_scope[principal.SCOPE_KEY]
+
+    received = False
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal received
+        if received:
+            # GET sem corpo: nada mais a receber
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    status = 500
+    response_headers: Dict[str, str] = {}
+    chunks: List[bytes] = []
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                key = name.decode("latin-1").lower()
+                if key in RESPONSE_HEADERS:
+                    response_headers[key] = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+
+    body: Any = b"".join(chunks)
+    if not body:
+        body = None
+    elif response_headers.get("content-type", "").startswith("application/json"):
+        body = orjson.loads(body)
+    else:
+        body = body.decode("utf-8", "replace")
+    return {"id": item.id, "status": status, "headers": response_headers, "body": body}
+
+
+async def run_batch(
+    app, parent_scope: Dict[str, Any], items: List[BatchRequestItem], authorization: Optional[str], user: User
+) -> List[Dict[str, Any]]:
+    """Executa as sub-requisições e devolve as respostas na ordem dos pedidos."""
+    semaphore = asyncio.Semaphore(max(settings.BATCH_CONCURRENCY, 1))
+    batch_path = parent_scope["path"][len(settings.API_V1_STR):]
+
+    async def run(item: BatchRequestItem) -> Dict[str, Any]:
+        problem = _validate_path(item.path, batch_path)
+        if problem is not None:
+            return _error(item, 400, problem)
+        async with semaphore:
+            try:
+                return await _dispatch(app, parent_scope, item, authorization, user)
+            except Exception as e:
+                return _error(item, 500, f"Sub-request failed: {e}")
+
+    return list(await asyncio.gather(*(run(item) for item in items)))
@@ -0,0 +1,219 @@
+"""
+Acompanhamento de orçamento (projetos e imóveis).
+
+O gasto acumulado vem da tabela de totais mensais (``ExpenseRollup``) e os
+alertas de limite são gerados na gravação das despesas
+(``app.models.budget``). Aqui ficam os indicadores calculados sob demanda:
+ritmo de gasto (média mensal na janela recente), data projetada em que o
+gasto alcança o orçamento e gasto projetado até o fim previsto. As séries
+de todos os projetos são carregadas em uma consulta e processadas juntas
+como uma matriz (entidade x mês).
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.models.project import Project
+from app.models.property import Property
+from app.models.rollup import ExpenseRollup
+from app.schemas.budget import BudgetStatusEnum
+
+AVERAGE_MONTH_DAYS = 30.4375
+MAX_PROJECTION_DAYS = 365 * 100
+
+
+def _month_index(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def _month_date(index: int) -> date:
+    year, month = divmod(int(index), 12)
+    return date(year, month + 1, 1)
+
+
+def _days_in_month(index: int) -> int:
+    return (_month_date(index + 1) - _month_date(index)).days
+
+
+def compute_health(
+    entities: Sequence[Dict[str, Any]],
+    series: Sequence[Tuple[int, date, float]],
+    *,
+    today: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Calcula os indicadores de orçamento de várias entidades de uma vez.
+
+    ``entities`` traz ``budget`` e ``expected_end_date`` de cada entidade;
+    ``series`` traz tuplas (posição da entidade, mês, total gasto no mês).
+    """
+    today = today or date.today()
+    count = len(entities)
+    current = _month_index(today)
+    window = max(settings.BUDGET_BURN_RATE_MONTHS, 1)
+
+    positions = np.array([row[0] for row in series], dtype=np.int64)
+    months = np.array([_month_index(row[1]) for row in series], dtype=np.int64)
+    totals = np.array([row[2] or 0.0 for row in series], dtype=np.float64)
+
+    first = min(int(months.min()) if len(months) else current, current - window + 1)
+    last = max(int(months.max()) if len(months) else current, current)
+    matrix = np.zeros((count, last - first + 1))
+    np.add.at(matrix, (positions, months - first), totals)
+
+    spent = matrix.sum(axis=1)
+    cumulative = np.cumsum(matrix, axis=1)
+
+    # Ritmo mensal: gasto da janela (meses completos + mês corrente até hoje) por dia decorrido
+    window_start = current - window + 1
+    recent = matrix[:, window_start - first:current - first + 1].sum(axis=1)
+    elapsed_days = (today - _month_date(window_start)).days + 1
+    burn_rate = recent / elapsed_days * AVERAGE_MONTH_DAYS
+
+    budget = np.array(
+        [entity["budget"] if entity.get("budget") and entity["budget"] > 0 else np.nan for entity in entities],
+        dtype=np.float64,
+    )
+    has_budget = ~np.isnan(budget)
+    remaining = budget - spent
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = spent / budget
+
+        # Orçamento já alcançado: mês do cruzamento, interpolado pelo gasto do mês
+        crossed = cumulative >= budget[:, None]
+        crossed_any = crossed.any(axis=1) & has_budget
+        crossed_at = crossed.argmax(axis=1)
+        rows = np.arange(count)
+        month_total = matrix[rows, crossed_at]
+        before = cumulative[rows, crossed_at] - month_total
+        crossed_fraction = np.clip(np.where(month_total > 0, (budget - before) / month_total, 0.0), 0.0, 1.0)
+
+        # Ainda dentro do orçamento: dias até o gasto alcançá-lo no ritmo atual
+        days_to_overrun = np.where(burn_rate > 0, remaining / burn_rate * AVERAGE_MONTH_DAYS, np.inf)
+
+    thresholds = sorted(settings.BUDGET_ALERT_THRESHOLDS) or [1.0]
+    results = []
+    for index, entity in enumerate(entities):
+        projected_overrun = None
+        if crossed_any[index]:
+            month = int(crossed_at[index]) + first
+            day = int(crossed_fraction[index] * (_days_in_month(month) - 1))
+            projected_overrun = _month_date(month) + timedelta(days=day)
+        elif has_budget[index] and days_to_overrun[index] < MAX_PROJECTION_DAYS:
+            projected_overrun = today + timedelta(days=int(np.ceil(days_to_overrun[index])))
+
+        end_date = entity.get("expected_end_date")
+        projected_total = float(spent[index])
+        if end_date and end_date > today:
+            projected_total += float(burn_rate[index]) * (end_date - today).days / AVERAGE_MONTH_DAYS
+
+        if not has_budget[index]:
+            status = BudgetStatusEnum.NO_BUDGET
+        elif ratio[index] >= 1.0:
+            status = BudgetStatusEnum.OVER_BUDGET
+        elif projected_overrun and end_date and projected_overrun <= end_date:
+            status = BudgetStatusEnum.AT_RISK
+        elif ratio[index] >= thresholds[0]:
+            status = BudgetStatusEnum.WARNING
+        else:
+            status = BudgetStatusEnum.OK
+
+        results.append({
+            "project_id": entity["project_id"],
+            "property_id": entity.get("property_id"),
+            "name": entity["name"],
+            "budget": float(budget[index]) if has_budget[index] else None,
+            "spent": round(float(spent[index]), 2),
+            "remaining": round(float(remaining[index]), 2) if has_budget[index] else None,
+            "percent_used": round(float(ratio[index]) * 100, 2) if has_budget[index] else None,
+            "burn_rate": round(float(burn_rate[index]), 2),
+            "projected_overrun_date": projected_overrun,
+            "projected_total": round(projected_total, 2),
+            "status": status,
+            "open_alerts": entity.get("open_alerts", 0),
+        })
+    return results
+
+
+def _collect(rows, key_columns: int) -> Tuple[List[Dict[str, Any]], List[Tuple[int, date, float]]]:
+    """Separa as linhas (entidade..., mês, total) em entidades e série mensal."""
+    entities: List[Dict[str, Any]] = []
+    positions: Dict[Any, int] = {}
+    series: List[Tuple[int, date, float]] = []
+    for row in rows:
+        key = row[0]
+        if key not in positions:
+            positions[key] = len(entities)
+            entities.append(dict(row._mapping))
+        month, total = row[key_columns], row[key_columns + 1]
+        if month is not None:
+            series.append((positions[key], month, total))
+    return entities, series
+
+
+def portfolio_health(
+    db: Session,
+    *,
+    company_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    today: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """Saúde do orçamento de todos os projetos (de uma empresa) com uma única consulta de gastos."""
+    group = (Project.id, Project.name, Project.budget, Project.expected_end_date)
+    statement = (
+        select(
+            Project.id.label("project_id"),
+            Project.name.label("name"),
+            Project.budget.label("budget"),
+            Project.expected_end_date.label("expected_end_date"),
+            ExpenseRollup.month,
+            func.sum(ExpenseRollup.total),
+        )
+        .outerjoin(ExpenseRollup, ExpenseRollup.project_id == Project.id)
+        .group_by(*group, ExpenseRollup.month)
+        .order_by(Project.id)
+    )
+    if company_id is not None:
+        statement = statement.where(Project.company_id == company_id)
+    if project_id is not None:
+        statement = statement.where(Project.id == project_id)
+
+    entities, series = _collect(db.execute(statement).all(), 4)
+    open_alerts = crud.budget_alert.count_open(db, project_ids=[entity["project_id"] for entity in entities])
+    for entity in entities:
+        entity["open_alerts"] = open_alerts.get((entity["project_id"], None), 0)
+    return compute_health(entities, series, today=today)
+
+
+def property_health(db: Session, *, project_id: int, today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Custo de construção x gasto de cada imóvel de um projeto."""
+    group = (
+        Property.id, Property.name, Property.construction_cost, Property.expected_completion_date, Property.project_id
+    )
+    statement = (
+        select(
+            Property.id.label("property_id"),
+            Property.name.label("name"),
+            Property.construction_cost.label("budget"),
+            Property.expected_completion_date.label("expected_end_date"),
+            Property.project_id.label("project_id"),
+            ExpenseRollup.month,
+            func.sum(ExpenseRollup.total),
+        )
+        .outerjoin(ExpenseRollup, ExpenseRollup.property_id == Property.id)
+        .where(Property.project_id == project_id)
+        .group_by(*group, ExpenseRollup.month)
+        .order_by(Property.id)
+    )
+
+    entities, series = _collect(db.execute(statement).all(), 5)
+    open_alerts = crud.budget_alert.count_open(db, project_ids=[project_id])
+    for entity in entities:
+        entity["open_alerts"] = open_alerts.get((project_id, entity["property_id"]), 0)
+    return compute_health(entities, series, today=today)
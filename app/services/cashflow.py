@@ -0,0 +1,336 @@
+"""
+Projeção de fluxo de caixa (entradas de contratos x saídas de despesas).
+
+Entradas, conforme o tipo do contrato:
+
+* venda (e outros): ``contract_value`` recebido no mês da assinatura;
+* locação/arrendamento: ``contract_value`` é a parcela mensal, recebida
+  do mês da assinatura até o mês do vencimento (sem vencimento, até o fim
+  da projeção). Contratos vencidos ou finalizados não geram parcelas
+  futuras; contratos cancelados são ignorados.
+
+Saídas: até o mês corrente, o gasto realizado (``ExpenseRollup``); depois
+dele, o ritmo de gasto do projeto (``app.services.budget``) até o fim
+previsto da obra.
+
+Tudo é calculado em matrizes (projeto x mês): as parcelas entram como
+diferenças no mês inicial e no mês seguinte ao final e uma soma acumulada
+espalha os valores. Os resultados ficam em cache por processo; qualquer
+alteração confirmada em contratos, despesas, projetos ou imóveis invalida
+o cache. As de outros workers chegam por ``app.services.invalidation``
+(as mesmas tabelas, publicadas pelo cache de respostas) em até
+``RESPONSE_CACHE_SYNC_INTERVAL`` segundos; ``CASHFLOW_CACHE_TTL`` limita a
+defasagem se a publicação falhar.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.contract import Contract, ContractStatus, ContractType
+from app.models.expense import Expense
+from app.models.project import Project
+from app.models.property import Property
+from app.models.rollup import ExpenseRollup
+from app.services import invalidation
+from app.services.budget import _month_date, _month_index, compute_health
+
+MAX_PROJECTION_MONTHS = 120
+
+SCHEDULED_TYPES = (ContractType.RENTAL, ContractType.LEASE)
+# Contratos encerrados: parcelas só até o mês corrente
+CLOSED_STATUSES = (ContractStatus.EXPIRED, ContractStatus.COMPLETED)
+
+SESSION_FLAG = "cashflow_changed"
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+_cache: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+_generation = 0
+
+
+def invalidate() -> None:
+    """Descarta todas as projeções em cache."""
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _cache.clear()
+
+
+def mark_changed(db: Session) -> None:
+    """Invalida o cache quando a transação de ``db`` for confirmada (gravações fora do ORM)."""
+    db.info[SESSION_FLAG] = True
+
+
+def _cached(key: Hashable, compute):
+    invalidation.sync()
+    with _cache_lock:
+        generation = _generation
+        entry = _cache.get(key)
+        if entry and entry[0] == generation and entry[1] > time.monotonic():
+            _cache.move_to_end(key)
+            return entry[2]
+
+    value = compute()
+    with _cache_lock:
+        # Alguma gravação confirmada durante o cálculo: não guarda o resultado
+        if generation == _generation:
+            _cache[key] = (generation, time.monotonic() + settings.CASHFLOW_CACHE_TTL, value)
+            while len(_cache) > settings.CASHFLOW_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return value
+
+
+def _changed(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        mark_changed(session)
+
+
+for _model in (Contract, Expense, Project, Property):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _session_committed(session: Session) -> None:
+    if session.info.pop(SESSION_FLAG, False):
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _session_rolled_back(session: Session) -> None:
+    session.info.pop(SESSION_FLAG, None)
+
+
+# Tabelas lidas pela projeção; alterações em outros workers chegam pelas versões compartilhadas
+_TABLES = {model.__tablename__ for model in (Contract, Expense, ExpenseRollup, Project, Property)}
+
+
+@invalidation.subscribe
+def _remote_changes(tags: Tuple[str, ...]) -> None:
+    if invalidation.ALL in tags or _TABLES.intersection(tags):
+        invalidate()
+
+
+# ---------------------------------------------------------------------------
+# Projeção
+# ---------------------------------------------------------------------------
+
+def _load(
+    db: Session, *, company_id: Optional[int], project_id: Optional[int]
+) -> Tuple[List[Dict[str, Any]], List[Tuple[int, date, float]], List[Any]]:
+    group = (Project.id, Project.name, Project.budget, Project.expected_end_date)
+    statement = (
+        select(
+            Project.id.label("project_id"),
+            Project.name.label("name"),
+            Project.budget.label("budget"),
+            Project.expected_end_date.label("expected_end_date"),
+            ExpenseRollup.month,
+            func.sum(ExpenseRollup.total),
+        )
+        .outerjoin(ExpenseRollup, ExpenseRollup.project_id == Project.id)
+        .group_by(*group, ExpenseRollup.month)
+        .order_by(Project.id)
+    )
+    contracts = (
+        select(
+            Property.project_id,
+            Contract.type,
+            Contract.status,
+            Contract.signing_date,
+            Contract.expiration_date,
+            Contract.contract_value,
+        )
+        .join(Property, Contract.property_id == Property.id)
+        .join(Project, Property.project_id == Project.id)
+        .where(Contract.status != ContractStatus.CANCELLED)
+    )
+    if company_id is not None:
+        statement = statement.where(Project.company_id == company_id)
+        contracts = contracts.where(Project.company_id == company_id)
+    if project_id is not None:
+        statement = statement.where(Project.id == project_id)
+        contracts = contracts.where(Project.id == project_id)
+
+    entities: List[Dict[str, Any]] = []
+    positions: Dict[int, int] = {}
+    series: List[Tuple[int, date, float]] = []
+    for row in db.execute(statement):
+        if row.project_id not in positions:
+            positions[row.project_id] = len(entities)
+            entities.append(dict(row._mapping))
+        if row[4] is not None:
+            series.append((positions[row.project_id], row[4], row[5] or 0.0))
+    contract_rows = [(positions[row[0]],) + tuple(row[1:]) for row in db.execute(contracts) if row[0] in positions]
+    return entities, series, contract_rows
+
+
+def compute_cashflow(
+    entities: List[Dict[str, Any]],
+    series: List[Tuple[int, date, float]],
+    contracts: List[Tuple[int, ContractType, ContractStatus, date, Optional[date], float]],
+    *,
+    start: date,
+    months: int,
+    include_pending: bool = True,
+    today: Optional[date] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Monta as matrizes (projeto x mês) de entradas e saídas da janela.
+
+    Retorna entradas, saídas, saldo de abertura (tudo antes da janela) por
+    projeto e a máscara dos meses projetados.
+    """
+    today = today or date.today()
+    count = len(entities)
+    current = _month_index(today)
+    window_start = _month_index(start)
+    window_end = window_start + months - 1
+
+    burn_rate = np.array([row["burn_rate"] for row in compute_health(entities, series, today=today)])
+    if contracts and not include_pending:
+        contracts = [row for row in contracts if row[2] != ContractStatus.PENDING]
+
+    expense_positions = np.array([row[0] for row in series], dtype=np.int64)
+    expense_months = np.array([_month_index(row[1]) for row in series], dtype=np.int64)
+    expense_totals = np.array([row[2] for row in series], dtype=np.float64)
+    positions = np.array([row[0] for row in contracts], dtype=np.int64)
+    scheduled = np.array([row[1] in SCHEDULED_TYPES for row in contracts], dtype=bool)
+    closed = np.array([row[2] in CLOSED_STATUSES for row in contracts], dtype=bool)
+    signed = np.array([_month_index(row[3]) for row in contracts], dtype=np.int64)
+    expires = np.array(
+        [_month_index(row[4]) if row[4] else window_end for row in contracts], dtype=np.int64
+    )
+    values = np.array([row[5] or 0.0 for row in contracts], dtype=np.float64)
+
+    # A matriz começa no primeiro mês com movimento (para o saldo de abertura)
+    first = window_start
+    if len(expense_months):
+        first = min(first, int(expense_months.min()))
+    if len(signed):
+        first = min(first, int(signed.min()))
+    width = window_end - first + 1
+
+    # Saídas realizadas até o mês corrente
+    outflow = np.zeros((count, width))
+    done = expense_months <= min(current, window_end)
+    np.add.at(outflow, (expense_positions[done], expense_months[done] - first), expense_totals[done])
+
+    # Saídas projetadas: ritmo de gasto do mês seguinte até o fim previsto
+    end_dates = [entity.get("expected_end_date") for entity in entities]
+    project_end = np.array([_month_index(end) if end else window_end for end in end_dates], dtype=np.int64)
+    month_numbers = np.arange(first, window_end + 1)
+    future = (month_numbers[None, :] > current) & (month_numbers[None, :] <= project_end[:, None])
+    outflow += future * burn_rate[:, None]
+
+    # Entradas: parcela única no mês da assinatura
+    inflow = np.zeros((count, width + 1))
+    single = ~scheduled & (signed <= window_end)
+    np.add.at(inflow, (positions[single], signed[single] - first), values[single])
+
+    # Parcelas mensais: +valor no mês inicial, -valor no mês seguinte ao último
+    last = np.minimum(expires, window_end)
+    last = np.where(closed, np.minimum(last, max(current, first - 1)), last)
+    schedule = scheduled & (signed <= last)
+    steps = np.zeros((count, width + 1))
+    np.add.at(steps, (positions[schedule], signed[schedule] - first), values[schedule])
+    np.add.at(steps, (positions[schedule], last[schedule] - first + 1), -values[schedule])
+    inflow = inflow[:, :width] + np.cumsum(steps, axis=1)[:, :width]
+
+    offset = window_start - first
+    opening = (inflow[:, :offset] - outflow[:, :offset]).sum(axis=1)
+    projected = np.broadcast_to(month_numbers[offset:] > current, (count, months))
+    return inflow[:, offset:], outflow[:, offset:], opening, projected
+
+
+def _projection(
+    name: str,
+    project_id: Optional[int],
+    inflow: np.ndarray,
+    outflow: np.ndarray,
+    opening: float,
+    projected: np.ndarray,
+    start_index: int,
+) -> Dict[str, Any]:
+    net = inflow - outflow
+    balance = opening + np.cumsum(net)
+    return {
+        "project_id": project_id,
+        "name": name,
+        "opening_balance": round(float(opening), 2),
+        "total_inflow": round(float(inflow.sum()), 2),
+        "total_outflow": round(float(outflow.sum()), 2),
+        "months": [
+            {
+                "month": _month_date(start_index + index),
+                "inflow": round(float(inflow[index]), 2),
+                "outflow": round(float(outflow[index]), 2),
+                "net": round(float(net[index]), 2),
+                "balance": round(float(balance[index]), 2),
+                "projected": bool(projected[index]),
+            }
+            for index in range(len(inflow))
+        ],
+    }
+
+
+def _window(date_from: Optional[date], months: int, today: date) -> Tuple[date, int]:
+    months = max(1, min(months, MAX_PROJECTION_MONTHS))
+    if date_from is None:
+        # Padrão: últimos 12 meses e o restante projetado
+        date_from = _month_date(_month_index(today) - 11)
+    return date(date_from.year, date_from.month, 1), months
+
+
+def portfolio_cashflow(
+    db: Session,
+    *,
+    company_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    months: int = 24,
+    include_pending: bool = True,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """Fluxo de caixa mensal de cada projeto (de uma empresa) e o consolidado."""
+    today = today or date.today()
+    start, months = _window(date_from, months, today)
+    key = ("portfolio", company_id, project_id, start, months, include_pending, today)
+
+    def compute() -> Dict[str, Any]:
+        entities, series, contracts = _load(db, company_id=company_id, project_id=project_id)
+        inflow, outflow, opening, projected = compute_cashflow(
+            entities, series, contracts, start=start, months=months, include_pending=include_pending, today=today
+        )
+        start_index = _month_index(start)
+        projects = [
+            _projection(
+                entity["name"], entity["project_id"], inflow[index], outflow[index], opening[index],
+                projected[index], start_index,
+            )
+            for index, entity in enumerate(entities)
+        ]
+        total = _projection(
+            "Total", None, inflow.sum(axis=0), outflow.sum(axis=0), opening.sum(),
+            np.arange(start_index, start_index + months) > _month_index(today), start_index,
+        )
+        return {"company_id": company_id, "total": total, "projects": projects}
+
+    return _cached(key, compute)
+
+
+def project_cashflow(db: Session, *, project_id: int, **options: Any) -> Dict[str, Any]:
+    """Fluxo de caixa mensal de um projeto."""
+    return portfolio_cashflow(db, project_id=project_id, **options)["projects"][0]
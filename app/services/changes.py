@@ -0,0 +1,209 @@
+"""
+Feeds de alterações por entidade (sincronização delta).
+
+Cada página traz as linhas alteradas depois da posição do cursor, em ordem
+de ``(updated_at, id)``, e as exclusões registradas em ``Tombstone`` no
+mesmo intervalo. O cursor guarda as duas posições; o cliente repete a
+chamada com ``next_cursor`` até ``has_more`` ser falso e guarda o último
+cursor para a próxima sincronização. Sem cursor, ``updated_since`` define o
+início; sem nenhum dos dois, o feed começa do zero (carga inicial, sem
+exclusões anteriores).
+
+Linhas alteradas nos últimos ``CHANGE_FEED_SETTLE_SECONDS`` ficam para a
+próxima página, dando tempo para transações em andamento confirmarem.
+Exclusões são guardadas por ``TOMBSTONE_RETENTION_DAYS``; cursores mais
+antigos que isso exigem nova carga completa.
+
+Uso pela linha de comando (limpeza de exclusões antigas)::
+
+    python -m app.services.changes --purge
+"""
+import argparse
+import base64
+import binascii
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from enum import Enum as PyEnum
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import LargeBinary, and_, delete, or_, select
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal  # Importado antes dos modelos (ordem de registro)
+from app.core.config import settings
+from app.models.client import Client, Lead
+from app.models.contract import Contract
+from app.models.expense import Expense
+from app.models.project import Project
+from app.models.property import Property
+from app.models.tombstone import Tombstone
+from app.schemas.changes import ChangeFeedEntityEnum
+
+logger = logging.getLogger(__name__)
+
+FEED_MODELS = {
+    ChangeFeedEntityEnum.PROJECTS: Project,
+    ChangeFeedEntityEnum.PROPERTIES: Property,
+    ChangeFeedEntityEnum.CONTRACTS: Contract,
+    ChangeFeedEntityEnum.EXPENSES: Expense,
+    ChangeFeedEntityEnum.CLIENTS: Client,
+    ChangeFeedEntityEnum.LEADS: Lead,
+}
+
+Position = Tuple[Optional[datetime], int]
+
+
+class InvalidCursor(Exception):
+    """Cursor malformado."""
+
+
+class CursorExpired(Exception):
+    """Cursor mais antigo que a retenção das exclusões."""
+
+
+def company_column(model):
+    """Coluna com a empresa dona do registro (depois de ``join_company``)."""
+    if model in (Project, Client):
+        return model.company_id
+    if model is Lead:
+        return Client.company_id
+    return Project.company_id
+
+
+def join_company(statement, model):
+    """Adiciona à consulta os joins até a tabela que tem a empresa do registro."""
+    if model in (Property, Expense):
+        return statement.join(Project, Project.id == model.project_id)
+    if model is Contract:
+        return statement.join(Property, Property.id == Contract.property_id).join(
+            Project, Project.id == Property.project_id
+        )
+    if model is Lead:
+        return statement.join(Client, Client.id == Lead.client_id)
+    return statement
+
+
+def encode_cursor(updates: Position, deletes: Position) -> str:
+    data = {
+        "u": [updates[0].isoformat() if updates[0] else None, updates[1]],
+        "d": [deletes[0].isoformat() if deletes[0] else None, deletes[1]],
+    }
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Position, Position]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        positions = []
+        for key in ("u", "d"):
+            timestamp, last_id = data[key]
+            positions.append((datetime.fromisoformat(timestamp) if timestamp else None, int(last_id)))
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    return positions[0], positions[1]
+
+
+def _after(updated_at, id_column, position: Position):
+    timestamp, last_id = position
+    if timestamp is None:
+        return None
+    return or_(updated_at > timestamp, and_(updated_at == timestamp, id_column > last_id))
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, PyEnum):
+        return value.value
+    return value
+
+
+def read_changes(
+    db: Session,
+    entity: ChangeFeedEntityEnum,
+    *,
+    company_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """Uma página do feed de alterações de uma entidade."""
+    entity = ChangeFeedEntityEnum(entity)
+    model = FEED_MODELS[entity]
+    now = datetime.utcnow()
+    horizon = now - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+
+    if cursor:
+        updates, deletes = decode_cursor(cursor)
+    elif updated_since is not None:
+        if updated_since.tzinfo is not None:
+            updated_since = updated_since.astimezone(timezone.utc).replace(tzinfo=None)
+        updates = deletes = (updated_since, 0)
+    else:
+        # Carga inicial: só as exclusões que acontecerem daqui em diante interessam
+        updates, deletes = (None, 0), (horizon, 0)
+    if deletes[0] is not None and deletes[0] < now - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS):
+        raise CursorExpired("Cursor expired, a full resync is required")
+
+    # Alterações
+    columns = [column for column in model.__table__.columns if not isinstance(column.type, LargeBinary)]
+    statement = join_company(select(*columns), model).where(model.updated_at <= horizon)
+    if company_id is not None:
+        statement = statement.where(company_column(model) == company_id)
+    after = _after(model.updated_at, model.id, updates)
+    if after is not None:
+        statement = statement.where(after)
+    rows = db.execute(statement.order_by(model.updated_at, model.id).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [{column.name: _plain(value) for column, value in zip(columns, row)} for row in rows]
+    if rows:
+        updates = (rows[-1].updated_at, rows[-1].id)
+
+    # Exclusões
+    statement = select(Tombstone.id, Tombstone.entity_id, Tombstone.updated_at).where(
+        Tombstone.entity == model.__tablename__, Tombstone.updated_at <= horizon
+    )
+    if company_id is not None:
+        statement = statement.where(Tombstone.company_id == company_id)
+    after = _after(Tombstone.updated_at, Tombstone.id, deletes)
+    if after is not None:
+        statement = statement.where(after)
+    tombstones = db.execute(statement.order_by(Tombstone.updated_at, Tombstone.id).limit(limit + 1)).all()
+    has_more = has_more or len(tombstones) > limit
+    tombstones = tombstones[:limit]
+    if tombstones:
+        deletes = (tombstones[-1].updated_at, tombstones[-1].id)
+
+    return {
+        "entity": entity,
+        "items": items,
+        "deleted": [{"id": row.entity_id, "deleted_at": row.updated_at} for row in tombstones],
+        "next_cursor": encode_cursor(updates, deletes),
+        "has_more": has_more,
+    }
+
+
+def purge_tombstones(db: Session) -> int:
+    """Remove exclusões mais antigas que ``TOMBSTONE_RETENTION_DAYS``."""
+    limit = datetime.utcnow() - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS)
+    result = db.execute(delete(Tombstone).where(Tombstone.updated_at < limit))
+    db.commit()
+    return result.rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manutenção dos feeds de alterações")
+    parser.add_argument("--purge", action="store_true", help="Remove exclusões fora da retenção")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.purge:
+        db = SessionLocal()
+        try:
+            logger.info(f"Exclusões removidas: {purge_tombstones(db)}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+GET condicional (``ETag`` / ``Last-Modified``).
+
+Os validadores saem do banco sem carregar as linhas: para um registro, o
+``id`` e o ``updated_at``; para uma lista, ``count``, ``max(updated_at)`` e
+``sum(id)`` da mesma página (mesmos filtros, ``skip`` e ``limit``) que o
+endpoint devolveria. A soma dos ids muda quando a página passa a ter outros
+registros mesmo sem nenhuma alteração mais recente (por exemplo, depois de
+uma exclusão). O ETag forte é um hash desses valores, do caminho e dos
+parâmetros da requisição e do escopo do usuário (empresa), então clientes
+de empresas diferentes nunca compartilham validadores.
+
+``If-None-Match`` tem precedência sobre ``If-Modified-Since``. Listas só
+respondem com ``ETag``: ``max(updated_at)`` não muda quando um registro é
+excluído, então não serve como ``Last-Modified``.
+
+Alterações em massa que não passam pelo ORM (``update()``/``delete()``)
+não atualizam ``updated_at`` e podem manter o ETag de um registro; as
+exclusões em massa mudam a contagem das listas normalmente.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Mapping, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+Validator = Tuple[str, Optional[datetime]]
+
+# Cabeçalhos repetidos na resposta 304
+_VALIDATOR_HEADERS = ("etag", "last-modified", "cache-control", "vary")
+
+
+def _etag(request: Request, *parts: Any) -> str:
+    key = "|".join([request.url.path, str(request.url.query)] + [str(part) for part in parts])
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def item_validator(request: Request, obj: Any) -> Validator:
+    """Validador de um registro já carregado (``id`` + ``updated_at``)."""
+    return _etag(request, obj.id, obj.updated_at), obj.updated_at
+
+
+def list_validator(
+    request: Request,
+    db: Session,
+    model: Any,
+    *criteria: Any,
+    skip: int = 0,
+    limit: int = 100,
+    order_by: Any = None,
+    scope: Any = None,
+) -> Validator:
+    """Validador da página ``skip``/``limit`` das linhas de ``model`` que atendem a ``criteria``."""
+    page = select(model.id, model.updated_at).where(*criteria)
+    if order_by is not None:
+        page = page.order_by(order_by)
+    page = page.offset(skip).limit(limit).subquery()
+    count, last_updated, id_sum = db.execute(
+        select(func.count(), func.max(page.c.updated_at), func.sum(page.c.id)).select_from(page)
+    ).one()
+    return _etag(request, count, last_updated, id_sum, scope), None
+
+
+def _matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    tags = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def parse_http_date(value: str) -> Optional[datetime]:
+    """Data HTTP como ``datetime`` UTC sem fuso (como ``updated_at``)."""
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def not_modified(headers: Mapping[str, str], etag: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """Se os cabeçalhos condicionais da requisição indicam que o cliente já tem esta representação."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and _matches(if_none_match, etag)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    since = parse_http_date(if_modified_since)
+    # Datas HTTP têm resolução de segundos
+    return since is not None and last_modified.replace(microsecond=0) <= since
+
+
+def evaluate(request: Request, response: Response, validator: Validator) -> Optional[Response]:
+    """
+    Define os cabeçalhos de validação na resposta e, se o cliente já tiver a
+    mesma representação, devolve a resposta 304 a ser retornada pelo endpoint.
+    """
+    etag, last_modified = validator
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(
+            last_modified.replace(microsecond=0, tzinfo=timezone.utc), usegmt=True
+        )
+    # Sempre revalidar; a resposta depende do usuário autenticado
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["Vary"] = "Authorization"
+
+    if not not_modified(request.headers, etag, last_modified):
+        return None
+    headers = {key: value for key, value in response.headers.items() if key in _VALIDATOR_HEADERS}
+    return Response(status_code=304, headers=headers)
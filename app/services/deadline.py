@@ -0,0 +1,249 @@
+"""
+Prazos das requisições propagados para o banco.
+
+Cada requisição recebe um prazo, contado a partir da admissão:
+``REQUEST_DEADLINE`` segundos, ou o valor do prefixo de rota mais longo em
+``REQUEST_DEADLINES`` (0 = sem prazo). A sessão de ``deps.get_db`` leva o
+tempo restante para o banco a cada transação: no PostgreSQL como
+``SET LOCAL statement_timeout``; no SQLite com um progress handler que
+interrompe a consulta quando o prazo vence.
+
+Vencido o prazo antes de a resposta começar, o cliente recebe 504 com
+corpo JSON e as consultas em andamento são canceladas (``cancel()`` do
+psycopg2, ``interrupt()`` do SQLite). O mesmo acontece, sem resposta,
+quando o cliente desconecta. Código Python que ainda estiver em uma thread
+só para na próxima consulta. Respostas em streaming não são interrompidas
+depois de começarem; as exportações usam sessões próprias, sem prazo.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, List, MutableMapping, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCOPE_KEY = "app.deadline"
+SESSION_KEY = "request_deadline"
+SQLITE_PROGRESS_STEPS = 1000  # Instruções da VM do SQLite entre verificações do prazo
+PG_QUERY_CANCELED = "57014"
+
+
+class DeadlineExceeded(Exception):
+    """Transação iniciada com o prazo da requisição já vencido (ou cancelado)."""
+
+
+class Deadline:
+    """Prazo de uma requisição; sub-requisições (``/batch``) herdam o do lote."""
+
+    def __init__(self, seconds: Optional[float], parent: Optional["Deadline"] = None):
+        self.at = time.monotonic() + seconds if seconds else None
+        if parent is not None:
+            if parent.at is not None and (self.at is None or parent.at < self.at):
+                self.at = parent.at
+            parent._children.append(self)
+        self._parent = parent
+        self._children: List["Deadline"] = []
+        self._cancelled = threading.Event()
+        self._connections: Dict[int, Any] = {}  # id da sessão -> conexão DBAPI em uso
+        self._lock = threading.Lock()
+
+    def remaining(self) -> Optional[float]:
+        return None if self.at is None else self.at - time.monotonic()
+
+    def expired(self) -> bool:
+        if self._cancelled.is_set() or (self._parent is not None and self._parent.expired()):
+            return True
+        return self.at is not None and time.monotonic() >= self.at
+
+    def register(self, session: Session, connection: Any) -> None:
+        with self._lock:
+            self._connections[id(session)] = connection
+
+    def unregister(self, session: Session) -> Any:
+        with self._lock:
+            return self._connections.pop(id(session), None)
+
+    def cancel(self) -> None:
+        """Marca o prazo como vencido e interrompe as consultas em andamento."""
+        self._cancelled.set()
+        with self._lock:
+            connections = list(self._connections.values())
+        for connection in connections:
+            # psycopg2: cancel(); sqlite3: interrupt(). Ambos podem ser chamados de outra thread
+            interrupt = getattr(connection, "cancel", None) or getattr(connection, "interrupt", None)
+            if interrupt is None:
+                continue
+            try:
+                interrupt()
+            except Exception as e:
+                logger.warning(f"Erro ao cancelar consulta: {e}")
+        for child in list(self._children):
+            child.cancel()
+
+
+def seconds_for(path: str) -> float:
+    """Prazo (segundos) da rota; 0 = sem prazo."""
+    route = path[len(settings.API_V1_STR):] if path.startswith(settings.API_V1_STR) else path
+    matches = [prefix for prefix in settings.REQUEST_DEADLINES if route.startswith(prefix)]
+    if not matches:
+        return settings.REQUEST_DEADLINE
+    return settings.REQUEST_DEADLINES[max(matches, key=len)]
+
+
+def attach(db: Session, scope: MutableMapping[str, Any]) -> None:
+    """Aplica o prazo da requisição às transações de ``db``."""
+    deadline = scope.get(SCOPE_KEY)
+    if deadline is not None:
+        db.info[SESSION_KEY] = deadline
+
+
+def is_timeout(exc: BaseException) -> bool:
+    """Erro causado por prazo vencido ou consulta cancelada."""
+    if isinstance(exc, DeadlineExceeded):
+        return True
+    if isinstance(exc, OperationalError):
+        orig = exc.orig
+        return getattr(orig, "pgcode", None) == PG_QUERY_CANCELED or str(orig) == "interrupted"
+    return False
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_deadline(session, transaction, connection):
+    deadline = session.info.get(SESSION_KEY)
+    if deadline is None:
+        return
+    if deadline.expired():
+        raise DeadlineExceeded()
+    remaining = deadline.remaining()
+    dbapi_connection = connection.connection.driver_connection
+    if connection.dialect.name == "postgresql":
+        if remaining is not None:
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}")
+    elif connection.dialect.name == "sqlite":
+        # Retorno diferente de zero interrompe a consulta ("interrupted")
+        dbapi_connection.set_progress_handler(lambda: int(deadline.expired()), SQLITE_PROGRESS_STEPS)
+    deadline.register(session, dbapi_connection)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_deadline(session, transaction):
+    deadline = session.info.get(SESSION_KEY)
+    if deadline is None or transaction.parent is not None:
+        return
+    dbapi_connection = deadline.unregister(session)
+    # A conexão volta para o pool: o handler não pode valer para a próxima requisição
+    if dbapi_connection is not None and hasattr(dbapi_connection, "set_progress_handler"):
+        dbapi_connection.set_progress_handler(None, 0)
+
+
+def _timeout_response() -> JSONResponse:
+    return JSONResponse({"detail": "Request deadline exceeded"}, status_code=504)
+
+
+def _has_body(scope: Dict[str, Any]) -> bool:
+    headers = Headers(scope=scope)
+    return headers.get("content-length", "0") != "0" or "transfer-encoding" in headers
+
+
+class DeadlineMiddleware:
+    """Responde 504 quando o prazo vence e cancela o trabalho quando o cliente desconecta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(seconds_for(scope["path"]), scope.get(SCOPE_KEY))
+        scope[SCOPE_KEY] = deadline
+        has_body = _has_body(scope)
+        started = False
+        empty_sent = has_body
+        finished = False  # 504 enviado ou cliente desconectado: o que o app enviar é descartado
+        body_read = asyncio.Event()
+        disconnected = asyncio.Event()
+        if not has_body:
+            body_read.set()
+
+        async def app_receive() -> Dict[str, Any]:
+            nonlocal empty_sent
+            if not body_read.is_set():
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                elif not message.get("more_body", False):
+                    body_read.set()
+                return message
+            if not empty_sent:
+                # Requisição sem corpo: o corpo vazio é entregue aqui, o receive real fica com o vigia
+                empty_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def app_send(message: Dict[str, Any]) -> None:
+            nonlocal started
+            if finished:
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        async def watch_disconnect() -> None:
+            # Só depois do corpo: até lá o receive real é do app
+            await body_read.wait()
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        task = asyncio.ensure_future(self.app(scope, app_receive, app_send))
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            while not task.done():
+                remaining = deadline.remaining()
+                timeout = None if started or remaining is None else max(0.0, remaining)
+                await asyncio.wait({task, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if task.done():
+                    break
+                if watcher.done():
+                    finished = True
+                    logger.info(f"Cliente desconectou; cancelando {scope['path']}")
+                    deadline.cancel()
+                    break
+                if not started and deadline.expired():
+                    finished = True
+                    logger.warning(f"Prazo vencido em {scope['path']}")
+                    deadline.cancel()
+                    await _timeout_response()(scope, receive, send)
+                    break
+
+            if task.done():
+                try:
+                    task.result()
+                except Exception as e:
+                    if started or not is_timeout(e) or not deadline.expired():
+                        raise
+                    logger.warning(f"Prazo vencido em {scope['path']}: {e}")
+                    await _timeout_response()(scope, receive, send)
+            else:
+                # O trabalho em threads termina na próxima consulta (já cancelada)
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        finally:
+            watcher.cancel()
+            if not task.done():
+                task.cancel()
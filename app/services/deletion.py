@@ -0,0 +1,250 @@
+"""
+Exclusão em massa de empresas e projetos.
+
+Em vez de carregar toda a árvore no ORM (``cascade="all, delete-orphan"``)
+e excluir linha a linha, os dependentes são excluídos com ``DELETE ...
+WHERE id IN (...)`` em lotes de ``DELETION_CHUNK_SIZE``, das folhas para a
+raiz, cada lote em uma transação curta. Executado como job
+(``deletion.project`` e ``deletion.company``), com progresso por etapa.
+
+Como os eventos do ORM não são disparados, a exclusão grava ela mesma as
+``Tombstone`` das entidades com feed de alterações (com a empresa dona de
+cada registro, que nem sempre é a excluída: contratos e leads cruzam
+empresas) e os eventos ``expense.deleted`` na outbox; os totais mensais e as
+estatísticas das despesas saem junto com o projeto e os arquivos enviados
+(comprovantes, documentos de contratos e miniaturas) são removidos depois
+de cada lote confirmado. Uma execução interrompida pode ser repetida: cada
+etapa continua de onde parou.
+"""
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.anomaly import ExpenseGroupStats, ExpenseReview
+from app.models.budget import BudgetAlert
+from app.models.client import Client, Lead
+from app.models.company import Company
+from app.models.contract import Contract, ContractDocument
+from app.models.expense import Expense
+from app.models.job import Job
+from app.models.outbox import OUTBOX_FLAG, EventType, add_expense_events
+from app.models.project import Project, ProjectTask, ProjectUpdate, TeamProject
+from app.models.property import Property, PropertyUpdate
+from app.models.reconciliation import BankTransaction
+from app.models.rollup import ExpenseRollup
+from app.models.team import Team, UserTeam
+from app.models.tombstone import Tombstone
+from app.models.user import User
+from app.services import cashflow, response_cache
+from app.services.changes import company_column, join_company
+from app.services.previews import remove_derived
+
+logger = logging.getLogger(__name__)
+
+# Entidades com feed de alterações: a exclusão grava as tombstones
+TOMBSTONE_MODELS = (Project, Property, Contract, Expense, Client, Lead)
+
+
+class DeletionBlocked(Exception):
+    """Há registros de outras empresas que dependem dos que seriam excluídos."""
+
+
+@dataclass
+class Step:
+    model: Any
+    where: Any
+    file_column: Any = None  # Coluna com o caminho de um arquivo enviado
+
+
+def _ids(model, where):
+    return select(model.id).where(where)
+
+
+def project_steps(project_ids) -> List[Step]:
+    """Etapas (das folhas para a raiz) para excluir os projetos selecionados por ``project_ids``."""
+    property_ids = _ids(Property, Property.project_id.in_(project_ids))
+    contract_ids = _ids(Contract, Contract.property_id.in_(property_ids))
+    return [
+        Step(ExpenseReview, ExpenseReview.project_id.in_(project_ids)),
+        Step(BudgetAlert, BudgetAlert.project_id.in_(project_ids)),
+        Step(ExpenseGroupStats, ExpenseGroupStats.project_id.in_(project_ids)),
+        Step(ExpenseRollup, ExpenseRollup.project_id.in_(project_ids)),
+        Step(Expense, Expense.project_id.in_(project_ids), Expense.receipt_path),
+        Step(ContractDocument, ContractDocument.contract_id.in_(contract_ids), ContractDocument.file_path),
+        Step(Contract, Contract.property_id.in_(property_ids)),
+        Step(Lead, Lead.property_id.in_(property_ids)),
+        Step(PropertyUpdate, PropertyUpdate.property_id.in_(property_ids)),
+        Step(Property, Property.project_id.in_(project_ids)),
+        Step(TeamProject, TeamProject.project_id.in_(project_ids)),
+        Step(ProjectTask, ProjectTask.project_id.in_(project_ids)),
+        Step(ProjectUpdate, ProjectUpdate.project_id.in_(project_ids)),
+        Step(Project, Project.id.in_(project_ids)),
+    ]
+
+
+def company_steps(company_id: int) -> List[Step]:
+    """Etapas para excluir uma empresa e tudo o que pertence a ela."""
+    project_ids = _ids(Project, Project.company_id == company_id)
+    client_ids = _ids(Client, Client.company_id == company_id)
+    team_ids = _ids(Team, Team.company_id == company_id)
+    contract_ids = _ids(Contract, Contract.client_id.in_(client_ids))
+    return [
+        Step(BankTransaction, BankTransaction.company_id == company_id),
+        *project_steps(project_ids),
+        # Contratos e leads de clientes da empresa em imóveis de outras empresas
+        Step(ContractDocument, ContractDocument.contract_id.in_(contract_ids), ContractDocument.file_path),
+        Step(Contract, Contract.client_id.in_(client_ids)),
+        Step(Lead, Lead.client_id.in_(client_ids)),
+        Step(Client, Client.company_id == company_id),
+        Step(UserTeam, UserTeam.team_id.in_(team_ids)),
+        Step(TeamProject, TeamProject.team_id.in_(team_ids)),
+        Step(Team, Team.company_id == company_id),
+        Step(Job, Job.company_id == company_id),
+        Step(UserTeam, UserTeam.user_id.in_(_ids(User, User.company_id == company_id))),
+        Step(User, User.company_id == company_id),
+        Step(Company, Company.id == company_id),
+    ]
+
+
+def check_company_deletion(db: Session, company_id: int) -> None:
+    """Recusa a exclusão se registros de outras empresas exigirem (NOT NULL) usuários da empresa."""
+    user_ids = _ids(User, User.company_id == company_id)
+    other_projects = _ids(Project, Project.company_id != company_id)
+    blockers = {
+        "projects": select(func.count(Project.id)).where(
+            Project.company_id != company_id, Project.manager_id.in_(user_ids)
+        ),
+        "teams": select(func.count(Team.id)).where(Team.company_id != company_id, Team.manager_id.in_(user_ids)),
+        "expenses": select(func.count(Expense.id)).where(
+            Expense.project_id.in_(other_projects), Expense.created_by_id.in_(user_ids)
+        ),
+        "project updates": select(func.count(ProjectUpdate.id)).where(
+            ProjectUpdate.project_id.in_(other_projects), ProjectUpdate.user_id.in_(user_ids)
+        ),
+        "property updates": select(func.count(PropertyUpdate.id)).where(
+            PropertyUpdate.property_id.in_(_ids(Property, Property.project_id.in_(other_projects))),
+            PropertyUpdate.user_id.in_(user_ids),
+        ),
+    }
+    found = [name for name, statement in blockers.items() if db.execute(statement).scalar()]
+    if found:
+        raise DeletionBlocked(f"Users of this company are referenced by other companies' {', '.join(found)}")
+
+
+def _detach_company_users(db: Session, company_id: int) -> None:
+    """Limpa as referências opcionais a usuários da empresa em registros de outras empresas."""
+    user_ids = _ids(User, User.company_id == company_id)
+    for column in (
+        ProjectTask.assignee_id,
+        Lead.assigned_user_id,
+        BudgetAlert.acknowledged_by_id,
+        ExpenseReview.reviewed_by_id,
+        BankTransaction.matched_by_id,
+        Job.created_by_id,
+    ):
+        db.execute(update(column.class_).where(column.in_(user_ids)).values({column.key: None}))
+
+
+def _detach_expenses(db: Session, expense_ids) -> None:
+    """Solta conciliações e apontamentos de duplicidade (de outros registros) para as despesas excluídas."""
+    db.execute(
+        update(BankTransaction)
+        .where(BankTransaction.expense_id.in_(expense_ids))
+        .values(expense_id=None, match_score=None, matched_at=None, matched_by_id=None)
+    )
+    db.execute(update(ExpenseReview).where(ExpenseReview.duplicate_of_id.in_(expense_ids)).values(duplicate_of_id=None))
+
+
+def _remove_files(paths: Sequence[Optional[str]]) -> None:
+    for path in paths:
+        if not path:
+            continue
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Erro ao remover o arquivo {path}: {e}")
+        remove_derived(path)
+
+
+def run_steps(
+    db: Session,
+    steps: List[Step],
+    *,
+    chunk_size: Optional[int] = None,
+    progress: Optional[Callable[[float, str], None]] = None,
+) -> Dict[str, int]:
+    """Executa as etapas em lotes. Retorna as linhas excluídas por tabela."""
+    chunk_size = chunk_size or settings.DELETION_CHUNK_SIZE
+    totals = [db.execute(select(func.count()).where(step.where).select_from(step.model)).scalar() for step in steps]
+    db.commit()
+    total = sum(totals) or 1
+    done = 0
+    deleted: Dict[str, int] = {}
+
+    for step, expected in zip(steps, totals):
+        table = step.model.__table__
+        if progress is not None:
+            progress(done / total, f"Excluindo {table.name}")
+        while True:
+            columns = [step.model.id] + ([step.file_column] if step.file_column is not None else [])
+            rows = db.execute(select(*columns).where(step.where).order_by(step.model.id).limit(chunk_size)).all()
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            if step.model is Expense:
+                _detach_expenses(db, ids)
+                add_expense_events(db.connection(), Expense.id.in_(ids), EventType.EXPENSE_DELETED)
+                db.info[OUTBOX_FLAG] = True
+            if step.model in TOMBSTONE_MODELS:
+                # Empresa dona de cada registro, pelo projeto ou cliente (ainda existentes: folhas primeiro)
+                owners = dict(db.execute(
+                    join_company(select(step.model.id, company_column(step.model)), step.model)
+                    .where(step.model.id.in_(ids))
+                ).all())
+                now = datetime.utcnow()
+                db.execute(
+                    Tombstone.__table__.insert(),
+                    [
+                        {"entity": table.name, "entity_id": id, "company_id": owners.get(id), "created_at": now, "updated_at": now}
+                        for id in ids
+                    ],
+                )
+            db.execute(table.delete().where(table.c.id.in_(ids)))
+            db.commit()
+            if step.file_column is not None:
+                _remove_files([row[1] for row in rows])
+            deleted[table.name] = deleted.get(table.name, 0) + len(ids)
+            done += len(ids)
+            if progress is not None:
+                progress(min(done / total, 1.0), f"Excluindo {table.name}")
+
+    cashflow.invalidate()
+    response_cache.invalidate(*deleted)
+    return deleted
+
+
+def delete_project(db: Session, project_id: int, **options: Any) -> Dict[str, int]:
+    """Exclui um projeto e seus imóveis, contratos, leads, despesas e arquivos."""
+    if db.get(Project, project_id) is None:
+        return {}
+    deleted = run_steps(db, project_steps([project_id]), **options)
+    logger.info(f"Projeto {project_id} excluído: {deleted}")
+    return deleted
+
+
+def delete_company(db: Session, company_id: int, **options: Any) -> Dict[str, int]:
+    """Exclui uma empresa com usuários, equipes, clientes, projetos e arquivos."""
+    if db.get(Company, company_id) is None:
+        return {}
+    check_company_deletion(db, company_id)
+    _detach_company_users(db, company_id)
+    deleted = run_steps(db, company_steps(company_id), **options)
+    logger.info(f"Empresa {company_id} excluída: {deleted}")
+    return deleted
@@ -0,0 +1,228 @@
+"""
+Barramento de eventos de domínio (outbox transacional).
+
+Os eventos (``app.models.outbox.EventType``) são gravados em ``OutboxEvent``
+pelos eventos do modelo, na mesma transação da alteração que os gerou: se a
+transação for desfeita, o evento também é. O dispatcher lê os pendentes em
+lotes (``OUTBOX_BATCH_SIZE``), em ordem de gravação, e entrega cada lote aos
+assinantes do processo registrados com ``subscribe``.
+
+A entrega é "pelo menos uma vez": se um assinante falhar, o lote volta a
+ser entregue (a todos) na próxima rodada, até ``OUTBOX_MAX_ATTEMPTS``
+tentativas; os assinantes devem tolerar eventos repetidos. No PostgreSQL
+os lotes são reservados com ``FOR UPDATE SKIP LOCKED``, então vários
+workers podem despachar ao mesmo tempo sem entregar o mesmo evento duas
+vezes.
+
+O dispatcher roda dentro da aplicação (``OUTBOX_DISPATCH_INTERVAL``); a
+limpeza dos eventos entregues é feita pela linha de comando::
+
+    python -m app.services.events --purge
+"""
+import argparse
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal  # Importado antes dos modelos (ordem de registro)
+from app.core.config import settings
+from app.models.outbox import OUTBOX_FLAG, EventType, OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[List[Dict[str, Any]]], None]
+
+# Tipo do evento (ou "*") -> assinantes
+_subscribers: Dict[str, List[Handler]] = {}
+
+# Eventos entregues neste processo, por tipo
+event_counts: Counter = Counter()
+_counts_lock = threading.Lock()
+
+
+def subscribe(*event_types: EventType) -> Callable[[Handler], Handler]:
+    """
+    Registra um assinante, chamado com a lista de eventos (dicionários) de
+    cada lote. Sem tipos, recebe todos os eventos.
+    """
+
+    def register(handler: Handler) -> Handler:
+        for event_type in event_types or ("*",):
+            key = event_type.value if isinstance(event_type, EventType) else event_type
+            _subscribers.setdefault(key, []).append(handler)
+        return handler
+
+    return register
+
+
+@subscribe()
+def _count(events: List[Dict[str, Any]]) -> None:
+    with _counts_lock:
+        event_counts.update(item["type"] for item in events)
+
+
+def _deliver(events: List[Dict[str, Any]]) -> bool:
+    """Entrega o lote a cada assinante com os eventos dos tipos que ele assina. Retorna se todos tiveram sucesso."""
+    batches: Dict[Handler, List[Dict[str, Any]]] = {}
+    for item in events:
+        for key in (item["type"], "*"):
+            for handler in _subscribers.get(key, []):
+                batches.setdefault(handler, []).append(item)
+
+    ok = True
+    for handler, batch in batches.items():
+        try:
+            handler(batch)
+        except Exception as e:
+            ok = False
+            logger.error(f"Erro no assinante {handler.__module__}.{handler.__qualname__}: {e}")
+    return ok
+
+
+def dispatch_pending(db: Session, *, batch_size: Optional[int] = None) -> int:
+    """Entrega um lote de eventos pendentes. Retorna quantos eventos foram entregues."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    statement = (
+        select(
+            OutboxEvent.id,
+            OutboxEvent.type,
+            OutboxEvent.entity,
+            OutboxEvent.entity_id,
+            OutboxEvent.company_id,
+            OutboxEvent.payload,
+            OutboxEvent.created_at,
+            OutboxEvent.attempts,
+        )
+        .where(OutboxEvent.dispatched_at.is_(None))
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        statement = statement.with_for_update(skip_locked=True)
+    rows = db.execute(statement).all()
+    if not rows:
+        db.rollback()
+        return 0
+
+    events = [dict(row._mapping) for row in rows]
+    ids = [item["id"] for item in events]
+    if _deliver(events):
+        db.execute(update(OutboxEvent).where(OutboxEvent.id.in_(ids)).values(dispatched_at=datetime.utcnow()))
+        db.commit()
+        return len(ids)
+
+    # Tenta de novo na próxima rodada; depois do limite, desiste
+    db.execute(update(OutboxEvent).where(OutboxEvent.id.in_(ids)).values(attempts=OutboxEvent.attempts + 1))
+    given_up = [item["id"] for item in events if item["attempts"] + 1 >= settings.OUTBOX_MAX_ATTEMPTS]
+    if given_up:
+        logger.error(f"Eventos descartados após {settings.OUTBOX_MAX_ATTEMPTS} tentativas: {given_up}")
+        db.execute(
+            update(OutboxEvent).where(OutboxEvent.id.in_(given_up)).values(dispatched_at=datetime.utcnow())
+        )
+    db.commit()
+    return 0
+
+
+def purge_dispatched(db: Session) -> int:
+    """Remove eventos entregues há mais de ``OUTBOX_RETENTION_DAYS`` dias."""
+    limit = datetime.utcnow() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    result = db.execute(
+        delete(OutboxEvent).where(OutboxEvent.dispatched_at.is_not(None), OutboxEvent.dispatched_at < limit)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def outbox_status(db: Session) -> Dict[str, Any]:
+    pending, oldest = db.execute(
+        select(func.count(OutboxEvent.id), func.min(OutboxEvent.created_at)).where(
+            OutboxEvent.dispatched_at.is_(None)
+        )
+    ).one()
+    with _counts_lock:
+        counts = dict(event_counts)
+    return {
+        "pending": pending,
+        "oldest_pending_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else None,
+        "dispatched": counts,
+        "dispatcher_running": event_dispatcher.running,
+    }
+
+
+class EventDispatcher:
+    """Despacha os eventos pendentes em uma thread de fundo (acordada a cada commit com eventos)."""
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="event-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            db = SessionLocal()
+            try:
+                # Esvazia a fila antes de dormir
+                while not self._stop.is_set() and dispatch_pending(db) >= settings.OUTBOX_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Erro ao despachar eventos: {e}")
+            finally:
+                db.close()
+            self._wake.wait(self.interval)
+
+
+event_dispatcher = EventDispatcher(settings.OUTBOX_DISPATCH_INTERVAL)
+
+
+@event.listens_for(Session, "after_commit")
+def _session_committed(session: Session) -> None:
+    if session.info.pop(OUTBOX_FLAG, False):
+        event_dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _session_rolled_back(session: Session) -> None:
+    session.info.pop(OUTBOX_FLAG, None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manutenção da outbox de eventos de domínio")
+    parser.add_argument("--purge", action="store_true", help="Remove eventos entregues fora da retenção")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.purge:
+        db = SessionLocal()
+        try:
+            logger.info(f"Eventos removidos: {purge_dispatched(db)}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
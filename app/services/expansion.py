@@ -0,0 +1,136 @@
+"""
+Respostas aninhadas (``expand``) e esparsas (``fields``).
+
+``expand`` lista relacionamentos a incluir na resposta; cada um é
+carregado com ``selectinload`` (uma consulta por relacionamento, qualquer
+que seja o número de registros). ``fields`` lista as colunas desejadas; os
+campos de um relacionamento expandido usam o prefixo do relacionamento
+(``tasks.title``). Só as colunas pedidas são lidas do banco
+(``load_only``), além da chave primária e das chaves estrangeiras
+necessárias para ligar os relacionamentos.
+
+Os campos disponíveis são os do schema de resposta que são colunas do
+modelo, então nada além do que o endpoint já expõe pode ser pedido.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from pydantic import BaseModel
+from sqlalchemy.orm import load_only, selectinload
+
+
+class InvalidExpansion(Exception):
+    """Relacionamento ou campo desconhecido em ``expand``/``fields``."""
+
+
+@dataclass(frozen=True)
+class Relation:
+    attribute: Any  # Relacionamento do modelo (ex.: Project.tasks)
+    schema: Type[BaseModel]  # Schema de resposta do registro relacionado
+
+
+@dataclass
+class Plan:
+    columns: List[str]  # Colunas na resposta
+    load: List[str]  # Colunas lidas (inclui chaves para os relacionamentos)
+    relations: Dict[str, Relation] = field(default_factory=dict)
+    relation_columns: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def parse_names(value: Optional[str]) -> List[str]:
+    names: List[str] = []
+    for name in (value or "").split(","):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def available_columns(model: Any, schema: Type[BaseModel]) -> List[str]:
+    return [name for name in schema.model_fields if name in model.__table__.columns]
+
+
+def _select(available: List[str], requested: Optional[List[str]], prefix: str = "") -> List[str]:
+    if requested is None:
+        return available
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise InvalidExpansion(f"Unknown field(s): {', '.join(prefix + name for name in unknown)}")
+    return ["id"] + [name for name in requested if name != "id"]
+
+
+def plan(
+    model: Any,
+    schema: Type[BaseModel],
+    relations: Dict[str, Relation],
+    *,
+    expand: Optional[str] = None,
+    fields: Optional[str] = None,
+    required: Sequence[str] = (),
+) -> Plan:
+    """Valida ``expand``/``fields`` e define as colunas e relacionamentos a carregar."""
+    expanded = parse_names(expand)
+    unknown = [name for name in expanded if name not in relations]
+    if unknown:
+        raise InvalidExpansion(
+            f"Unknown expand: {', '.join(unknown)} (available: {', '.join(relations)})"
+        )
+
+    requested: Optional[List[str]] = None
+    nested: Dict[str, List[str]] = {}
+    if fields is not None:
+        requested = []
+        for name in parse_names(fields):
+            relation, dot, column = name.partition(".")
+            if not dot:
+                requested.append(name)
+            elif relation not in expanded:
+                raise InvalidExpansion(f"Field {name} requires expand={relation}")
+            else:
+                nested.setdefault(relation, []).append(column)
+
+    columns = _select(available_columns(model, schema), requested)
+    result = Plan(columns=columns, load=list(columns))
+    for name in expanded:
+        relation = relations[name]
+        target = relation.attribute.property.mapper.class_
+        # Campos do relacionamento: os pedidos ou, sem nenhum, todos
+        result.relation_columns[name] = _select(
+            available_columns(target, relation.schema), nested.get(name), prefix=f"{name}."
+        )
+        result.relations[name] = relation
+    # Chaves para ligar os relacionamentos (many-to-one) e colunas exigidas pelo endpoint
+    for relation in result.relations.values():
+        for column in relation.attribute.property.local_columns:
+            if column.key not in result.load and column.key in model.__table__.columns:
+                result.load.append(column.key)
+    for name in required:
+        if name not in result.load:
+            result.load.append(name)
+    return result
+
+
+def options(model: Any, plan: Plan) -> List[Any]:
+    """Opções de carga da consulta principal para o ``plan``."""
+    loaders = [load_only(*(getattr(model, name) for name in plan.load))]
+    for name, relation in plan.relations.items():
+        target = relation.attribute.property.mapper.class_
+        columns = [getattr(target, column) for column in plan.relation_columns[name]]
+        loaders.append(selectinload(relation.attribute).load_only(*columns))
+    return loaders
+
+
+def _row(obj: Any, columns: List[str]) -> Dict[str, Any]:
+    return {name: getattr(obj, name) for name in columns}
+
+
+def serialize(obj: Any, plan: Plan) -> Dict[str, Any]:
+    data = _row(obj, plan.columns)
+    for name, relation in plan.relations.items():
+        value = getattr(obj, relation.attribute.key)
+        columns = plan.relation_columns[name]
+        if relation.attribute.property.uselist:
+            data[name] = [_row(item, columns) for item in value]
+        else:
+            data[name] = None if value is None else _row(value, columns)
+    return data
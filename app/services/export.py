@@ -0,0 +1,110 @@
+"""
+Exportação em streaming (CSV / NDJSON) de tabelas grandes.
+
+As linhas são lidas com cursor no servidor (``yield_per``) e convertidas
+em blocos à medida que chegam, de modo que o uso de memória não depende
+do tamanho da exportação.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Iterable, Iterator, List
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+
+from app.db.session import SessionLocal
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(statement: Select, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Any]]:
+    """
+    Executa ``statement`` com cursor no servidor e devolve as linhas em lotes.
+
+    Usa uma sessão própria: a sessão da requisição já foi encerrada quando
+    o corpo de um ``StreamingResponse`` começa a ser enviado.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def encode_csv(columns: List[str], batches: Iterable[List[Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        for row in batch:
+            writer.writerow([_plain(value) for value in row])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # Exportação vazia: ainda assim envia o cabeçalho
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(columns: List[str], batches: Iterable[List[Any]]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [
+            json.dumps({column: _plain(value) for column, value in zip(columns, row)}, ensure_ascii=False)
+            for row in batch
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> formato gzip
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(
+    statement: Select,
+    *,
+    filename: str,
+    fmt: ExportFormat = ExportFormat.CSV,
+    compress: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> StreamingResponse:
+    """Monta o ``StreamingResponse`` de uma exportação."""
+    columns = [column.name for column in statement.selected_columns]
+    encoder = encode_csv if fmt == ExportFormat.CSV else encode_ndjson
+    body = encoder(columns, iter_rows(statement, batch_size))
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt.value}"'}
+    if compress:
+        body = gzip_chunks(body)
+        # Com Content-Encoding definido o GZipMiddleware não comprime de novo
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt], headers=headers)
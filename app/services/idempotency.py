@@ -0,0 +1,270 @@
+"""
+Chaves de idempotência para os POST de criação (``Idempotency-Key``).
+
+Quando o cliente envia o cabeçalho ``Idempotency-Key`` em uma rota de
+``IDEMPOTENT_ROUTES``, a primeira requisição com a chave é executada e a
+resposta (status, tipo e corpo) fica guardada em ``IdempotencyKey`` por
+``IDEMPOTENCY_TTL_HOURS``. Repetições com a mesma chave recebem a resposta
+guardada, com ``Idempotent-Replayed: true``, sem executar o endpoint de
+novo. As chaves são por usuário.
+
+A chave fica ligada à impressão digital da requisição (método, caminho,
+query e corpo; em multipart, sem o boundary, que muda a cada envio). A
+mesma chave com outra requisição recebe 422. Enquanto a primeira ainda
+está em andamento, as repetições recebem 409 com ``Retry-After``. Respostas
+5xx (e 408, 409, 429) não são guardadas: a chave é liberada para uma nova
+tentativa. Sem resposta (exceção, cliente desconectado) ou com 504 (prazo
+vencido), o endpoint pode ter gravado antes de parar: a chave fica pendente
+até ``PENDING_TIMEOUT``, para que a repetição não crie um registro em dobro.
+
+A tabela é compartilhada entre os workers. Limpeza das chaves vencidas::
+
+    python -m app.services.idempotency --purge
+"""
+import argparse
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+
+from app.db.session import SessionLocal  # Importado antes dos modelos (ordem de registro)
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+from app.services import principal
+
+logger = logging.getLogger(__name__)
+
+HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+# Requisição original sem resposta há mais que isso: o processo caiu, a chave é liberada
+PENDING_TIMEOUT = 300
+# Respostas temporárias: a próxima tentativa executa o endpoint
+TRANSIENT_STATUSES = (408, 409, 429)
+# Respostas que não dizem se o endpoint chegou a gravar (prazo vencido)
+UNCERTAIN_STATUSES = (504,)
+
+# Rotas (método, caminho sem API_V1_STR e sem a barra final) que aceitam a chave
+IDEMPOTENT_ROUTES = {
+    ("POST", "/expenses"),
+    ("POST", "/contracts"),
+    ("POST", "/leads"),
+}
+
+
+class _Reused(Exception):
+    """Chave usada com outra requisição."""
+
+
+class _Pending(Exception):
+    """Requisição original ainda em andamento."""
+
+
+def _route(scope: Dict[str, Any]) -> Optional[tuple]:
+    path = scope["path"]
+    if not path.startswith(settings.API_V1_STR):
+        return None
+    route = (scope["method"], path[len(settings.API_V1_STR):].rstrip("/"))
+    return route if route in IDEMPOTENT_ROUTES else None
+
+
+def fingerprint(scope: Dict[str, Any], body: bytes) -> str:
+    content_type = Headers(scope=scope).get("content-type", "")
+    boundary = content_type.partition("boundary=")[2].strip('"')
+    if boundary:
+        body = body.replace(boundary.encode("latin-1"), b"")
+        content_type = content_type.partition(";")[0]
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), content_type.encode()):
+        digest.update(part + b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def begin(user_id: int, key: str, digest: str) -> Optional[IdempotencyKey]:
+    """
+    Reserva a chave para a requisição. Devolve a resposta guardada, se houver
+    (None = executar o endpoint); levanta ``_Reused`` ou ``_Pending``.
+    """
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        for _ in range(2):
+            record = db.execute(
+                select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            ).scalar_one_or_none()
+            abandoned = (
+                record is not None
+                and record.status_code is None
+                and record.created_at < now - timedelta(seconds=PENDING_TIMEOUT)
+            )
+            if record is not None and (record.expires_at < now or abandoned):
+                db.delete(record)
+                db.commit()
+                record = None
+            if record is not None:
+                if record.fingerprint != digest:
+                    raise _Reused()
+                if record.status_code is None:
+                    raise _Pending()
+                db.expunge(record)
+                return record
+            db.add(IdempotencyKey(
+                user_id=user_id,
+                key=key,
+                fingerprint=digest,
+                expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+            ))
+            try:
+                db.commit()
+                return None
+            except IntegrityError:
+                # Outra requisição com a mesma chave reservou antes: lê de novo
+                db.rollback()
+        raise _Pending()
+    finally:
+        db.close()
+
+
+def finish(user_id: int, key: str, status_code: Optional[int], content_type: Optional[str], body: bytes) -> None:
+    """Guarda a resposta da chave ou, sem resposta guardável, libera a chave."""
+    if status_code is None or status_code in UNCERTAIN_STATUSES:
+        # Não se sabe se o endpoint gravou: a chave segue pendente até PENDING_TIMEOUT
+        return
+    db = SessionLocal()
+    try:
+        record = db.execute(
+            select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        ).scalar_one_or_none()
+        if record is None:
+            return
+        if status_code >= 500 or status_code in TRANSIENT_STATUSES:
+            db.delete(record)
+        else:
+            record.status_code = status_code
+            record.content_type = content_type
+            record.body = body
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro ao guardar a resposta da chave de idempotência: {e}")
+    finally:
+        db.close()
+
+
+def purge_keys(db: Session) -> int:
+    """Remove as chaves vencidas."""
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+    db.commit()
+    return result.rowcount
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    headers = {"Idempotent-Replayed": "true"}
+    return Response(record.body or b"", status_code=record.status_code, media_type=record.content_type, headers=headers)
+
+
+class IdempotencyMiddleware:
+    """Reenvia a resposta guardada das requisições repetidas com ``Idempotency-Key``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or _route(scope) is None:
+            await self.app(scope, receive, send)
+            return
+        key = Headers(scope=scope).get(HEADER)
+        caller = await principal.from_scope(scope) if key else None
+        if caller is None:
+            # Sem chave ou sem usuário (o endpoint responde 401/403)
+            await self.app(scope, receive, send)
+            return
+        if not key.strip() or len(key) > MAX_KEY_LENGTH:
+            await JSONResponse({"detail": "Invalid Idempotency-Key"}, status_code=400)(scope, receive, send)
+            return
+
+        chunks: List[bytes] = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            more_body = message.get("more_body", False)
+            if size > settings.IDEMPOTENCY_MAX_BODY_BYTES:
+                await JSONResponse(
+                    {"detail": "Request body too large for Idempotency-Key"}, status_code=413
+                )(scope, receive, send)
+                return
+        body = b"".join(chunks)
+
+        try:
+            record = await run_in_threadpool(begin, caller.user_id, key, fingerprint(scope, body))
+        except _Reused:
+            await JSONResponse(
+                {"detail": "Idempotency-Key was already used with a different request"}, status_code=422
+            )(scope, receive, send)
+            return
+        except _Pending:
+            await JSONResponse(
+                {"detail": "A request with this Idempotency-Key is still in progress"},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )(scope, receive, send)
+            return
+        if record is not None:
+            await _replay(record)(scope, receive, send)
+            return
+
+        body_sent = False
+
+        async def replay_receive() -> Dict[str, Any]:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status_code: Optional[int] = None
+        content_type: Optional[str] = None
+        response: List[bytes] = []
+
+        async def capture_send(message: Dict[str, Any]) -> None:
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message.get("headers", [])).get("content-type")
+            elif message["type"] == "http.response.body":
+                response.append(message.get("body", b""))
+            await send(message)
+
+        # Exceção ou cancelamento (prazo, desconexão): a chave fica pendente
+        await self.app(scope, replay_receive, capture_send)
+        await run_in_threadpool(finish, caller.user_id, key, status_code, content_type, b"".join(response))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manutenção das chaves de idempotência")
+    parser.add_argument("--purge", action="store_true", help="Remove as chaves vencidas")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.purge:
+        db = SessionLocal()
+        try:
+            logger.info(f"Chaves removidas: {purge_keys(db)}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
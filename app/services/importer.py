@@ -0,0 +1,585 @@
+"""
+Importação em massa de planilhas (CSV/XLSX).
+
+As linhas são lidas em streaming, validadas com os schemas de criação
+(``ExpenseCreate``, ``ClientCreate``, ``PropertyCreate``, ``LeadCreate``) e
+gravadas em lotes. Chaves estrangeiras são resolvidas com mapas carregados
+uma única vez por importação (por id, nome do projeto/imóvel, documento do
+cliente ou e-mail do usuário), sem consultas por linha. No PostgreSQL os
+lotes são gravados com ``COPY``; nos demais bancos com ``INSERT`` em lote.
+
+Uso pela linha de comando::
+
+    python -m app.services.importer expenses despesas.xlsx --company-id 1 --user-id 1
+"""
+import argparse
+import csv
+import enum
+import io
+import json
+import logging
+import os
+from datetime import date, datetime
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.schema import Table
+
+from app.db.session import SessionLocal  # Importado antes dos modelos (ordem de registro)
+from app import models, schemas
+from app.models.anomaly import score_new_expenses
+from app.models.budget import evaluate_budgets
+from app.models.outbox import OUTBOX_FLAG, add_expense_events
+from app.models.rollup import add_expense_rows
+from app.services import response_cache
+from app.services.cashflow import mark_changed
+from app.schemas.imports import ImportEntityEnum, ImportReport, ImportRowError
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+
+CSV_EXTENSIONS = (".csv", ".txt")
+XLSX_EXTENSIONS = (".xlsx", ".xlsm")
+
+
+class ImportFileError(ValueError):
+    """Arquivo ilegível ou em formato não suportado."""
+
+
+# ---------------------------------------------------------------------------
+# Leitura das planilhas
+# ---------------------------------------------------------------------------
+
+def _normalize_header(value: Any) -> str:
+    return str(value or "").strip().lower().replace(" ", "_")
+
+
+def iter_csv_rows(stream: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    sample = text.read(8192)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    header = [_normalize_header(value) for value in next(reader, [])]
+    for values in reader:
+        yield dict(zip(header, values))
+
+
+def iter_xlsx_rows(stream: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ImportFileError("XLSX import requires openpyxl") from e
+
+    # read_only mantém apenas a linha corrente em memória
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(value) for value in next(rows, ())]
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(stream: IO[bytes], filename: str) -> Iterator[Dict[str, Any]]:
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in CSV_EXTENSIONS:
+        return iter_csv_rows(stream)
+    if extension in XLSX_EXTENSIONS:
+        return iter_xlsx_rows(stream)
+    raise ImportFileError(f"Unsupported file type: {extension or filename}")
+
+
+# ---------------------------------------------------------------------------
+# Mapas de chaves estrangeiras
+# ---------------------------------------------------------------------------
+
+def _key(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+class LookupMaps:
+    """Ids e chaves naturais da empresa, carregados uma vez por importação."""
+
+    def __init__(self, db: Session, *, company_id: int):
+        self.db = db
+        self.company_id = company_id
+        self._loaded: Set[str] = set()
+
+    def load(self, *names: str) -> "LookupMaps":
+        for name in names:
+            if name not in self._loaded:
+                getattr(self, f"_load_{name}")()
+                self._loaded.add(name)
+        return self
+
+    def _load_projects(self) -> None:
+        rows = self.db.execute(
+            select(models.Project.id, models.Project.name).where(
+                models.Project.company_id == self.company_id
+            )
+        ).all()
+        self.project_ids = {id for id, _ in rows}
+        self.project_by_name = {_key(name): id for id, name in rows}
+
+    def _load_properties(self) -> None:
+        rows = self.db.execute(
+            select(models.Property.id, models.Property.name, models.Property.project_id)
+            .join(models.Project, models.Project.id == models.Property.project_id)
+            .where(models.Project.company_id == self.company_id)
+        ).all()
+        self.property_project = {id: project_id for id, _, project_id in rows}
+        self.property_by_name = {(project_id, _key(name)): id for id, name, project_id in rows}
+
+    def _load_clients(self) -> None:
+        rows = self.db.execute(
+            select(models.Client.id, models.Client.document).where(
+                models.Client.company_id == self.company_id
+            )
+        ).all()
+        self.client_ids = {id for id, _ in rows}
+        self.client_by_document = {_key(document): id for id, document in rows}
+
+    def _load_users(self) -> None:
+        rows = self.db.execute(
+            select(models.User.id, models.User.email).where(
+                models.User.company_id == self.company_id
+            )
+        ).all()
+        self.user_ids = {id for id, _ in rows}
+        self.user_by_email = {_key(email): id for id, email in rows}
+
+    def resolve_project(self, row: Dict[str, Any], errors: List[str]) -> Optional[int]:
+        project_id = row.get("project_id")
+        if project_id is not None:
+            try:
+                project_id = int(project_id)
+            except (TypeError, ValueError):
+                errors.append(f"project_id: invalid value {project_id!r}")
+                return None
+            if project_id not in self.project_ids:
+                errors.append(f"project_id: project {project_id} not found")
+                return None
+            return project_id
+        name = row.pop("project", None)
+        if name is None:
+            errors.append("project_id: project_id or project name is required")
+            return None
+        project_id = self.project_by_name.get(_key(name))
+        if project_id is None:
+            errors.append(f"project_id: project {name!r} not found")
+        return project_id
+
+    def resolve_property(
+        self, row: Dict[str, Any], project_id: Optional[int], errors: List[str], required: bool
+    ) -> Optional[int]:
+        property_id = row.get("property_id")
+        if property_id is not None:
+            try:
+                property_id = int(property_id)
+            except (TypeError, ValueError):
+                errors.append(f"property_id: invalid value {property_id!r}")
+                return None
+            owner = self.property_project.get(property_id)
+            if owner is None:
+                errors.append(f"property_id: property {property_id} not found")
+                return None
+            if project_id is not None and owner != project_id:
+                errors.append("property_id: property does not belong to the specified project")
+                return None
+            return property_id
+        name = row.pop("property", None)
+        if name is None:
+            if required:
+                errors.append("property_id: property_id or project + property name is required")
+            return None
+        property_id = self.property_by_name.get((project_id, _key(name)))
+        if property_id is None:
+            errors.append(f"property_id: property {name!r} not found in project")
+        return property_id
+
+    def resolve_client(self, row: Dict[str, Any], errors: List[str]) -> Optional[int]:
+        client_id = row.get("client_id")
+        if client_id is not None:
+            try:
+                client_id = int(client_id)
+            except (TypeError, ValueError):
+                errors.append(f"client_id: invalid value {client_id!r}")
+                return None
+            if client_id not in self.client_ids:
+                errors.append(f"client_id: client {client_id} not found")
+                return None
+            return client_id
+        document = row.pop("client_document", None)
+        if document is None:
+            errors.append("client_id: client_id or client_document is required")
+            return None
+        client_id = self.client_by_document.get(_key(document))
+        if client_id is None:
+            errors.append(f"client_id: client {document!r} not found")
+        return client_id
+
+    def resolve_user(self, row: Dict[str, Any], errors: List[str], default: int) -> Optional[int]:
+        user_id = row.get("assigned_user_id")
+        if user_id is not None:
+            try:
+                user_id = int(user_id)
+            except (TypeError, ValueError):
+                errors.append(f"assigned_user_id: invalid value {user_id!r}")
+                return None
+            if user_id not in self.user_ids:
+                errors.append(f"assigned_user_id: user {user_id} not found")
+                return None
+            return user_id
+        email = row.pop("assigned_user_email", None)
+        if email is None:
+            return default
+        user_id = self.user_by_email.get(_key(email))
+        if user_id is None:
+            errors.append(f"assigned_user_id: user {email!r} not found")
+        return user_id
+
+
+# ---------------------------------------------------------------------------
+# Regras por entidade
+# ---------------------------------------------------------------------------
+
+def _resolve_expense(row: Dict[str, Any], maps: LookupMaps, user_id: int, errors: List[str]) -> None:
+    project_id = maps.resolve_project(row, errors)
+    row["project_id"] = project_id
+    row["property_id"] = maps.resolve_property(row, project_id, errors, required=False)
+    row["created_by_id"] = user_id
+    # Comprovantes só entram pelo upload da despesa
+    row["receipt_path"] = None
+
+
+def _resolve_client(row: Dict[str, Any], maps: LookupMaps, user_id: int, errors: List[str]) -> None:
+    row["company_id"] = maps.company_id
+    document = row.get("document")
+    if document is not None and _key(document) in maps.client_by_document:
+        errors.append(f"document: client {document!r} already exists")
+
+
+def _resolve_property(row: Dict[str, Any], maps: LookupMaps, user_id: int, errors: List[str]) -> None:
+    project_id = maps.resolve_project(row, errors)
+    row["project_id"] = project_id
+    name = row.get("name")
+    if project_id is not None and name is not None and (project_id, _key(name)) in maps.property_by_name:
+        errors.append(f"name: property {name!r} already exists in the project")
+
+
+def _resolve_lead(row: Dict[str, Any], maps: LookupMaps, user_id: int, errors: List[str]) -> None:
+    project_id = None
+    if row.get("property_id") is None and row.get("property") is not None:
+        project_id = maps.resolve_project(row, errors)
+    row.pop("project", None)
+    row.pop("project_id", None)
+    row["property_id"] = maps.resolve_property(row, project_id, errors, required=True)
+    row["client_id"] = maps.resolve_client(row, errors)
+    row["assigned_user_id"] = maps.resolve_user(row, errors, default=user_id)
+    today = date.today()
+    row.setdefault("first_contact_date", today)
+    row.setdefault("last_contact_date", today)
+    if row["first_contact_date"] is None:
+        row["first_contact_date"] = today
+    if row["last_contact_date"] is None:
+        row["last_contact_date"] = today
+
+
+def _register_client(data: Dict[str, Any], maps: LookupMaps) -> None:
+    # Evita duplicatas dentro do próprio arquivo
+    maps.client_by_document[_key(data["document"])] = 0
+
+
+def _register_property(data: Dict[str, Any], maps: LookupMaps) -> None:
+    maps.property_by_name[(data["project_id"], _key(data["name"]))] = 0
+
+
+class ImportSpec:
+    def __init__(
+        self,
+        model: Type[models.BaseModel],
+        schema: Type[BaseModel],
+        lookups: Tuple[str, ...],
+        resolve: Callable[[Dict[str, Any], LookupMaps, int, List[str]], None],
+        register: Optional[Callable[[Dict[str, Any], LookupMaps], None]] = None,
+    ):
+        self.model = model
+        self.schema = schema
+        self.lookups = lookups
+        self.resolve = resolve
+        self.register = register
+        self.string_fields = {
+            name for name, field in schema.model_fields.items()
+            if field.annotation is str or field.annotation == Optional[str]
+        }
+
+
+IMPORT_SPECS: Dict[ImportEntityEnum, ImportSpec] = {
+    ImportEntityEnum.EXPENSES: ImportSpec(
+        models.Expense, schemas.ExpenseCreate, ("projects", "properties"), _resolve_expense
+    ),
+    ImportEntityEnum.CLIENTS: ImportSpec(
+        models.Client, schemas.ClientCreate, ("clients",), _resolve_client, _register_client
+    ),
+    ImportEntityEnum.PROPERTIES: ImportSpec(
+        models.Property, schemas.PropertyCreate, ("projects", "properties"), _resolve_property,
+        _register_property,
+    ),
+    ImportEntityEnum.LEADS: ImportSpec(
+        models.Lead, schemas.LeadCreate, ("projects", "properties", "clients", "users"), _resolve_lead
+    ),
+}
+
+
+# ---------------------------------------------------------------------------
+# Gravação em lote
+# ---------------------------------------------------------------------------
+
+def _clean_cell(value: Any, as_string: bool) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, datetime):
+        return value.date()
+    if as_string and isinstance(value, (int, float)) and not isinstance(value, bool):
+        # Células numéricas em campos texto (documento, unidade...)
+        return str(int(value)) if float(value).is_integer() else str(value)
+    return value
+
+
+def _apply_defaults(table: Table, data: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Completa a linha com os defaults do modelo, mantendo as mesmas chaves em todo o lote."""
+    row = {}
+    for column in table.columns:
+        if column.primary_key:
+            continue
+        if column.name in ("created_at", "updated_at"):
+            row[column.name] = now
+            continue
+        value = data.get(column.name)
+        if value is None and column.default is not None and column.default.is_scalar:
+            value = column.default.arg
+        row[column.name] = value
+    return row
+
+
+def _copy_value(value: Any) -> Any:
+    if value is None:
+        return "\\N"
+    if isinstance(value, enum.Enum):
+        # Enums do SQLAlchemy são persistidos pelo nome do membro
+        return value.name
+    return value
+
+
+def _copy_rows(db: Session, table: Table, rows: List[Dict[str, Any]]) -> bool:
+    cursor = db.connection().connection.cursor()
+    try:
+        if not hasattr(cursor, "copy_expert"):
+            return False
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_copy_value(row[column]) for column in columns])
+        buffer.seek(0)
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        cursor.copy_expert(
+            f"COPY \"{table.name}\" ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+        return True
+    finally:
+        cursor.close()
+
+
+def insert_rows(db: Session, table: Table, rows: List[Dict[str, Any]]) -> None:
+    """Grava um lote de linhas já validadas (COPY no PostgreSQL, INSERT em lote nos demais)."""
+    if not rows:
+        return
+    is_expense = table is models.Expense.__table__
+    if is_expense:
+        last_id = db.execute(select(func.max(table.c.id))).scalar() or 0
+    if db.get_bind().dialect.name != "postgresql" or not _copy_rows(db, table, rows):
+        db.execute(insert(table), rows)
+    response_cache.mark_changed(db, table.name)
+    if is_expense:
+        # Gravação fora do ORM: totais mensais, alertas de orçamento, anomalias, eventos e cache do fluxo de caixa são atualizados aqui
+        connection = db.connection()
+        add_expense_rows(connection, rows)
+        evaluate_budgets(connection, {(row["project_id"], row.get("property_id")) for row in rows})
+        score_new_expenses(connection, table.c.id > last_id)
+        add_expense_events(connection, table.c.id > last_id)
+        db.info[OUTBOX_FLAG] = True
+        mark_changed(db)
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+def _format_validation_error(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    ]
+
+
+def import_rows(
+    db: Session,
+    entity: ImportEntityEnum,
+    rows: Iterator[Dict[str, Any]],
+    *,
+    company_id: int,
+    user_id: int,
+    dry_run: bool = False,
+    atomic: bool = False,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_batch: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    """
+    Valida e grava as linhas de uma planilha.
+
+    Linhas inválidas vão para o relatório e as demais são gravadas, a menos
+    que ``atomic`` seja usado (qualquer erro desfaz a importação inteira) ou
+    ``dry_run`` (apenas valida). Tudo acontece em uma única transação.
+    ``on_batch`` é chamado com o relatório parcial a cada lote gravado.
+    """
+    spec = IMPORT_SPECS[ImportEntityEnum(entity)]
+    table = spec.model.__table__
+    maps = LookupMaps(db, company_id=company_id).load(*spec.lookups)
+    report = ImportReport(entity=entity, dry_run=dry_run)
+    batch: List[Dict[str, Any]] = []
+    now = datetime.utcnow()
+
+    def flush() -> None:
+        if not dry_run:
+            insert_rows(db, table, batch)
+        report.imported += len(batch)
+        batch.clear()
+        if on_batch is not None:
+            on_batch(report)
+
+    try:
+        # Linha 1 é o cabeçalho
+        for line, raw in enumerate(rows, start=2):
+            row = {
+                key: _clean_cell(value, key in spec.string_fields)
+                for key, value in raw.items() if key
+            }
+            if not any(value is not None for value in row.values()):
+                continue
+            report.total_rows += 1
+
+            errors: List[str] = []
+            spec.resolve(row, maps, user_id, errors)
+            data = None
+            try:
+                data = spec.schema.model_validate(row).model_dump()
+            except ValidationError as e:
+                # Campos já reportados na resolução das chaves não se repetem
+                reported = {error.split(":", 1)[0] for error in errors}
+                errors.extend(
+                    error for error in _format_validation_error(e)
+                    if error.split(":", 1)[0] not in reported
+                )
+
+            if errors:
+                report.failed += 1
+                if len(report.errors) < MAX_REPORTED_ERRORS:
+                    report.errors.append(ImportRowError(row=line, errors=errors))
+                else:
+                    report.errors_truncated = True
+                continue
+
+            if spec.register:
+                spec.register(data, maps)
+            batch.append(_apply_defaults(table, data, now))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+
+        if dry_run or (atomic and report.failed):
+            db.rollback()
+            if not dry_run:
+                report.imported = 0
+        else:
+            db.commit()
+            report.committed = True
+    except Exception:
+        db.rollback()
+        raise
+
+    logger.info(
+        f"Importação de {report.entity.value}: {report.imported} gravadas, "
+        f"{report.failed} com erro de {report.total_rows}"
+    )
+    return report
+
+
+def import_file(
+    db: Session,
+    entity: ImportEntityEnum,
+    stream: IO[bytes],
+    filename: str,
+    **kwargs: Any,
+) -> ImportReport:
+    """Importa um arquivo CSV ou XLSX; veja ``import_rows``."""
+    return import_rows(db, entity, iter_rows(stream, filename), **kwargs)
+
+
+def write_error_report(report: ImportReport, stream: IO[str]) -> None:
+    """Grava o relatório de erros em CSV (linha, erros)."""
+    writer = csv.writer(stream)
+    writer.writerow(["row", "errors"])
+    for item in report.errors:
+        writer.writerow([item.row, "; ".join(item.errors)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importa planilhas CSV/XLSX")
+    parser.add_argument("entity", choices=[entity.value for entity in ImportEntityEnum])
+    parser.add_argument("path")
+    parser.add_argument("--company-id", type=int, required=True)
+    parser.add_argument("--user-id", type=int, required=True, help="Usuário responsável (created_by/assigned)")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas valida, sem gravar")
+    parser.add_argument("--atomic", action="store_true", help="Não grava nada se alguma linha falhar")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--errors", help="Arquivo CSV para o relatório de erros")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as stream:
+            report = import_file(
+                db,
+                ImportEntityEnum(args.entity),
+                stream,
+                args.path,
+                company_id=args.company_id,
+                user_id=args.user_id,
+                dry_run=args.dry_run,
+                atomic=args.atomic,
+                batch_size=args.batch_size,
+            )
+    finally:
+        db.close()
+
+    if args.errors:
+        with open(args.errors, "w", newline="", encoding="utf-8") as stream:
+            write_error_report(report, stream)
+    print(json.dumps(report.model_dump(exclude={"errors"}, mode="json"), indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
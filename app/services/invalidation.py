@@ -0,0 +1,96 @@
+"""
+Invalidação dos caches em memória entre processos.
+
+O cache de respostas e o cache de usuários dos tokens (``principal``) são
+por processo. Com vários workers (``uvicorn --workers``), cada commit que
+altera uma etiqueta (nome de tabela) incrementa a versão dela na tabela
+``CacheVersion`` (``publish``). Os processos leem a tabela no máximo a cada
+``RESPONSE_CACHE_SYNC_INTERVAL`` segundos (``sync``, chamado ao resolver o
+usuário da requisição, antes de consultar o cache) e avisam os assinantes
+das etiquetas que mudaram em outro processo. A defasagem entre workers fica
+limitada a esse intervalo. Com o intervalo 0 (um único processo) nada é
+gravado nem lido.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import select, update
+
+from app.db.session import engine
+from app.core.config import settings
+from app.models.cache_version import CacheVersion
+
+logger = logging.getLogger(__name__)
+
+ALL = "*"  # Invalidação total
+
+_listeners: List[Callable[[Tuple[str, ...]], None]] = []
+_seen: Dict[str, int] = {}  # Etiqueta -> última versão lida ou gravada por este processo
+_loaded = False
+_checked = 0.0
+_lock = threading.Lock()
+
+
+def subscribe(callback: Callable[[Tuple[str, ...]], None]) -> Callable[[Tuple[str, ...]], None]:
+    """Registra ``callback(etiquetas)`` para mudanças de outros processos (``ALL`` = tudo)."""
+    _listeners.append(callback)
+    return callback
+
+
+def enabled() -> bool:
+    return settings.RESPONSE_CACHE_SYNC_INTERVAL > 0
+
+
+def publish(tags: Iterable[str]) -> None:
+    """Incrementa as versões das etiquetas (nenhuma = ``ALL``) depois de um commit."""
+    if not enabled():
+        return
+    tags = set(tags) or {ALL}
+    try:
+        with engine.begin() as conn:
+            existing = set(conn.execute(select(CacheVersion.tag).where(CacheVersion.tag.in_(tags))).scalars())
+            if existing:
+                conn.execute(
+                    update(CacheVersion)
+                    .where(CacheVersion.tag.in_(existing))
+                    .values(version=CacheVersion.version + 1)
+                )
+            for tag in tags - existing:
+                conn.execute(CacheVersion.__table__.insert().values(tag=tag, version=1))
+            versions = conn.execute(
+                select(CacheVersion.tag, CacheVersion.version).where(CacheVersion.tag.in_(tags))
+            ).all()
+    except Exception as e:
+        # Os outros processos ficam com o TTL como limite de defasagem
+        logger.warning(f"Erro ao publicar invalidação do cache ({', '.join(sorted(tags))}): {e}")
+        return
+    with _lock:
+        # O próprio processo já invalidou localmente: não repete na próxima leitura
+        _seen.update(versions)
+
+
+def sync() -> None:
+    """Lê as versões, no máximo a cada intervalo, e avisa as etiquetas alteradas por outros processos."""
+    global _loaded, _checked
+    if not enabled():
+        return
+    now = time.monotonic()
+    with _lock:
+        if now - _checked < settings.RESPONSE_CACHE_SYNC_INTERVAL:
+            return
+        _checked = now
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(select(CacheVersion.tag, CacheVersion.version)).all()
+    except Exception as e:
+        logger.warning(f"Erro ao ler as versões do cache: {e}")
+        return
+    with _lock:
+        changed = tuple(tag for tag, version in rows if _loaded and _seen.get(tag) != version)
+        _seen.update(rows)
+        _loaded = True
+    if changed:
+        for callback in _listeners:
+            callback(changed)
@@ -0,0 +1,433 @@
+"""
+Fila persistente de tarefas pesadas (importações, exportações, miniaturas...).
+
+As tarefas são funções registradas com ``@task("nome")`` (em
+``app.services.tasks``) e enfileiradas com ``enqueue``; os parâmetros
+precisam ser serializáveis em JSON. Cada worker pega o próximo job por
+prioridade e ``run_at``: no PostgreSQL com ``FOR UPDATE SKIP LOCKED``
+(vários processos e máquinas); nos demais bancos com um UPDATE
+condicional (um nó só, o banco serializa as gravações).
+
+Falhas são repetidas até ``max_attempts`` vezes, esperando
+``JOB_RETRY_BACKOFF`` segundos antes da segunda tentativa e o dobro a cada
+nova falha. Enquanto o job roda o worker atualiza ``heartbeat_at``; um job
+sem heartbeat há ``JOB_LEASE_SECONDS`` (worker morto) volta para a fila.
+
+A aplicação roda ``JOB_WORKER_THREADS`` workers em threads; em produção os
+workers ficam em processos dedicados::
+
+    python -m app.services.jobs --workers 4 [--purge]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, event, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal  # Importado antes dos modelos (ordem de registro)
+from app.core.config import settings
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+# Nome da tarefa -> (função, tentativas)
+_tasks: Dict[str, Any] = {}
+# Jobs em execução neste processo (o heartbeat pode estar só em memória, ver ``JobContext``)
+_running: Set[int] = set()
+
+
+class UnknownTask(Exception):
+    """Nenhuma tarefa registrada com esse nome."""
+
+
+class JobCancelled(Exception):
+    """O cancelamento do job foi pedido durante a execução."""
+
+
+def task(kind: str, *, max_attempts: int = 3) -> Callable:
+    """
+    Registra uma tarefa. A função recebe a sessão do banco, o ``JobContext``
+    e os parâmetros do job; o retorno (serializável em JSON) vira o
+    ``result`` do job.
+    """
+
+    def register(function: Callable) -> Callable:
+        _tasks[kind] = (function, max_attempts)
+        return function
+
+    return register
+
+
+def _load_tasks() -> None:
+    import app.services.tasks  # noqa: F401  (registra as tarefas)
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    priority: int = 100,
+    max_attempts: Optional[int] = None,
+    run_at: Optional[datetime] = None,
+    company_id: Optional[int] = None,
+    created_by_id: Optional[int] = None,
+) -> Job:
+    """Grava um job na fila (e confirma a transação)."""
+    _load_tasks()
+    if kind not in _tasks:
+        raise UnknownTask(kind)
+    job = Job(
+        kind=kind,
+        params=jsonable_encoder(params or {}),
+        priority=priority,
+        max_attempts=max_attempts or _tasks[kind][1],
+        run_at=run_at or datetime.utcnow(),
+        company_id=company_id,
+        created_by_id=created_by_id,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    job_workers.wake()
+    return job
+
+
+def list_jobs(
+    db: Session,
+    *,
+    company_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    status: Optional[JobStatus] = None,
+    kind: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[Job]:
+    """Jobs mais recentes primeiro; com ``company_id``/``user_id``, só os da empresa ou do usuário."""
+    query = db.query(Job)
+    # "company_id == None" viraria "IS NULL" e traria os jobs sem empresa de todos os usuários
+    scopes = []
+    if company_id is not None:
+        scopes.append(Job.company_id == company_id)
+    if user_id is not None:
+        scopes.append(Job.created_by_id == user_id)
+    if scopes:
+        query = query.filter(or_(*scopes))
+    if status is not None:
+        query = query.filter(Job.status == status)
+    if kind is not None:
+        query = query.filter(Job.kind == kind)
+    return query.order_by(Job.id.desc()).offset(skip).limit(limit).all()
+
+
+def cancel(db: Session, job: Job) -> Job:
+    """Cancela um job na fila; em execução, pede o cancelamento (atendido no próximo ``progress``)."""
+    if job.status == JobStatus.QUEUED:
+        job.status = JobStatus.CANCELLED
+        job.finished_at = datetime.utcnow()
+    elif job.status == JobStatus.RUNNING:
+        job.cancel_requested = True
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+class JobContext:
+    """
+    Passado à tarefa: informa o progresso e verifica pedidos de cancelamento.
+
+    No SQLite a transação de escrita da tarefa trava o banco inteiro: gravar
+    o progresso por outra conexão esperaria até "database is locked". Nesse
+    caso o progresso e o heartbeat ficam em memória e são gravados logo
+    depois do commit (ou rollback) da sessão da tarefa.
+    """
+
+    def __init__(self, job_id: int, attempt: int, max_attempts: int, db: Optional[Session] = None):
+        self.job_id = job_id
+        self.attempt = attempt
+        self.max_attempts = max_attempts
+        self._pending: Dict[str, Any] = {}
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._connection: Any = None  # Conexão SQLite da sessão da tarefa durante a transação
+        if db is not None and db.get_bind().dialect.name == "sqlite":
+            event.listen(db, "after_begin", self._transaction_started)
+            event.listen(db, "after_transaction_end", self._transaction_ended)
+
+    @property
+    def last_attempt(self) -> bool:
+        return self.attempt >= self.max_attempts
+
+    def progress(self, fraction: Optional[float] = None, message: Optional[str] = None) -> None:
+        values: Dict[str, Any] = {"heartbeat_at": datetime.utcnow()}
+        if fraction is not None:
+            values["progress"] = max(0.0, min(float(fraction), 1.0))
+        if message is not None:
+            values["message"] = message
+        self._write(values)
+        if self._cancelled:
+            raise JobCancelled()
+
+    def beat(self) -> None:
+        self._write({"heartbeat_at": datetime.utcnow()})
+
+    def _transaction_started(self, session: Session, transaction: Any, connection: Any) -> None:
+        self._connection = connection.connection.driver_connection
+
+    def _transaction_ended(self, session: Session, transaction: Any) -> None:
+        if transaction.parent is None:
+            self._connection = None
+            try:
+                self._write({})
+            except Exception as e:
+                logger.warning(f"Erro ao gravar o progresso do job {self.job_id}: {e}")
+
+    def _write(self, values: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending.update(values)
+            connection = self._connection
+            # Só há trava de escrita depois do primeiro INSERT/UPDATE da transação
+            if not self._pending or (connection is not None and connection.in_transaction):
+                return
+            values, self._pending = self._pending, {}
+        db = SessionLocal()
+        try:
+            db.execute(update(Job).where(Job.id == self.job_id).values(**values))
+            db.commit()
+            if db.execute(select(Job.cancel_requested).where(Job.id == self.job_id)).scalar():
+                self._cancelled = True
+        finally:
+            db.close()
+
+
+def claim(db: Session, worker: str) -> Optional[int]:
+    """Reserva o próximo job liberado da fila. Retorna o id, ou ``None`` se não houver."""
+    now = datetime.utcnow()
+    candidates = (
+        select(Job.id)
+        .where(Job.status == JobStatus.QUEUED, Job.run_at <= now)
+        .order_by(Job.priority, Job.run_at, Job.id)
+        .limit(1)
+    )
+    is_postgresql = db.get_bind().dialect.name == "postgresql"
+    if is_postgresql:
+        candidates = candidates.with_for_update(skip_locked=True)
+    job_id = db.execute(candidates).scalar()
+    if job_id is None:
+        db.rollback()
+        return None
+
+    statement = update(Job).where(Job.id == job_id)
+    if not is_postgresql:
+        # Outro worker pode ter pego o mesmo job entre a consulta e o UPDATE
+        statement = statement.where(Job.status == JobStatus.QUEUED)
+    result = db.execute(
+        statement.values(
+            status=JobStatus.RUNNING,
+            attempts=Job.attempts + 1,
+            started_at=now,
+            heartbeat_at=now,
+            worker=worker,
+            error=None,
+        )
+    )
+    db.commit()
+    if not result.rowcount:
+        # Perdeu a corrida: tenta o próximo
+        return claim(db, worker)
+    return job_id
+
+
+def _finish(job_id: int, **values: Any) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(update(Job).where(Job.id == job_id).values(**values))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _heartbeat(context: JobContext, stop: threading.Event) -> None:
+    interval = max(settings.JOB_LEASE_SECONDS / 3, 1)
+    while not stop.wait(interval):
+        try:
+            context.beat()
+        except Exception as e:
+            logger.warning(f"Erro ao atualizar o heartbeat do job {context.job_id}: {e}")
+
+
+def run_job(job_id: int) -> None:
+    """Executa um job já reservado e grava o resultado (ou agenda a próxima tentativa)."""
+    db = SessionLocal()
+    stop = threading.Event()
+    _running.add(job_id)
+    try:
+        job = db.get(Job, job_id)
+        context = JobContext(job.id, job.attempts, job.max_attempts, db)
+        entry = _tasks.get(job.kind)
+        if entry is None:
+            _finish(job_id, status=JobStatus.FAILED, finished_at=datetime.utcnow(), error=f"Unknown task {job.kind}")
+            return
+        params = dict(job.params or {})
+        db.commit()
+
+        threading.Thread(target=_heartbeat, args=(context, stop), daemon=True).start()
+        try:
+            result = entry[0](db, context, **params)
+        except JobCancelled:
+            db.rollback()
+            _finish(job_id, status=JobStatus.CANCELLED, finished_at=datetime.utcnow())
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Job {job_id} ({job.kind}) falhou na tentativa {context.attempt}")
+            error = f"{type(e).__name__}: {e}"
+            if context.last_attempt:
+                _finish(job_id, status=JobStatus.FAILED, finished_at=datetime.utcnow(), error=error)
+            else:
+                delay = settings.JOB_RETRY_BACKOFF * 2 ** (context.attempt - 1)
+                _finish(
+                    job_id,
+                    status=JobStatus.QUEUED,
+                    run_at=datetime.utcnow() + timedelta(seconds=delay),
+                    error=error,
+                )
+        else:
+            _finish(
+                job_id,
+                status=JobStatus.SUCCEEDED,
+                finished_at=datetime.utcnow(),
+                progress=1.0,
+                result=jsonable_encoder(result),
+            )
+    finally:
+        stop.set()
+        db.close()
+        _running.discard(job_id)
+
+
+def requeue_stale(db: Session) -> int:
+    """Devolve à fila (ou marca como falhos) os jobs cujo worker parou de dar sinal."""
+    limit = datetime.utcnow() - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    stale = (Job.status == JobStatus.RUNNING, Job.heartbeat_at < limit, Job.id.notin_(tuple(_running)))
+    failed = db.execute(
+        update(Job)
+        .where(*stale, Job.attempts >= Job.max_attempts)
+        .values(status=JobStatus.FAILED, finished_at=datetime.utcnow(), error="Worker lost")
+    ).rowcount
+    requeued = db.execute(
+        update(Job).where(*stale).values(status=JobStatus.QUEUED, run_at=datetime.utcnow(), error="Worker lost")
+    ).rowcount
+    db.commit()
+    if failed or requeued:
+        logger.warning(f"Jobs sem heartbeat: {requeued} de volta à fila, {failed} falhos")
+    return failed + requeued
+
+
+def purge_jobs(db: Session) -> int:
+    """Remove jobs encerrados há mais de ``JOB_RETENTION_DAYS`` dias."""
+    limit = datetime.utcnow() - timedelta(days=settings.JOB_RETENTION_DAYS)
+    result = db.execute(delete(Job).where(Job.status.in_(FINISHED_STATUSES), Job.finished_at < limit))
+    db.commit()
+    return result.rowcount
+
+
+def work(name: str, stop: threading.Event, wake: Optional[threading.Event] = None) -> None:
+    """Laço de um worker: executa jobs até ``stop``; com a fila vazia, espera ``JOB_POLL_INTERVAL``."""
+    _load_tasks()
+    wake = wake or threading.Event()
+    while not stop.is_set():
+        job_id = None
+        db = SessionLocal()
+        try:
+            requeue_stale(db)
+            job_id = claim(db, name)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao consultar a fila de jobs: {e}")
+        finally:
+            db.close()
+        if job_id is not None:
+            run_job(job_id)
+            continue
+        wake.wait(settings.JOB_POLL_INTERVAL)
+        wake.clear()
+
+
+class JobWorkerThreads:
+    """Workers da fila em threads dentro da aplicação."""
+
+    def __init__(self, count: int):
+        self.count = count
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        for index in range(self.count):
+            name = f"{socket.gethostname()}:{os.getpid()}:t{index}"
+            thread = threading.Thread(target=work, args=(name, self._stop, self._wake), name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+
+job_workers = JobWorkerThreads(settings.JOB_WORKER_THREADS)
+
+
+def _worker_process(index: int) -> None:
+    logging.basicConfig(level=logging.INFO)
+    try:
+        work(f"{socket.gethostname()}:{os.getpid()}", threading.Event())
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Workers da fila de jobs")
+    parser.add_argument("--workers", type=int, default=1, help="Processos worker")
+    parser.add_argument("--purge", action="store_true", help="Remove jobs encerrados fora da retenção e sai")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.purge:
+        db = SessionLocal()
+        try:
+            logger.info(f"Jobs removidos: {purge_jobs(db)}")
+        finally:
+            db.close()
+        return
+
+    # "spawn": cada processo abre as próprias conexões
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_worker_process, args=(index,)) for index in range(args.workers)]
+    for process in processes:
+        process.start()
+    logger.info(f"{len(processes)} workers da fila de jobs iniciados")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Métricas no formato do Prometheus (``GET /metrics``).
+
+Medidas em cada requisição e consulta (pacote ``prometheus_client``):
+
+- latência por rota (histograma), requisições em andamento, respostas por
+  status e bytes recebidos por rota (vazão de uploads);
+- duração das consultas por forma (operação e tabela principal, ex.:
+  ``SELECT project``), pelos eventos do engine;
+- verificações/gerações de hash de senha (bcrypt) em andamento e duração.
+
+Lidos na hora da coleta, sem custo nas requisições: pool de conexões,
+cache de respostas e limites de requisições.
+
+Com vários workers (``uvicorn --workers``), defina a variável de ambiente
+``PROMETHEUS_MULTIPROC_DIR`` com um diretório vazio antes de iniciar: cada
+processo grava seus valores em arquivos próprios e ``/metrics`` soma os de
+todos. Os valores lidos na coleta (pool, cache, limites) são os do worker
+que atendeu a coleta. O diretório deve ser esvaziado a cada reinício.
+"""
+import os
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Match
+
+from app.core.config import settings
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+REQUEST_LATENCY = Histogram(
+    "app_http_request_duration_seconds",
+    "Duração das requisições HTTP",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUESTS = Counter("app_http_requests_total", "Respostas HTTP", ["method", "route", "status"])
+REQUESTS_IN_PROGRESS = Gauge(
+    "app_http_requests_in_progress", "Requisições HTTP em andamento", multiprocess_mode="livesum"
+)
+REQUEST_BYTES = Counter("app_http_request_bytes_total", "Bytes recebidos no corpo das requisições", ["method", "route"])
+STATEMENT_LATENCY = Histogram(
+    "app_db_statement_duration_seconds",
+    "Duração das consultas por forma (operação e tabela principal)",
+    ["operation", "table"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10),
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    "app_password_hash_duration_seconds", "Duração das verificações e gerações de hash de senha", ["operation"]
+)
+PASSWORD_HASH_IN_PROGRESS = Gauge(
+    "app_password_hash_in_progress", "Hashes de senha em cálculo (fila do bcrypt)", multiprocess_mode="livesum"
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+# ---------------------------------------------------------------------------
+# Requisições
+# ---------------------------------------------------------------------------
+
+def route_template(scope) -> str:
+    """Modelo da rota (/api/v1/projects/{project_id}), para não criar uma série por id."""
+    route = scope.get("route")
+    if route is None:
+        # Respondida antes do roteador (cache, limites) ou com o escopo copiado por um middleware
+        for candidate in scope["app"].routes:
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        received = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def status_send(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, status_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_PROGRESS.dec()
+            route = route_template(scope)
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            REQUESTS.labels(method, route, str(status)).inc()
+            if received:
+                REQUEST_BYTES.labels(method, route).inc(received)
+
+
+# ---------------------------------------------------------------------------
+# Consultas
+# ---------------------------------------------------------------------------
+
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+\"?([\w.]+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def statement_shape(statement: str) -> Tuple[str, str]:
+    """(operação, tabela principal) de um SQL; os valores vão como parâmetros, então o texto se repete."""
+    words = statement.split(None, 1)
+    operation = words[0].upper() if words else ""
+    match = _TABLE.search(statement)
+    return operation, match.group(1).lower() if match else ""
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_start")
+    if starts:
+        STATEMENT_LATENCY.labels(*statement_shape(statement)).observe(time.perf_counter() - starts.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _failed_execute(context):
+    # Consulta com erro: descarta a marca de início (after_cursor_execute não é chamado)
+    starts = context.connection.info.get("metrics_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+# ---------------------------------------------------------------------------
+# Hash de senhas
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def password_hashing(operation: str) -> Iterator[None]:
+    PASSWORD_HASH_IN_PROGRESS.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PASSWORD_HASH_LATENCY.labels(operation).observe(time.perf_counter() - start)
+        PASSWORD_HASH_IN_PROGRESS.dec()
+
+
+# ---------------------------------------------------------------------------
+# Coleta
+# ---------------------------------------------------------------------------
+
+class StatusCollector:
+    """Valores lidos na coleta: pool de conexões, cache de respostas e limites de requisições."""
+
+    def describe(self):
+        # Sem descrição prévia: o registro não chama collect() ao registrar (ainda na importação)
+        return []
+
+    def collect(self):
+        from app.db.session import engine
+        from app.services.rate_limit import limiter_status
+        from app.services.response_cache import cache_status
+
+        pool = engine.pool
+        for name, description in (
+            ("size", "Tamanho do pool de conexões"),
+            ("checkedout", "Conexões em uso"),
+            ("checkedin", "Conexões livres no pool"),
+            ("overflow", "Conexões além do tamanho do pool"),
+        ):
+            method = getattr(pool, name, None)
+            if method is not None:
+                yield GaugeMetricFamily(f"app_db_pool_{name}", description, value=method())
+
+        cache = cache_status()
+        yield GaugeMetricFamily("app_response_cache_entries", "Respostas em cache", value=cache["entries"])
+        yield GaugeMetricFamily("app_response_cache_size_bytes", "Memória do cache de respostas", value=cache["size_bytes"])
+        for name in ("stores", "evictions", "invalidations"):
+            yield CounterMetricFamily(f"app_response_cache_{name}", f"Cache de respostas: {name}", value=cache[name])
+        hits = CounterMetricFamily("app_response_cache_hits", "Acertos no cache de respostas", labels=["route"])
+        misses = CounterMetricFamily("app_response_cache_misses", "Faltas no cache de respostas", labels=["route"])
+        for route, stats in cache["routes"].items():
+            hits.add_metric([route], stats["hits"])
+            misses.add_metric([route], stats["misses"])
+        yield hits
+        yield misses
+
+        limiter = limiter_status()
+        yield GaugeMetricFamily("app_admission_active_requests", "Requisições admitidas", value=limiter["active_requests"])
+        yield GaugeMetricFamily("app_admission_queued_requests", "Requisições aguardando vaga", value=limiter["queued_requests"])
+        rejections = CounterMetricFamily("app_rate_limit_rejections", "Requisições recusadas por motivo", labels=["reason"])
+        for reason, count in limiter["rejections"].items():
+            rejections.add_metric([reason], count)
+        yield rejections
+
+
+def _registry() -> CollectorRegistry:
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        from prometheus_client import REGISTRY as registry
+    registry.register(StatusCollector())
+    return registry
+
+
+registry = _registry()
+
+
+def metrics_response(request: Request) -> Response:
+    if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        return JSONResponse({"detail": "Not authenticated"}, status_code=401)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
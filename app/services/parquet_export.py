@@ -0,0 +1,314 @@
+"""
+Exportação colunar (Parquet) dos dados de todas as empresas para BI.
+
+Cada entidade vira um conjunto de arquivos particionado por empresa
+(``<entidade>/company_id=<id>/part-<execução>-<n>.parquet``), com tipos
+próprios: enums como dicionário de strings (o valor exposto na API), datas
+como ``date32``, datas e horas como ``timestamp[us]`` e valores como
+``float64``. As linhas são lidas com cursor no servidor, em lotes, e cada
+lote vira um row group; a memória usada não depende do tamanho da tabela.
+
+Exportações incrementais gravam apenas as linhas alteradas desde a marca
+(maior ``updated_at``) da exportação anterior, menos
+``EXPORT_WATERMARK_OVERLAP`` segundos; uma mesma linha pode aparecer em
+mais de um arquivo e o leitor fica com a de maior ``updated_at``. A
+exportação completa substitui o diretório da entidade. As marcas ficam em
+``_manifest.json``; arquivos em gravação começam com ``_`` e são ignorados
+pelos leitores de datasets Parquet.
+
+Uso pela linha de comando (carga noturna)::
+
+    python -m app.services.parquet_export [--full] [--entity expenses]
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timedelta
+from enum import Enum as PyEnum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Boolean, Date, DateTime, Enum, Float, Integer, LargeBinary, Numeric, select
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal  # Importado antes dos modelos (ordem de registro)
+from app.core.config import settings
+from app.models.client import Client, Lead
+from app.models.contract import Contract
+from app.models.expense import Expense
+from app.models.project import Project
+from app.models.property import Property
+from app.schemas.parquet_export import ParquetExportEntityEnum
+from app.services.changes import company_column, join_company
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 50_000
+MANIFEST_NAME = "_manifest.json"
+
+EXPORT_MODELS = {
+    ParquetExportEntityEnum.PROJECTS: Project,
+    ParquetExportEntityEnum.PROPERTIES: Property,
+    ParquetExportEntityEnum.LEADS: Lead,
+    ParquetExportEntityEnum.CONTRACTS: Contract,
+    ParquetExportEntityEnum.EXPENSES: Expense,
+    ParquetExportEntityEnum.CLIENTS: Client,
+}
+
+# Uma exportação por vez (por processo)
+_export_lock = threading.Lock()
+
+
+class ParquetExportError(Exception):
+    """Exportação indisponível (sem ``pyarrow``) ou já em andamento."""
+
+
+def _company_statement(entity: ParquetExportEntityEnum, columns: Sequence[Any]):
+    """Consulta das colunas da entidade com a empresa de cada linha (primeira coluna), ordenada por empresa."""
+    model = EXPORT_MODELS[entity]
+    company = company_column(model)
+    statement = join_company(select(company, *columns), model)
+    return statement.order_by(company, model.id)
+
+
+def arrow_schema(model) -> Tuple[Any, List[Any]]:
+    """Esquema Arrow e colunas exportadas do modelo (arquivos binários ficam de fora)."""
+    import pyarrow as pa
+
+    fields = []
+    columns = []
+    for column in model.__table__.columns:
+        column_type = column.type
+        if isinstance(column_type, LargeBinary):
+            continue
+        if isinstance(column_type, Enum):
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif isinstance(column_type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column_type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column_type, (Float, Numeric)):
+            arrow_type = pa.float64()
+        elif isinstance(column_type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column_type, Date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable or column.primary_key))
+        columns.append(column)
+    return pa.schema(fields), columns
+
+
+def _record_batch(schema, rows: Sequence[Any]):
+    import pyarrow as pa
+
+    arrays = []
+    for index, field in enumerate(schema):
+        values = [row[index + 1] for row in rows]
+        if pa.types.is_dictionary(field.type):
+            values = [value.value if isinstance(value, PyEnum) else value for value in values]
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _PartitionWriter:
+    """Grava os arquivos de uma partição (empresa), trocando de arquivo a cada ``PARQUET_ROWS_PER_FILE`` linhas."""
+
+    def __init__(self, directory: str, schema, run_id: str):
+        self.directory = directory
+        self.schema = schema
+        self.run_id = run_id
+        self.files: List[str] = []
+        self._writer = None
+        self._path: Optional[str] = None
+        self._rows = 0
+
+    def write(self, batch) -> None:
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            os.makedirs(self.directory, exist_ok=True)
+            name = f"part-{self.run_id}-{len(self.files):05d}.parquet"
+            self._path = os.path.join(self.directory, name)
+            # Nome temporário com "_": leitores de datasets ignoram o arquivo até ele ser concluído
+            self._writer = pq.ParquetWriter(
+                os.path.join(self.directory, f"_{name}"), self.schema, compression="zstd"
+            )
+        self._writer.write_batch(batch)
+        self._rows += batch.num_rows
+        if self._rows >= settings.PARQUET_ROWS_PER_FILE:
+            self.close()
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.close()
+        os.replace(os.path.join(self.directory, f"_{os.path.basename(self._path)}"), self._path)
+        self.files.append(self._path)
+        self._writer = None
+        self._rows = 0
+
+
+def read_manifest(directory: Optional[str] = None) -> Dict[str, Any]:
+    path = os.path.join(directory or settings.PARQUET_EXPORT_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(directory: str, manifest: Dict[str, Any]) -> None:
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(f"{path}.tmp", path)
+
+
+def export_entity(
+    db: Session,
+    entity: ParquetExportEntityEnum,
+    *,
+    directory: str,
+    since: Optional[datetime] = None,
+    run_id: str,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Grava os arquivos de uma entidade em ``directory``. Retorna linhas, arquivos e a nova marca."""
+    entity = ParquetExportEntityEnum(entity)
+    model = EXPORT_MODELS[entity]
+    schema, columns = arrow_schema(model)
+    statement = _company_statement(entity, columns)
+    if since is not None:
+        statement = statement.where(model.updated_at >= since)
+
+    writers: Dict[Any, _PartitionWriter] = {}
+    current: Optional[_PartitionWriter] = None
+    rows = 0
+    watermark: Optional[datetime] = None
+    updated_position = [column.name for column in columns].index("updated_at") + 1
+    result = db.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        # Ordenado por empresa: cada lote é dividido nos trechos de cada empresa
+        start = 0
+        while start < len(partition):
+            company_id = partition[start][0]
+            end = start
+            while end < len(partition) and partition[end][0] == company_id:
+                end += 1
+            writer = writers.get(company_id)
+            if writer is None:
+                if current is not None:
+                    current.close()
+                writer = writers[company_id] = _PartitionWriter(
+                    os.path.join(directory, f"company_id={company_id}"), schema, run_id
+                )
+            current = writer
+            writer.write(_record_batch(schema, partition[start:end]))
+            start = end
+
+        rows += len(partition)
+        stamps = [row[updated_position] for row in partition if row[updated_position] is not None]
+        if stamps and (watermark is None or max(stamps) > watermark):
+            watermark = max(stamps)
+    if current is not None:
+        current.close()
+
+    files = [path for writer in writers.values() for path in writer.files]
+    return {"rows": rows, "files": len(files), "watermark": watermark}
+
+
+def run_export(
+    db: Session,
+    *,
+    entities: Optional[Sequence[ParquetExportEntityEnum]] = None,
+    incremental: bool = True,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Exporta as entidades (todas por padrão). Incremental a partir da marca
+    do manifesto; a entidade sem marca é exportada por completo.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ParquetExportError("Parquet export requires pyarrow") from e
+    if not _export_lock.acquire(blocking=False):
+        raise ParquetExportError("A Parquet export is already running")
+    try:
+        root = settings.PARQUET_EXPORT_DIR
+        os.makedirs(root, exist_ok=True)
+        manifest = read_manifest(root)
+        run_id = datetime.utcnow().strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+        for entity in entities or list(ParquetExportEntityEnum):
+            entity = ParquetExportEntityEnum(entity)
+            previous = manifest.get(entity.value, {})
+            watermark = previous.get("watermark") if incremental else None
+            target = os.path.join(root, entity.value)
+            started = datetime.utcnow()
+
+            if watermark:
+                since = datetime.fromisoformat(watermark) - timedelta(seconds=settings.EXPORT_WATERMARK_OVERLAP)
+                stats = export_entity(db, entity, directory=target, since=since, run_id=run_id, batch_size=batch_size)
+                mode = "incremental"
+            else:
+                # Completa: grava ao lado e troca o diretório no final
+                staging = os.path.join(root, f"_{entity.value}-{run_id}")
+                stats = export_entity(db, entity, directory=staging, run_id=run_id, batch_size=batch_size)
+                if os.path.exists(target):
+                    shutil.rmtree(target)
+                if os.path.exists(staging):
+                    os.replace(staging, target)
+                mode = "full"
+
+            manifest[entity.value] = {
+                "watermark": stats["watermark"] or watermark,
+                "exported_at": started,
+                "mode": mode,
+                "rows": stats["rows"],
+                "files": stats["files"],
+            }
+            _write_manifest(root, manifest)
+            logger.info(f"Exportação Parquet de {entity.value} ({mode}): {stats['rows']} linhas")
+        return manifest
+    finally:
+        _export_lock.release()
+
+
+def is_running() -> bool:
+    return _export_lock.locked()
+
+
+def export_status() -> Dict[str, Any]:
+    manifest = read_manifest()
+    return {
+        "running": is_running(),
+        "entities": [
+            dict(manifest[entity.value], entity=entity) for entity in ParquetExportEntityEnum if entity.value in manifest
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exporta os dados em Parquet para BI")
+    parser.add_argument("--full", action="store_true", help="Ignora as marcas e exporta tudo")
+    parser.add_argument("--entity", action="append", choices=[entity.value for entity in ParquetExportEntityEnum])
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        run_export(db, entities=args.entity, incremental=not args.full, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
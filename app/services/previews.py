@@ -0,0 +1,280 @@
+"""
+Geração de miniaturas e pré-visualizações de arquivos enviados.
+
+Os arquivos derivados são gravados ao lado do original
+(``<arquivo>.thumbnail.jpg`` e ``<arquivo>.preview.jpg``) fora do ciclo da
+requisição. Uploads agendam a geração na fila de jobs (``queue_previews``,
+persistente); pedidos de pré-visualização ainda inexistente usam o pool de
+processos, cuja fila é limitada: quando está cheia, ``enqueue`` devolve
+``False`` e o chamador decide como responder.
+
+Se a geração falha (arquivo corrompido), um marcador
+(``<arquivo>.preview-failed``, com o mtime do original) evita que cada
+consulta agende a geração de novo; o marcador perde a validade quando o
+arquivo muda.
+"""
+import logging
+import mimetypes
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from enum import Enum
+from typing import Any, Dict, Optional, Set
+
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services import jobs
+
+logger = logging.getLogger(__name__)
+
+
+class PreviewKind(str, Enum):
+    THUMBNAIL = "thumbnail"  # Miniatura
+    PREVIEW = "preview"  # Pré-visualização (primeira página)
+
+
+IMAGE_TYPES = {"image/jpeg", "image/png", "image/gif", "image/bmp", "image/webp", "image/tiff"}
+PDF_TYPES = {"application/pdf"}
+
+
+def derived_path(source_path: str, kind: PreviewKind) -> str:
+    """Caminho do arquivo derivado (miniatura ou pré-visualização) de um upload."""
+    return f"{source_path}.{PreviewKind(kind).value}.jpg"
+
+
+def failure_path(source_path: str) -> str:
+    """Marcador de falha na geração das pré-visualizações de um upload."""
+    return f"{source_path}.preview-failed"
+
+
+def _source_version(source_path: str) -> str:
+    return str(os.stat(source_path).st_mtime_ns)
+
+
+def mark_failed(source_path: str) -> None:
+    try:
+        with open(failure_path(source_path), "w") as f:
+            f.write(_source_version(source_path))
+    except OSError as e:
+        logger.warning(f"Erro ao registrar falha de pré-visualização de {source_path}: {e}")
+
+
+def has_failed(source_path: str) -> bool:
+    """Se a geração já falhou para a versão atual do arquivo."""
+    try:
+        with open(failure_path(source_path)) as f:
+            return f.read().strip() == _source_version(source_path)
+    except OSError:
+        return False
+
+
+def remove_derived(source_path: Optional[str]) -> None:
+    """Remove miniatura, pré-visualização e marcador de falha de um arquivo, se existirem."""
+    if not source_path:
+        return
+    for path in [derived_path(source_path, kind) for kind in PreviewKind] + [failure_path(source_path)]:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Erro ao remover arquivo derivado {path}: {e}")
+
+
+def guess_content_type(path: str, content_type: Optional[str] = None) -> Optional[str]:
+    if content_type and content_type != "application/octet-stream":
+        return content_type
+    return mimetypes.guess_type(path)[0]
+
+
+def is_supported(path: str, content_type: Optional[str] = None) -> bool:
+    content_type = guess_content_type(path, content_type)
+    return content_type in IMAGE_TYPES or content_type in PDF_TYPES
+
+
+def _open_first_page(source_path: str, content_type: str):
+    """Abre a imagem (ou a primeira página do PDF) como ``PIL.Image``."""
+    if content_type in PDF_TYPES:
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(source_path)
+        try:
+            page = pdf[0]
+            # Renderiza com escala suficiente para a pré-visualização
+            width = page.get_width() or settings.PREVIEW_SIZE
+            scale = max(settings.PREVIEW_SIZE / width, 1.0)
+            return page.render(scale=scale).to_pil()
+        finally:
+            pdf.close()
+
+    from PIL import Image
+
+    image = Image.open(source_path)
+    image.seek(0)
+    return image
+
+
+def render_previews(source_path: str, content_type: str) -> Dict[str, str]:
+    """
+    Gera miniatura e pré-visualização de um arquivo.
+
+    Executado nos processos do pool; também pode ser chamado diretamente.
+    """
+    try:
+        image = _open_first_page(source_path, content_type)
+    except ImportError as e:
+        logger.warning(f"Dependência ausente para gerar pré-visualização de {source_path}: {e}")
+        return {}
+    except Exception:
+        mark_failed(source_path)
+        raise
+
+    generated = {}
+    sizes = (
+        (PreviewKind.PREVIEW, settings.PREVIEW_SIZE),
+        (PreviewKind.THUMBNAIL, settings.THUMBNAIL_SIZE),
+    )
+    try:
+        image = image.convert("RGB")
+        for kind, size in sizes:
+            derived = image.copy()
+            derived.thumbnail((size, size))
+            target = derived_path(source_path, kind)
+            # Grava em arquivo temporário e renomeia, para que leitores nunca vejam um JPEG parcial
+            tmp_path = f"{target}.tmp"
+            derived.save(tmp_path, "JPEG", quality=85, optimize=True)
+            os.replace(tmp_path, target)
+            generated[kind.value] = target
+    except Exception:
+        # Imagem truncada/corrompida costuma falhar só na decodificação
+        mark_failed(source_path)
+        raise
+    return generated
+
+
+class PreviewWorkerPool:
+    """Pool de processos com fila limitada para geração de pré-visualizações."""
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def is_pending(self, source_path: str) -> bool:
+        return source_path in self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def enqueue(self, source_path: str, content_type: Optional[str] = None) -> bool:
+        """
+        Agenda a geração das pré-visualizações de um arquivo.
+
+        Retorna ``False`` sem bloquear quando a fila está cheia.
+        Arquivos já agendados ou de tipo não suportado não ocupam a fila.
+        """
+        content_type = guess_content_type(source_path, content_type)
+        if content_type not in IMAGE_TYPES and content_type not in PDF_TYPES:
+            return True
+
+        with self._lock:
+            if source_path in self._pending:
+                return True
+            if not self._slots.acquire(blocking=False):
+                logger.warning(f"Fila de pré-visualizações cheia ({self.max_pending}); ignorando {source_path}")
+                return False
+            self._pending.add(source_path)
+
+        try:
+            future = self._get_executor().submit(render_previews, source_path, content_type)
+        except Exception:
+            self._release(source_path)
+            raise
+        future.add_done_callback(lambda f: self._on_done(source_path, f))
+        return True
+
+    def _release(self, source_path: str) -> None:
+        with self._lock:
+            self._pending.discard(source_path)
+            self._slots.release()
+
+    def _on_done(self, source_path: str, future: Future) -> None:
+        self._release(source_path)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error:
+            logger.error(f"Erro ao gerar pré-visualização de {source_path}: {error}")
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+preview_pool = PreviewWorkerPool(
+    max_workers=settings.PREVIEW_WORKERS,
+    max_pending=settings.PREVIEW_QUEUE_SIZE,
+)
+
+
+def queue_previews(
+    db: Session,
+    source_path: Optional[str],
+    content_type: Optional[str] = None,
+    *,
+    company_id: Optional[int] = None,
+    **options: Any,
+):
+    """Agenda a geração das pré-visualizações de um upload na fila de jobs. Retorna o job (ou ``None``)."""
+    if not source_path or not is_supported(source_path, content_type):
+        return None
+    return jobs.enqueue(
+        db,
+        "previews.render",
+        {"path": source_path, "content_type": content_type},
+        priority=50,
+        company_id=company_id,
+        **options,
+    )
+
+
+def preview_response(source_path: Optional[str], content_type: Optional[str], kind: PreviewKind):
+    """
+    Resposta HTTP para a miniatura/pré-visualização de um upload.
+
+    Devolve o arquivo se já existir; caso contrário agenda a geração e
+    responde 202, ou 503 com ``Retry-After`` se a fila estiver cheia. Se a
+    geração já falhou para esta versão do arquivo, responde 422.
+    """
+    if not source_path or not os.path.exists(source_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    if not is_supported(source_path, content_type):
+        raise HTTPException(status_code=415, detail="Preview not available for this file type")
+
+    target = derived_path(source_path, kind)
+    if os.path.exists(target):
+        return FileResponse(target, media_type="image/jpeg")
+    if has_failed(source_path):
+        raise HTTPException(status_code=422, detail="Preview could not be generated from this file")
+
+    if not preview_pool.enqueue(source_path, content_type):
+        raise HTTPException(
+            status_code=503,
+            detail="Preview queue is full, try again later",
+            headers={"Retry-After": "30"},
+        )
+    return JSONResponse(status_code=202, content={"status": "pending"}, headers={"Retry-After": "2"})
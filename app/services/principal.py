@@ -0,0 +1,99 @@
+"""
+Quem faz a requisição, resolvido a partir do token antes das rotas.
+
+Usado pelos middlewares (cache de respostas, limites de requisições), que
+precisam do usuário e da empresa sem passar pelas dependências do FastAPI.
+O usuário é lido do banco uma vez a cada ``PRINCIPAL_TTL`` segundos por
+processo; alterações em usuários confirmadas no processo limpam o cache
+(``clear``), e as de outros workers chegam por ``app.services.invalidation``
+em até ``RESPONSE_CACHE_SYNC_INTERVAL`` segundos. O resultado fica no
+escopo ASGI, então os middlewares da mesma requisição decodificam o token
+uma vez só.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, MutableMapping, Optional, Tuple
+
+from jose import jwt
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.db.session import SessionLocal  # Importado antes dos modelos (ordem de registro)
+from app.core import security
+from app.core.config import settings
+from app.models.user import User
+from app.services import invalidation
+
+PRINCIPAL_TTL = 60
+SCOPE_KEY = "app.principal"
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    company_id: Optional[int]
+    is_superuser: bool
+
+    @property
+    def scope(self) -> str:
+        """Escopo de dados visível: todas as empresas ou só a do usuário."""
+        return "superuser" if self.is_superuser else f"company:{self.company_id}"
+
+
+# Usuário -> (validade, principal ou None se inativo/inexistente)
+_principals: Dict[int, Tuple[float, Optional[Principal]]] = {}
+_lock = threading.Lock()
+
+
+def clear() -> None:
+    with _lock:
+        _principals.clear()
+
+
+@invalidation.subscribe
+def _remote_changes(tags: Tuple[str, ...]) -> None:
+    if invalidation.ALL in tags or User.__tablename__ in tags:
+        clear()
+
+
+def resolve(authorization: Optional[str]) -> Optional[Principal]:
+    """Usuário ativo do token ``Bearer``, ou None (sem token, token inválido, usuário inativo)."""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(authorization[7:], settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+        user_id = int(payload["sub"])
+    except (jwt.JWTError, KeyError, TypeError, ValueError):
+        return None
+
+    # Antes do cache de usuários e do de respostas (consultado depois, na mesma requisição)
+    invalidation.sync()
+    now = time.monotonic()
+    with _lock:
+        cached = _principals.get(user_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    db = SessionLocal()
+    try:
+        row = db.execute(
+            select(User.is_active, User.is_superuser, User.company_id).where(User.id == user_id)
+        ).first()
+    finally:
+        db.close()
+    principal = None
+    if row is not None and row.is_active:
+        principal = Principal(user_id=user_id, company_id=row.company_id, is_superuser=bool(row.is_superuser))
+    with _lock:
+        _principals[user_id] = (now + PRINCIPAL_TTL, principal)
+    return principal
+
+
+async def from_scope(scope: MutableMapping[str, Any]) -> Optional[Principal]:
+    """``resolve`` para a requisição ASGI, guardado no escopo."""
+    if SCOPE_KEY not in scope:
+        authorization = Headers(scope=scope).get("authorization")
+        scope[SCOPE_KEY] = await run_in_threadpool(resolve, authorization) if authorization else None
+    return scope[SCOPE_KEY]
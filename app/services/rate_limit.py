@@ -0,0 +1,322 @@
+"""
+Limites de requisições por empresa e por usuário e controle de admissão.
+
+Limites (token bucket): cada usuário tem um balde de
+``RATE_LIMIT_USER_BURST`` requisições reabastecido a
+``RATE_LIMIT_USER_RATE`` por segundo, e cada empresa um balde próprio
+(``RATE_LIMIT_COMPANY_*``) compartilhado pelos seus usuários. As rotas caras
+(``EXPENSIVE_ROUTES``: painel, exportações) têm um balde separado por
+usuário, e o login um balde por endereço IP. Requisições sem token contam
+no balde do IP. Estourado o limite, a resposta é 429 com ``Retry-After``.
+Uma requisição só consome fichas se todos os seus baldes tiverem ficha: a
+recusa pelo balde da empresa não gasta o do usuário.
+
+O balde das rotas caras é cobrado por ``ExpensiveRouteLimitMiddleware``,
+registrado dentro do cache de respostas: acertos no cache não o consomem.
+
+Os baldes ficam na memória do processo ou, com ``RATE_LIMIT_REDIS_URL``,
+em um servidor compatível com o protocolo Redis (pacote ``redis``
+opcional), compartilhados entre workers. Falhas do servidor não bloqueiam
+a API: a requisição passa e o erro é registrado.
+
+Admissão: cada processo atende até ``MAX_CONCURRENT_REQUESTS`` requisições
+ao mesmo tempo, com no máximo ``MAX_QUEUED_REQUESTS`` esperando até
+``ADMISSION_TIMEOUT`` segundos por uma vaga. Fora disso a requisição é
+recusada na hora com 503 e ``Retry-After``, antes de ocupar threads e
+conexões do banco.
+"""
+import asyncio
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.services import principal
+
+logger = logging.getLogger(__name__)
+
+# Caminhos fora dos limites (verificação de saúde, métricas, documentação)
+EXEMPT_PATHS = ("/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+# Marca, no escopo ASGI, das sub-requisições de /batch
+BATCH_SCOPE_KEY = "app.batch"
+
+
+@dataclass(frozen=True)
+class Budget:
+    name: str
+    rate: float  # Requisições por segundo
+    burst: int  # Tamanho do balde
+
+
+def _budget(name: str) -> Budget:
+    return Budget(
+        name,
+        getattr(settings, f"RATE_LIMIT_{name.upper()}_RATE"),
+        getattr(settings, f"RATE_LIMIT_{name.upper()}_BURST"),
+    )
+
+
+# Rotas caras, com balde próprio por usuário
+EXPENSIVE_ROUTES = re.compile(
+    rf"^{re.escape(settings.API_V1_STR)}/(dashboard/|reports/|cashflow/|budgets/portfolio|exports/|.*/export$)"
+)
+LOGIN_ROUTES = re.compile(rf"^{re.escape(settings.API_V1_STR)}/login/")
+
+
+# ---------------------------------------------------------------------------
+# Baldes
+# ---------------------------------------------------------------------------
+
+class MemoryBackend:
+    """Baldes na memória do processo."""
+
+    name = "memory"
+    MAX_KEYS = 100_000
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # chave -> (fichas, instante)
+        self._lock = threading.Lock()
+
+    async def take(self, buckets: List[Tuple[str, Budget]]) -> Tuple[float, Optional[str]]:
+        """
+        Consome uma ficha de cada balde, se todos tiverem ficha. Retorna
+        (0, None), ou os segundos até a próxima ficha e o orçamento que recusou.
+        """
+        now = time.monotonic()
+        with self._lock:
+            refilled = []
+            wait, rejected = 0.0, None
+            for key, budget in buckets:
+                tokens, updated = self._buckets.get(key, (budget.burst, now))
+                tokens = min(budget.burst, tokens + (now - updated) * budget.rate)
+                refilled.append((key, tokens))
+                if tokens < 1 and (1 - tokens) / budget.rate > wait:
+                    wait, rejected = (1 - tokens) / budget.rate, budget.name
+            for key, tokens in refilled:
+                self._buckets[key] = (tokens if rejected else tokens - 1, now)
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune(now)
+        return wait, rejected
+
+    def _prune(self, now: float) -> None:
+        # Baldes parados há mais de um minuto já estariam cheios de novo (com as taxas usuais)
+        for key, (_, updated) in list(self._buckets.items()):
+            if now - updated > 60:
+                del self._buckets[key]
+
+
+# Token buckets atômicos no servidor (o relógio também é o do servidor). ARGV: taxa e
+# tamanho de cada balde de KEYS; retorna {espera, índice do balde que recusou ou 0}
+_REDIS_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = {}
+local wait, rejected = 0, 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local data = redis.call('HMGET', key, 'tokens', 'ts')
+    local ts = tonumber(data[2]) or now
+    tokens[i] = math.min(burst, (tonumber(data[1]) or burst) + math.max(0, now - ts) * rate)
+    if tokens[i] < 1 and (1 - tokens[i]) / rate > wait then
+        wait, rejected = (1 - tokens[i]) / rate, i
+    end
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    if rejected == 0 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', key, 'tokens', tokens[i], 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+return {tostring(wait), rejected}
+"""
+
+
+class RedisBackend:
+    """Baldes em um servidor com protocolo Redis, compartilhados entre processos."""
+
+    name = "redis"
+    PREFIX = "ratelimit:"
+
+    def __init__(self, url: str):
+        from redis import asyncio as redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._script = self._client.register_script(_REDIS_SCRIPT)
+
+    async def take(self, buckets: List[Tuple[str, Budget]]) -> Tuple[float, Optional[str]]:
+        args: List[float] = []
+        for _, budget in buckets:
+            args += [budget.rate, budget.burst]
+        try:
+            wait, rejected = await self._script(keys=[self.PREFIX + key for key, _ in buckets], args=args)
+        except Exception as e:
+            logger.warning(f"Erro no servidor de limites de requisições, liberando a requisição: {e}")
+            return 0.0, None
+        return float(wait), buckets[int(rejected) - 1][1].name if int(rejected) else None
+
+
+def create_backend():
+    if settings.RATE_LIMIT_REDIS_URL:
+        try:
+            return RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+        except ImportError:
+            logger.warning("RATE_LIMIT_REDIS_URL requer o pacote redis; usando limites em memória")
+    return MemoryBackend()
+
+
+# ---------------------------------------------------------------------------
+# Estatísticas
+# ---------------------------------------------------------------------------
+
+rejections: Counter = Counter()  # Motivo (orçamento ou "busy") -> requisições recusadas
+_stats_lock = threading.Lock()
+
+
+def _reject(reason: str) -> None:
+    with _stats_lock:
+        rejections[reason] += 1
+
+
+def _client_ip(scope: Dict[str, Any]) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def buckets_for(scope: Dict[str, Any], caller: Optional[principal.Principal]) -> List[Tuple[str, Budget]]:
+    """Baldes (chave, orçamento) que a requisição consome antes do cache (sem o das rotas caras)."""
+    path = scope["path"]
+    if LOGIN_ROUTES.match(path):
+        return [(f"login:{_client_ip(scope)}", _budget("login"))]
+    if caller is None:
+        return [(f"ip:{_client_ip(scope)}", _budget("user"))]
+    buckets = [(f"user:{caller.user_id}", _budget("user"))]
+    if not caller.is_superuser and caller.company_id is not None:
+        buckets.append((f"company:{caller.company_id}", _budget("company")))
+    return buckets
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+class AdmissionControl:
+    """Limita as requisições simultâneas do processo, com uma fila curta."""
+
+    def __init__(self, max_concurrent: int, max_queued: int, timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.active = 0
+        self.queued = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def acquire(self) -> bool:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._condition, self._loop = asyncio.Condition(), loop
+        async with self._condition:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                return True
+            if self.queued >= self.max_queued:
+                return False
+            self.queued += 1
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self.active < self.max_concurrent), self.timeout
+                )
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.queued -= 1
+            self.active += 1
+            return True
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+
+def _too_many(retry_after: float, detail: str, status_code: int) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail}, status_code=status_code, headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+backend = create_backend()
+admission = AdmissionControl(settings.MAX_CONCURRENT_REQUESTS, settings.MAX_QUEUED_REQUESTS, settings.ADMISSION_TIMEOUT)
+
+
+class RateLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        caller = await principal.from_scope(scope)
+        wait, rejected = await backend.take(buckets_for(scope, caller))
+        if rejected:
+            _reject(rejected)
+            await _too_many(wait, "Too many requests", 429)(scope, receive, send)
+            return
+
+        # Sub-requisições de um lote já ocupam a vaga da requisição do lote
+        if scope.get(BATCH_SCOPE_KEY):
+            await self.app(scope, receive, send)
+            return
+        if not await admission.acquire():
+            _reject("busy")
+            await _too_many(1, "Server busy, try again shortly", 503)(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await admission.release()
+
+
+class ExpensiveRouteLimitMiddleware:
+    """Balde das rotas caras; fica dentro do cache de respostas, só as faltas o consomem."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or not EXPENSIVE_ROUTES.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        caller = await principal.from_scope(scope)
+        if caller is not None:
+            wait, rejected = await backend.take([(f"expensive:{caller.user_id}", _budget("expensive"))])
+            if rejected:
+                _reject(rejected)
+                await _too_many(wait, "Too many requests", 429)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+def limiter_status() -> Dict[str, Any]:
+    with _stats_lock:
+        rejected = dict(rejections)
+    return {
+        "backend": backend.name,
+        "active_requests": admission.active,
+        "queued_requests": admission.queued,
+        "max_concurrent_requests": admission.max_concurrent,
+        "rejections": rejected,
+    }
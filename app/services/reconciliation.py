@@ -0,0 +1,421 @@
+"""
+Conciliação de extratos bancários (OFX/CSV) com despesas.
+
+Os lançamentos de débito são casados com despesas por valor, janela de
+datas e fornecedor (nome ou CNPJ/CPF). As despesas candidatas ficam em uma
+lista ordenada por valor; para cada lançamento uma busca binária delimita
+a faixa de tolerância de valor e só essa faixa é pontuada, evitando a
+comparação de todos os lançamentos com todas as despesas.
+"""
+import csv
+import hashlib
+import io
+import os
+import re
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+
+AMOUNT_TOLERANCE = 0.01  # Diferença máxima de valor (R$)
+DATE_WINDOW_DAYS = 5  # Diferença máxima entre data do lançamento e da despesa
+MAX_SUGGESTIONS = 3
+AUTO_MATCH_SCORE = 0.9  # Pontuação mínima para confirmar automaticamente
+
+_DIGITS = re.compile(r"\D")
+_DOCUMENT = re.compile(r"\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}|\d{3}\.?\d{3}\.?\d{3}-?\d{2}")
+_WORD = re.compile(r"[a-z0-9]{3,}")
+_OFX_TAG = re.compile(r"<(\w+)>([^<\r\n]*)")
+# Um só separador seguido de três dígitos: milhar (brasileiro) ou decimal (internacional)
+_AMBIGUOUS_AMOUNT = re.compile(r"[+-]?\d{1,3}[.,]\d{3}")
+
+
+class StatementError(ValueError):
+    """Extrato ilegível ou em formato não suportado."""
+
+
+class Candidate(NamedTuple):
+    amount: float
+    expense_id: int
+    date: date
+    description: str
+    supplier_name: Optional[str]
+    supplier_document: Optional[str]
+
+
+# ---------------------------------------------------------------------------
+# Leitura dos extratos
+# ---------------------------------------------------------------------------
+
+def _digits(value: Optional[str]) -> str:
+    return _DIGITS.sub("", value or "")
+
+
+def _extract_document(text: str) -> Optional[str]:
+    found = _DOCUMENT.search(text or "")
+    return _digits(found.group(0)) if found else None
+
+
+def _parse_amount(value: str) -> float:
+    """
+    Valor em formato brasileiro (1.234,56) ou internacional (1,234.56): o
+    último separador é o decimal, a menos que se repita (1.234.567). Com um
+    só separador seguido de três dígitos (1.234 ou 1,234) não há como saber
+    se é milhar ou decimal, e o valor é recusado.
+    """
+    text = value.strip().replace("R$", "").replace(" ", "")
+    separators = [char for char in text if char in ".,"]
+    if not separators:
+        return float(text)
+    decimal: Optional[str] = separators[-1]
+    if separators.count(decimal) > 1:
+        decimal = None
+    elif len(separators) == 1 and _AMBIGUOUS_AMOUNT.fullmatch(text):
+        raise ValueError(f"ambiguous amount {value!r} (write the decimals, e.g. 1.234,00)")
+    for separator in {".", ","} - {decimal}:
+        text = text.replace(separator, "")
+    if decimal is not None:
+        text = text.replace(decimal, ".")
+    return float(text)
+
+
+def _parse_date(value: str) -> date:
+    value = value.strip()
+    # OFX usa AAAAMMDD[HHMMSS[.XXX][fuso]]; planilhas usam ISO ou DD/MM/AAAA
+    attempts = (
+        (value[:10], "%Y-%m-%d"),
+        (value[:10], "%d/%m/%Y"),
+        (value[:8], "%d/%m/%y"),
+        (value[:8], "%Y%m%d"),
+    )
+    for text, fmt in attempts:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"invalid date {value!r}")
+
+
+def _decode(content: bytes) -> str:
+    try:
+        return content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # OFX de bancos brasileiros costuma vir em CP1252
+        return content.decode("cp1252", errors="replace")
+
+
+def parse_ofx(content: bytes) -> List[Dict[str, Any]]:
+    transactions = []
+    for block in _decode(content).split("<STMTTRN>")[1:]:
+        block = block.split("</STMTTRN>")[0]
+        tags = {name.upper(): value.strip() for name, value in _OFX_TAG.findall(block)}
+        if "TRNAMT" not in tags or "DTPOSTED" not in tags:
+            continue
+        description = " ".join(filter(None, (tags.get("NAME"), tags.get("MEMO"))))
+        try:
+            posted_date = _parse_date(tags["DTPOSTED"])
+            amount = _parse_amount(tags["TRNAMT"])
+        except ValueError as e:
+            raise StatementError(f"Transaction {tags.get('FITID') or tags['DTPOSTED']}: {e}")
+        transactions.append({
+            "fitid": tags.get("FITID") or None,
+            "posted_date": posted_date,
+            "amount": amount,
+            "description": description,
+            "document": _extract_document(description),
+        })
+    return transactions
+
+
+_CSV_COLUMNS = {
+    "date": ("date", "data", "posted_date", "data_lancamento"),
+    "amount": ("amount", "valor", "value"),
+    "description": ("description", "descricao", "descrição", "historico", "histórico", "memo"),
+    "document": ("document", "documento", "cnpj", "cpf"),
+    "fitid": ("fitid", "id", "identificador"),
+}
+
+
+def parse_csv(content: bytes) -> List[Dict[str, Any]]:
+    text = _decode(content)
+    try:
+        dialect = csv.Sniffer().sniff(text[:8192], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(io.StringIO(text), dialect)
+    header = [value.strip().lower().replace(" ", "_") for value in next(reader, [])]
+    positions = {}
+    for field, aliases in _CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in header:
+                positions[field] = header.index(alias)
+                break
+    if "date" not in positions or "amount" not in positions:
+        raise StatementError("CSV statement must have date and amount columns")
+
+    transactions = []
+    for line, values in enumerate(reader, start=2):
+        if not any(value.strip() for value in values):
+            continue
+        get = lambda field: values[positions[field]].strip() if field in positions else ""
+        try:
+            posted_date = _parse_date(get("date"))
+            amount = _parse_amount(get("amount"))
+        except (ValueError, IndexError) as e:
+            raise StatementError(f"Line {line}: {e}")
+        description = get("description")
+        transactions.append({
+            "fitid": get("fitid") or None,
+            "posted_date": posted_date,
+            "amount": amount,
+            "description": description,
+            "document": _digits(get("document")) or _extract_document(description),
+        })
+    return transactions
+
+
+def parse_statement(content: bytes, filename: str) -> List[Dict[str, Any]]:
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in (".ofx", ".qfx"):
+        transactions = parse_ofx(content)
+    elif extension in (".csv", ".txt"):
+        transactions = parse_csv(content)
+    else:
+        raise StatementError(f"Unsupported statement type: {extension or filename}")
+
+    # Sem FITID (CSV), gera um identificador estável a partir do conteúdo do lançamento
+    seen: Dict[str, int] = {}
+    for transaction in transactions:
+        if transaction["fitid"]:
+            continue
+        key = f"{transaction['posted_date']}|{transaction['amount']:.2f}|{transaction['description']}"
+        seen[key] = seen.get(key, 0) + 1
+        transaction["fitid"] = hashlib.sha1(f"{key}|{seen[key]}".encode("utf-8")).hexdigest()
+    return transactions
+
+
+# ---------------------------------------------------------------------------
+# Casamento
+# ---------------------------------------------------------------------------
+
+def load_candidates(
+    db: Session, *, company_id: int, date_from: date, date_to: date
+) -> List[Candidate]:
+    """Despesas ainda não conciliadas no intervalo, ordenadas por valor."""
+    matched = select(models.BankTransaction.expense_id).where(
+        models.BankTransaction.expense_id.isnot(None)
+    )
+    rows = db.execute(
+        select(
+            models.Expense.amount,
+            models.Expense.id,
+            models.Expense.date,
+            models.Expense.description,
+            models.Expense.supplier_name,
+            models.Expense.supplier_document,
+        )
+        .join(models.Project, models.Project.id == models.Expense.project_id)
+        .where(
+            models.Project.company_id == company_id,
+            models.Expense.date >= date_from,
+            models.Expense.date <= date_to,
+            models.Expense.id.notin_(matched),
+        )
+        .order_by(models.Expense.amount)
+    ).all()
+    return [Candidate(*row) for row in rows]
+
+
+def _text_score(description: str, document: Optional[str], candidate: Candidate) -> float:
+    supplier_document = _digits(candidate.supplier_document)
+    if supplier_document and (
+        supplier_document == document or supplier_document in _digits(description)
+    ):
+        return 1.0
+    # Fração das palavras do fornecedor presentes no histórico do banco
+    words = set(_WORD.findall((description or "").lower()))
+    supplier = set(_WORD.findall((candidate.supplier_name or candidate.description).lower()))
+    if not words or not supplier:
+        return 0.0
+    return len(words & supplier) / len(supplier)
+
+
+def score_candidates(
+    transaction_date: date,
+    amount: float,
+    description: str,
+    document: Optional[str],
+    candidates: List[Candidate],
+    amounts: List[float],
+    *,
+    amount_tolerance: float = AMOUNT_TOLERANCE,
+    date_window_days: int = DATE_WINDOW_DAYS,
+) -> List[Tuple[float, Candidate]]:
+    """
+    Pontua as despesas compatíveis com um lançamento de débito.
+
+    ``amounts`` é a lista de valores de ``candidates`` (mesma ordem, crescente).
+    """
+    target = abs(amount)
+    start = bisect_left(amounts, target - amount_tolerance)
+    end = bisect_right(amounts, target + amount_tolerance)
+    scored = []
+    for candidate in candidates[start:end]:
+        days = abs((candidate.date - transaction_date).days)
+        if days > date_window_days:
+            continue
+        amount_score = 1.0 - abs(candidate.amount - target) / (amount_tolerance or 1.0)
+        date_score = 1.0 - days / (date_window_days + 1)
+        text_score = _text_score(description, document, candidate)
+        score = 0.4 * amount_score + 0.3 * date_score + 0.3 * text_score
+        scored.append((round(score, 4), candidate))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored
+
+
+def _suggestion(score: float, candidate: Candidate) -> schemas.MatchSuggestion:
+    return schemas.MatchSuggestion(
+        expense_id=candidate.expense_id,
+        score=score,
+        amount=candidate.amount,
+        date=candidate.date,
+        description=candidate.description,
+        supplier_name=candidate.supplier_name,
+        supplier_document=candidate.supplier_document,
+    )
+
+
+def suggest_matches(
+    db: Session,
+    transactions: List[models.BankTransaction],
+    *,
+    company_id: int,
+    amount_tolerance: float = AMOUNT_TOLERANCE,
+    date_window_days: int = DATE_WINDOW_DAYS,
+    max_suggestions: int = MAX_SUGGESTIONS,
+) -> Tuple[Dict[int, List[Tuple[float, Candidate]]], Dict[int, Tuple[float, Candidate]]]:
+    """
+    Calcula sugestões por lançamento e a melhor atribuição um-para-um.
+
+    Retorna ``(sugestões, atribuição)`` indexados pelo id do lançamento. A
+    atribuição é gulosa pela pontuação, de modo que uma despesa nunca é
+    usada por dois lançamentos.
+    """
+    debits = [t for t in transactions if t.amount < 0 and t.expense_id is None and not t.ignored]
+    if not debits:
+        return {}, {}
+    window = timedelta(days=date_window_days)
+    candidates = load_candidates(
+        db,
+        company_id=company_id,
+        date_from=min(t.posted_date for t in debits) - window,
+        date_to=max(t.posted_date for t in debits) + window,
+    )
+    amounts = [candidate.amount for candidate in candidates]
+
+    suggestions = {}
+    pairs = []
+    for transaction in debits:
+        scored = score_candidates(
+            transaction.posted_date,
+            transaction.amount,
+            transaction.description,
+            transaction.document,
+            candidates,
+            amounts,
+            amount_tolerance=amount_tolerance,
+            date_window_days=date_window_days,
+        )
+        suggestions[transaction.id] = scored[:max_suggestions]
+        pairs.extend((score, transaction.id, candidate) for score, candidate in scored)
+
+    assignment = {}
+    used = set()
+    for score, transaction_id, candidate in sorted(pairs, key=lambda item: item[0], reverse=True):
+        if transaction_id in assignment or candidate.expense_id in used:
+            continue
+        assignment[transaction_id] = (score, candidate)
+        used.add(candidate.expense_id)
+    return suggestions, assignment
+
+
+def reconcile_statement(
+    db: Session,
+    content: bytes,
+    filename: str,
+    *,
+    company_id: int,
+    user_id: int,
+    auto_match: bool = True,
+    amount_tolerance: float = AMOUNT_TOLERANCE,
+    date_window_days: int = DATE_WINDOW_DAYS,
+) -> schemas.ReconciliationReport:
+    """Importa um extrato, confirma os casamentos seguros e sugere os demais."""
+    parsed = parse_statement(content, filename)
+    report = schemas.ReconciliationReport()
+
+    existing = crud.bank_transaction.get_existing_fitids(
+        db, company_id=company_id, fitids=(t["fitid"] for t in parsed)
+    )
+    transactions = []
+    for data in parsed:
+        if data["fitid"] in existing:
+            report.duplicates += 1
+            continue
+        existing.add(data["fitid"])
+        transactions.append(models.BankTransaction(company_id=company_id, **data))
+    db.add_all(transactions)
+    db.flush()
+    report.imported = len(transactions)
+
+    suggestions, assignment = suggest_matches(
+        db,
+        transactions,
+        company_id=company_id,
+        amount_tolerance=amount_tolerance,
+        date_window_days=date_window_days,
+    )
+    now = datetime.utcnow()
+    for transaction in transactions:
+        if auto_match and transaction.id in assignment:
+            score, candidate = assignment[transaction.id]
+            if score >= AUTO_MATCH_SCORE:
+                transaction.expense_id = candidate.expense_id
+                transaction.match_score = score
+                transaction.matched_at = now
+                transaction.matched_by_id = user_id
+                report.auto_matched += 1
+                continue
+        if transaction.id in suggestions:
+            report.unmatched.append(schemas.TransactionSuggestions(
+                transaction=transaction,
+                suggestions=[_suggestion(*item) for item in suggestions[transaction.id]],
+            ))
+    db.commit()
+    return report
+
+
+def transaction_suggestions(
+    db: Session,
+    transaction: models.BankTransaction,
+    *,
+    amount_tolerance: float = AMOUNT_TOLERANCE,
+    date_window_days: int = DATE_WINDOW_DAYS,
+    max_suggestions: int = MAX_SUGGESTIONS,
+) -> schemas.TransactionSuggestions:
+    suggestions, _ = suggest_matches(
+        db,
+        [transaction],
+        company_id=transaction.company_id,
+        amount_tolerance=amount_tolerance,
+        date_window_days=date_window_days,
+        max_suggestions=max_suggestions,
+    )
+    return schemas.TransactionSuggestions(
+        transaction=transaction,
+        suggestions=[_suggestion(*item) for item in suggestions.get(transaction.id, [])],
+    )
@@ -0,0 +1,318 @@
+"""
+Relatório de resultado (P&L) por projeto.
+
+O relatório é lido de uma tabela de resumo com uma linha por projeto, de
+modo que o tempo da requisição não depende do volume de despesas, imóveis
+ou contratos. No PostgreSQL o resumo é uma ``MATERIALIZED VIEW`` com índice
+único, atualizada com ``REFRESH ... CONCURRENTLY`` (as leituras continuam
+durante a atualização); nos demais bancos é uma tabela comum, regravada em
+uma transação.
+
+Receita: preço de venda dos imóveis vendidos mais o valor dos contratos
+assinados (ativos, vencidos ou finalizados; pendentes e cancelados não
+entram, e contratos de venda de imóveis já vendidos não entram de novo).
+Como no fluxo de caixa, em locação/arrendamento ``contract_value`` é a
+parcela mensal: entram as parcelas do mês da assinatura até o mês corrente
+(ou o do vencimento, se anterior), na data da atualização do resumo. Custo:
+despesas por categoria (de ``ExpenseRollup``) e custo de construção
+previsto dos imóveis.
+
+A atualização acontece sob demanda (``refresh_pnl``), periodicamente dentro
+da aplicação (``PNL_REFRESH_INTERVAL``) ou pela linha de comando::
+
+    python -m app.services.reports [--recreate]
+"""
+import argparse
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import (
+    Column, DateTime, Float, Integer, MetaData, String, Table, and_, case, extract, func, inspect, not_, or_, select,
+    text,
+)
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal  # Importado antes dos modelos (ordem de registro)
+from app.core.config import settings
+from app.models.contract import Contract, ContractStatus, ContractType
+from app.models.expense import Expense, ExpenseCategory
+from app.models.project import Project
+from app.models.property import Property, PropertyStatus
+from app.models.rollup import ExpenseRollup
+
+logger = logging.getLogger(__name__)
+
+# Contratos assinados (os pendentes ainda não são receita)
+SIGNED_STATUSES = (ContractStatus.ACTIVE, ContractStatus.EXPIRED, ContractStatus.COMPLETED)
+# Contratos com parcela mensal (como em app.services.cashflow)
+SCHEDULED_TYPES = (ContractType.RENTAL, ContractType.LEASE)
+
+PNL_NAME = "projectpnl"
+# Chave do advisory lock que evita atualizações simultâneas (vários workers)
+PNL_LOCK_KEY = 7_340_001
+
+EXPENSE_COLUMNS = {category: f"expenses_{category.value}" for category in ExpenseCategory}
+
+# Fora de ``Base.metadata``: no PostgreSQL o objeto é uma view, não uma tabela
+pnl_table = Table(
+    PNL_NAME,
+    MetaData(),
+    Column("project_id", Integer, primary_key=True),
+    Column("company_id", Integer, index=True),
+    Column("name", String),
+    Column("total_area", Float),
+    Column("budget", Float),
+    Column("properties", Integer),
+    Column("properties_sold", Integer),
+    Column("built_area", Float),
+    Column("sold_area", Float),
+    Column("list_value", Float),
+    Column("sales_revenue", Float),
+    Column("contract_revenue", Float),
+    Column("construction_cost", Float),
+    Column("expenses", Float),
+    *[Column(name, Float) for name in EXPENSE_COLUMNS.values()],
+    Column("refreshed_at", DateTime),
+)
+
+
+def _month_number(value):
+    return extract("year", value) * 12 + extract("month", value)
+
+
+def pnl_select(*, from_rollups: bool = True):
+    """
+    Consulta que gera o resumo (uma linha por projeto). Com ``from_rollups``
+    falso as despesas são somadas direto na tabela de despesas.
+    """
+    sold = or_(Property.is_sold.is_(True), Property.status == PropertyStatus.SOLD)
+    properties = (
+        select(
+            Property.project_id,
+            func.count(Property.id).label("properties"),
+            func.sum(case((sold, 1), else_=0)).label("properties_sold"),
+            func.sum(Property.area).label("built_area"),
+            func.sum(case((sold, Property.area), else_=0.0)).label("sold_area"),
+            func.sum(Property.price).label("list_value"),
+            func.sum(case((sold, Property.sale_price), else_=0.0)).label("sales_revenue"),
+            func.sum(Property.construction_cost).label("construction_cost"),
+        )
+        .group_by(Property.project_id)
+        .subquery()
+    )
+    # Parcelas de locação/arrendamento vencidas até hoje (ou até o vencimento do contrato)
+    accrued_until = case(
+        (Contract.expiration_date < func.current_date(), Contract.expiration_date), else_=func.current_date()
+    )
+    installments = _month_number(accrued_until) - _month_number(Contract.signing_date) + 1
+    contract_revenue = case(
+        (Contract.type.in_(SCHEDULED_TYPES), case((installments > 0, installments), else_=0) * Contract.contract_value),
+        else_=Contract.contract_value,
+    )
+    contracts = (
+        select(Property.project_id, func.sum(contract_revenue).label("contract_revenue"))
+        .join(Property, Contract.property_id == Property.id)
+        .where(
+            Contract.status.in_(SIGNED_STATUSES),
+            not_(and_(Contract.type == ContractType.SALE, sold)),
+        )
+        .group_by(Property.project_id)
+        .subquery()
+    )
+    if from_rollups:
+        expense_project, expense_category, expense_total = (
+            ExpenseRollup.project_id, ExpenseRollup.category, ExpenseRollup.total
+        )
+    else:
+        expense_project, expense_category, expense_total = Expense.project_id, Expense.category, Expense.amount
+    expenses = (
+        select(
+            expense_project.label("project_id"),
+            func.sum(expense_total).label("expenses"),
+            *[
+                func.sum(case((expense_category == category, expense_total), else_=0.0)).label(name)
+                for category, name in EXPENSE_COLUMNS.items()
+            ],
+        )
+        .group_by(expense_project)
+        .subquery()
+    )
+
+    def total(column):
+        return func.coalesce(column, 0.0)
+
+    return (
+        select(
+            Project.id.label("project_id"),
+            Project.company_id,
+            Project.name,
+            Project.total_area,
+            Project.budget,
+            func.coalesce(properties.c.properties, 0).label("properties"),
+            func.coalesce(properties.c.properties_sold, 0).label("properties_sold"),
+            total(properties.c.built_area).label("built_area"),
+            total(properties.c.sold_area).label("sold_area"),
+            total(properties.c.list_value).label("list_value"),
+            total(properties.c.sales_revenue).label("sales_revenue"),
+            total(contracts.c.contract_revenue).label("contract_revenue"),
+            total(properties.c.construction_cost).label("construction_cost"),
+            total(expenses.c.expenses).label("expenses"),
+            *[total(expenses.c[name]).label(name) for name in EXPENSE_COLUMNS.values()],
+            func.current_timestamp().label("refreshed_at"),
+        )
+        .outerjoin(properties, properties.c.project_id == Project.id)
+        .outerjoin(contracts, contracts.c.project_id == Project.id)
+        .outerjoin(expenses, expenses.c.project_id == Project.id)
+    )
+
+
+def _is_postgresql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def ensure_pnl_views(db: Session, *, recreate: bool = False) -> None:
+    """Cria a view materializada (PostgreSQL) ou a tabela de resumo, se ainda não existirem."""
+    if _is_postgresql(db):
+        if recreate:
+            db.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {PNL_NAME}"))
+        exists = db.execute(
+            text("SELECT 1 FROM pg_matviews WHERE matviewname = :name"), {"name": PNL_NAME}
+        ).first()
+        if not exists:
+            query = pnl_select().compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+            db.execute(text(f"CREATE MATERIALIZED VIEW {PNL_NAME} AS {query}"))
+            # REFRESH ... CONCURRENTLY exige um índice único
+            db.execute(text(f"CREATE UNIQUE INDEX ix_{PNL_NAME}_project_id ON {PNL_NAME} (project_id)"))
+            db.execute(text(f"CREATE INDEX ix_{PNL_NAME}_company_id ON {PNL_NAME} (company_id)"))
+        db.commit()
+        return
+
+    if recreate:
+        pnl_table.drop(db.connection(), checkfirst=True)
+    if not inspect(db.connection()).has_table(PNL_NAME):
+        pnl_table.create(db.connection())
+        db.commit()
+        refresh_pnl(db)
+
+
+def refresh_pnl(db: Session) -> bool:
+    """
+    Atualiza o resumo. No PostgreSQL, retorna ``False`` sem fazer nada se
+    outra atualização estiver em andamento.
+    """
+    if _is_postgresql(db):
+        if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": PNL_LOCK_KEY}).scalar():
+            db.rollback()
+            return False
+        populated = db.execute(
+            text("SELECT ispopulated FROM pg_matviews WHERE matviewname = :name"), {"name": PNL_NAME}
+        ).scalar()
+        # A primeira carga não pode ser concorrente
+        concurrently = "CONCURRENTLY " if populated else ""
+        db.execute(text(f"REFRESH MATERIALIZED VIEW {concurrently}{PNL_NAME}"))
+    else:
+        db.execute(pnl_table.delete())
+        db.execute(pnl_table.insert().from_select([column.name for column in pnl_table.columns], pnl_select()))
+    db.commit()
+    return True
+
+
+def _ratio(numerator: float, denominator: Optional[float]) -> Optional[float]:
+    if not denominator:
+        return None
+    return round(numerator / denominator, 2)
+
+
+def read_pnl(
+    db: Session, *, company_id: Optional[int] = None, project_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Linhas do resumo com margem e preço por m² calculados."""
+    statement = select(pnl_table).order_by(pnl_table.c.project_id)
+    if company_id is not None:
+        statement = statement.where(pnl_table.c.company_id == company_id)
+    if project_id is not None:
+        statement = statement.where(pnl_table.c.project_id == project_id)
+    return [pnl_row(row._mapping) for row in db.execute(statement)]
+
+
+def pnl_row(row: Any) -> Dict[str, Any]:
+    """Calcula receita, margem e preços por m² de uma linha do resumo (mapeamento coluna -> valor)."""
+    revenue = row["sales_revenue"] + row["contract_revenue"]
+    margin = revenue - row["expenses"]
+    return {
+        "project_id": row["project_id"],
+        "company_id": row["company_id"],
+        "name": row["name"],
+        "properties": row["properties"],
+        "properties_sold": row["properties_sold"],
+        "sales_revenue": round(row["sales_revenue"], 2),
+        "contract_revenue": round(row["contract_revenue"], 2),
+        "revenue": round(revenue, 2),
+        "expenses": round(row["expenses"], 2),
+        "expenses_by_category": {
+            category.value: round(row[name], 2) for category, name in EXPENSE_COLUMNS.items()
+        },
+        "construction_cost": round(row["construction_cost"], 2),
+        "budget": row["budget"],
+        "margin": round(margin, 2),
+        "margin_percent": _ratio(margin * 100, revenue),
+        "sold_price_per_m2": _ratio(row["sales_revenue"], row["sold_area"]),
+        "list_price_per_m2": _ratio(row["list_value"], row["built_area"]),
+        "cost_per_m2": _ratio(row["expenses"], row["built_area"] or row["total_area"]),
+        "refreshed_at": row["refreshed_at"],
+    }
+
+
+class PnlRefresher:
+    """Atualiza o resumo periodicamente em uma thread de fundo."""
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="pnl-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        # Atualiza ao iniciar e depois a cada intervalo
+        while True:
+            db = SessionLocal()
+            try:
+                refresh_pnl(db)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Erro ao atualizar o relatório de resultado: {e}")
+            finally:
+                db.close()
+            if self._stop.wait(self.interval):
+                break
+
+
+pnl_refresher = PnlRefresher(settings.PNL_REFRESH_INTERVAL)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Atualiza o relatório de resultado por projeto")
+    parser.add_argument("--recreate", action="store_true", help="Recria a view/tabela (após mudanças no esquema)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        ensure_pnl_views(db, recreate=args.recreate)
+        refresh_pnl(db)
+    finally:
+        db.close()
+    logger.info("Relatório de resultado atualizado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""
+Cache de respostas GET (middleware ASGI).
+
+Só as rotas de ``POLICIES`` são guardadas, cada uma com seu TTL e as
+etiquetas (nomes de tabelas) de que a resposta depende. A chave é o
+caminho, os parâmetros (em ordem) e o escopo de quem pede: a empresa do
+usuário, ``superuser`` ou, nas rotas com dados do próprio usuário, o
+usuário. As verificações de permissão das rotas são por empresa, então uma
+resposta 200 guardada para um usuário vale para os outros do mesmo escopo;
+sem token válido ou com usuário inativo a requisição segue direto para a
+aplicação.
+
+A resposta é guardada sem compressão e com uma variante gzip gerada uma
+vez só; o middleware fica antes do ``GZipMiddleware``, que assim não
+recomprime o mesmo conteúdo a cada acerto. Cabeçalhos condicionais são
+avaliados aqui contra o ``ETag`` e o ``Last-Modified`` guardados
+(``app.services.conditional``).
+
+Invalidação: gravações pelo ORM etiquetam a sessão com as tabelas
+alteradas e, no commit, as entradas com essas etiquetas são descartadas;
+gravações fora do ORM (importação, exclusão em massa) chamam
+``mark_changed``/``invalidate``. O cache é por processo: as invalidações
+são publicadas em ``CacheVersion`` e os outros workers as aplicam em até
+``RESPONSE_CACHE_SYNC_INTERVAL`` segundos (``app.services.invalidation``).
+O tamanho total é limitado por ``RESPONSE_CACHE_MAX_BYTES``, com descarte
+LRU.
+"""
+import gzip
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from starlette.datastructures import Headers
+
+from app.db.session import SessionLocal  # noqa: F401  Importado antes dos modelos (ordem de registro)
+from app.core.config import settings
+from app.models.base import BaseModel
+from app.models.user import User
+from app.services import invalidation, principal
+from app.services.conditional import not_modified, parse_http_date
+
+SESSION_FLAG = "response_cache_tags"
+
+# Cabeçalhos que não vão para a aplicação quando a resposta será guardada
+_FORWARD_SKIP = {b"accept-encoding", b"if-none-match", b"if-modified-since"}
+# Cabeçalhos da resposta que não são guardados (recalculados a cada envio)
+_STORE_SKIP = {b"content-length", b"content-encoding", b"vary", b"set-cookie"}
+# Cabeçalhos repetidos na resposta 304
+_NOT_MODIFIED_HEADERS = {b"etag", b"last-modified", b"cache-control"}
+
+_DATA = ("project", "property", "contract", "lead", "client", "expense", "expenserollup")
+# Projetos com os relacionamentos que podem vir em expand=
+_PROJECT = ("project", "company", "user", "teamproject", "property", "projecttask", "projectupdate")
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    route: str  # Caminho sob API_V1_STR, com {parâmetros}
+    ttl: int
+    tags: Tuple[str, ...]
+    per_user: bool = False
+
+    @property
+    def pattern(self) -> "re.Pattern[str]":
+        path = re.sub(r"\\\{[^}]+\\\}", "[^/]+", re.escape(settings.API_V1_STR + self.route))
+        return re.compile(path + "$")
+
+
+POLICIES = [
+    RoutePolicy("/companies/", 300, ("company",)),
+    RoutePolicy("/companies/summary", 300, ("company",)),
+    RoutePolicy("/companies/{company_id}", 300, ("company",)),
+    RoutePolicy("/users/", 60, ("user",)),
+    RoutePolicy("/users/summary", 60, ("user",)),
+    RoutePolicy("/users/me", 60, ("user",), per_user=True),
+    RoutePolicy("/teams/", 120, ("team",)),
+    RoutePolicy("/teams/{team_id}", 120, ("team",)),
+    RoutePolicy("/projects/", 60, _PROJECT),
+    RoutePolicy("/projects/summary", 60, ("project",)),
+    RoutePolicy("/projects/{project_id}", 60, _PROJECT),
+    RoutePolicy("/dashboard/summary", 30, _DATA),
+    RoutePolicy("/dashboard/recent_activities", 30, _DATA),
+    RoutePolicy("/dashboard/active_projects", 30, ("project",)),
+    RoutePolicy("/budgets/portfolio", 60, ("project", "expense", "expenserollup")),
+    RoutePolicy("/cashflow/portfolio", 60, ("project", "property", "contract", "expense", "expenserollup")),
+]
+_COMPILED = [(policy.pattern, policy) for policy in POLICIES]
+# Etiquetas publicadas para os outros processos: as das rotas e a dos usuários (principal)
+_SHARED_TAGS = {tag for policy in POLICIES for tag in policy.tags} | {User.__tablename__}
+
+
+def match_policy(path: str) -> Optional[RoutePolicy]:
+    for pattern, policy in _COMPILED:
+        if pattern.match(path):
+            return policy
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Armazenamento
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Entry:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    gzipped: Optional[bytes]
+    expires: float
+    tags: Tuple[str, ...]
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzipped or b"") + sum(len(k) + len(v) for k, v in self.headers)
+
+
+@dataclass
+class _Stats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    by_route: Dict[str, List[int]] = field(default_factory=dict)  # rota -> [acertos, faltas]
+
+
+_entries: "OrderedDict[Hashable, Entry]" = OrderedDict()
+_by_tag: Dict[str, Set[Hashable]] = {}
+_versions: Dict[str, int] = {}
+_generation = 0  # Incrementado a cada invalidação total
+_size = 0
+_stats = _Stats()
+_lock = threading.Lock()
+
+
+def _remove(key: Hashable) -> None:
+    global _size
+    entry = _entries.pop(key, None)
+    if entry is None:
+        return
+    _size -= entry.size
+    for tag in entry.tags:
+        keys = _by_tag.get(tag)
+        if keys is not None:
+            keys.discard(key)
+
+
+def _versions_of(tags: Tuple[str, ...]) -> Tuple[int, ...]:
+    return (_generation,) + tuple(_versions.get(tag, 0) for tag in tags)
+
+
+def lookup(key: Hashable, route: str) -> Optional[Entry]:
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry.expires <= time.monotonic():
+            _remove(key)
+            entry = None
+        counters = _stats.by_route.setdefault(route, [0, 0])
+        if entry is None:
+            _stats.misses += 1
+            counters[1] += 1
+            return None
+        _entries.move_to_end(key)
+        _stats.hits += 1
+        counters[0] += 1
+        return entry
+
+
+def store(key: Hashable, entry: Entry, versions: Tuple[int, ...]) -> bool:
+    """Guarda a entrada, a menos que alguma etiqueta tenha sido invalidada durante o cálculo."""
+    global _size
+    if entry.size > settings.RESPONSE_CACHE_MAX_ENTRY_BYTES:
+        return False
+    with _lock:
+        if _versions_of(entry.tags) != versions:
+            return False
+        _remove(key)
+        _entries[key] = entry
+        _size += entry.size
+        for tag in entry.tags:
+            _by_tag.setdefault(tag, set()).add(key)
+        _stats.stores += 1
+        while _size > settings.RESPONSE_CACHE_MAX_BYTES and _entries:
+            _remove(next(iter(_entries)))
+            _stats.evictions += 1
+    return True
+
+
+def invalidate(*tags: str) -> None:
+    """Descarta as respostas que dependem das tabelas ``tags`` (todas, sem argumentos), em todos os processos."""
+    _invalidate_local(*tags)
+    shared = [tag for tag in tags if tag in _SHARED_TAGS]
+    if shared or not tags:
+        invalidation.publish(shared)
+
+
+def _invalidate_local(*tags: str) -> None:
+    global _size, _generation
+    with _lock:
+        if not tags:
+            _entries.clear()
+            _by_tag.clear()
+            _size = 0
+            _generation += 1
+            principal.clear()
+            _stats.invalidations += 1
+            return
+        for tag in tags:
+            _versions[tag] = _versions.get(tag, 0) + 1
+            for key in list(_by_tag.pop(tag, ())):
+                _remove(key)
+        if User.__tablename__ in tags:
+            principal.clear()
+        _stats.invalidations += 1
+
+
+def mark_changed(db: Session, *tags: str) -> None:
+    """Invalida as etiquetas quando a transação de ``db`` for confirmada (gravações fora do ORM)."""
+    db.info.setdefault(SESSION_FLAG, set()).update(tags)
+
+
+def cache_status() -> Dict[str, Any]:
+    with _lock:
+        lookups = _stats.hits + _stats.misses
+        return {
+            "entries": len(_entries),
+            "size_bytes": _size,
+            "max_bytes": settings.RESPONSE_CACHE_MAX_BYTES,
+            "hits": _stats.hits,
+            "misses": _stats.misses,
+            "hit_ratio": _stats.hits / lookups if lookups else None,
+            "stores": _stats.stores,
+            "evictions": _stats.evictions,
+            "invalidations": _stats.invalidations,
+            "routes": {
+                route: {"hits": hits, "misses": misses, "hit_ratio": hits / (hits + misses)}
+                for route, (hits, misses) in _stats.by_route.items()
+                if hits + misses
+            },
+        }
+
+
+def _changed(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        mark_changed(session, target.__tablename__)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(BaseModel, _event, _changed, propagate=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _session_committed(session: Session) -> None:
+    tags = session.info.pop(SESSION_FLAG, None)
+    if tags:
+        invalidate(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _session_rolled_back(session: Session) -> None:
+    session.info.pop(SESSION_FLAG, None)
+
+
+# Invalidações publicadas por outros processos
+@invalidation.subscribe
+def _remote_changes(tags: Tuple[str, ...]) -> None:
+    if invalidation.ALL in tags:
+        _invalidate_local()
+    else:
+        _invalidate_local(*tags)
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+def _accepts_gzip(headers: Headers) -> bool:
+    return "gzip" in headers.get("accept-encoding", "").lower()
+
+
+class ResponseCacheMiddleware:
+    def __init__(self, app, minimum_size: int = 500):
+        self.app = app
+        self.minimum_size = minimum_size  # Respostas menores não ganham variante gzip
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or not settings.RESPONSE_CACHE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        policy = match_policy(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+        caller = await principal.from_scope(scope)
+        if caller is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+        key = (scope["path"], query, f"user:{caller.user_id}" if policy.per_user else caller.scope)
+
+        bypass = "no-cache" in headers.get("cache-control", "").lower()
+        entry = None if bypass else lookup(key, policy.route)
+        if entry is not None:
+            await self._send(send, entry, headers, "HIT")
+            return
+
+        with _lock:
+            versions = _versions_of(policy.tags)
+        forwarded = dict(scope)
+        forwarded["headers"] = [(name, value) for name, value in scope["headers"] if name not in _FORWARD_SKIP]
+        start: Dict[str, Any] = {}
+        chunks: List[bytes] = []
+
+        async def capture(message) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(forwarded, receive, capture)
+
+        body = b"".join(chunks)
+        response_headers = [(name, value) for name, value in start.get("headers", []) if name not in _STORE_SKIP]
+        validators = {
+            name: value.decode("latin-1") for name, value in response_headers if name in (b"etag", b"last-modified")
+        }
+        last_modified = validators.get(b"last-modified")
+        entry = Entry(
+            status=start.get("status", 500),
+            headers=response_headers,
+            body=body,
+            gzipped=gzip.compress(body, compresslevel=6) if len(body) >= self.minimum_size else None,
+            expires=time.monotonic() + policy.ttl,
+            tags=policy.tags,
+            etag=validators.get(b"etag"),
+            last_modified=parse_http_date(last_modified) if last_modified else None,
+        )
+        if entry.status != 200:
+            # Erros e redirecionamentos seguem como a aplicação respondeu
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+        store(key, entry, versions)
+        await self._send(send, entry, headers, "MISS")
+
+    async def _send(self, send, entry: Entry, request_headers: Headers, result: str) -> None:
+        # A resposta depende do token e, com variante gzip, da codificação aceita
+        vary = b"Authorization, Accept-Encoding" if entry.gzipped is not None else b"Authorization"
+        extra = [(b"vary", vary), (b"x-cache", result.encode())]
+        if not_modified(request_headers, entry.etag, entry.last_modified):
+            headers = [(name, value) for name, value in entry.headers if name in _NOT_MODIFIED_HEADERS] + extra
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers = list(entry.headers) + extra
+        body = entry.body
+        if entry.gzipped is not None:
+            if _accepts_gzip(request_headers):
+                body = entry.gzipped
+                headers.append((b"content-encoding", b"gzip"))
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
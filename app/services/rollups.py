@@ -0,0 +1,291 @@
+"""
+Totais mensais de despesas (``ExpenseRollup``).
+
+A tabela é mantida incrementalmente pelos eventos do modelo
+(``app.models.rollup``) e pelo importador em lote; ``rebuild_rollups``
+recalcula tudo a partir das despesas e serve para corrigir divergências.
+
+As consultas de ``query_rollup`` usam a tabela para os meses inteiros do
+período; meses parciais nas pontas do intervalo e o agrupamento por
+fornecedor (que não faz parte da chave) são calculados direto nas despesas.
+
+Uso pela linha de comando::
+
+    python -m app.services.rollups [--project-id 1]
+"""
+import argparse
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal  # Importado antes dos modelos (ordem de registro)
+from app.models.expense import Expense
+from app.models.project import Project
+from app.models.rollup import ExpenseRollup, month_start
+from app.schemas.expense import ExpenseRollupGroupEnum
+
+logger = logging.getLogger(__name__)
+
+
+# Nome do campo de saída de cada agrupamento
+GROUP_FIELDS = {
+    ExpenseRollupGroupEnum.PROJECT: "project_id",
+    ExpenseRollupGroupEnum.PROPERTY: "property_id",
+    ExpenseRollupGroupEnum.CATEGORY: "category",
+    ExpenseRollupGroupEnum.SUPPLIER: "supplier_name",
+    ExpenseRollupGroupEnum.MONTH: "month",
+}
+
+
+def _month_expression(db: Session, column):
+    """Primeiro dia do mês de ``column`` no dialeto do banco."""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(column, "start of month")
+    return cast(func.date_trunc("month", column), Date)
+
+
+def rebuild_rollups(db: Session, *, project_id: Optional[int] = None) -> int:
+    """Recalcula os totais mensais (de um projeto ou de todos). Retorna o número de linhas geradas."""
+    month = _month_expression(db, Expense.date)
+    source = (
+        select(
+            Expense.project_id,
+            func.coalesce(Expense.property_id, 0),
+            Expense.category,
+            month,
+            func.sum(Expense.amount),
+            func.count(Expense.id),
+            func.current_timestamp(),
+            func.current_timestamp(),
+        )
+        .group_by(Expense.project_id, func.coalesce(Expense.property_id, 0), Expense.category, month)
+    )
+    clear = delete(ExpenseRollup)
+    if project_id is not None:
+        source = source.where(Expense.project_id == project_id)
+        clear = clear.where(ExpenseRollup.project_id == project_id)
+
+    db.execute(clear)
+    db.execute(
+        insert(ExpenseRollup).from_select(
+            ["project_id", "property_id", "category", "month", "total", "count", "created_at", "updated_at"],
+            source,
+        )
+    )
+    db.commit()
+    query = select(func.count(ExpenseRollup.id))
+    if project_id is not None:
+        query = query.where(ExpenseRollup.project_id == project_id)
+    return db.execute(query).scalar() or 0
+
+
+def ensure_rollups(db: Session) -> None:
+    """Preenche a tabela na primeira execução, quando já existem despesas."""
+    if db.execute(select(ExpenseRollup.id).limit(1)).first() is not None:
+        return
+    if db.execute(select(Expense.id).limit(1)).first() is None:
+        return
+    rows = rebuild_rollups(db)
+    logger.info(f"Totais mensais de despesas gerados: {rows} linhas")
+
+
+def _split_period(
+    date_from: Optional[date], date_to: Optional[date]
+) -> Tuple[Optional[Tuple[Optional[date], Optional[date]]], List[Tuple[date, date]]]:
+    """
+    Divide o período em meses inteiros (lidos da tabela de totais) e
+    trechos parciais nas pontas (lidos das despesas).
+    """
+    partial: List[Tuple[date, date]] = []
+    full_from = full_to = None
+
+    if date_from is not None:
+        full_from = month_start(date_from)
+        if date_from.day != 1:
+            full_from = (full_from + timedelta(days=32)).replace(day=1)
+    if date_to is not None:
+        next_month = (month_start(date_to) + timedelta(days=32)).replace(day=1)
+        full_to = month_start(date_to)
+        if date_to != next_month - timedelta(days=1):
+            full_to = (full_to - timedelta(days=1)).replace(day=1)
+
+    if full_from is not None and full_to is not None and full_from > full_to:
+        # Nenhum mês inteiro no período
+        return None, [(date_from, date_to)]
+
+    if date_from is not None and full_from != date_from:
+        partial.append((date_from, full_from - timedelta(days=1)))
+    if date_to is not None and full_to is not None:
+        last_day = (full_to + timedelta(days=32)).replace(day=1)
+        if last_day <= date_to:
+            partial.append((last_day, date_to))
+    return (full_from, full_to), partial
+
+
+def _rollup_rows(
+    db: Session,
+    groups: Sequence[ExpenseRollupGroupEnum],
+    filters: Dict[str, Any],
+    period: Tuple[Optional[date], Optional[date]],
+) -> List[Tuple]:
+    columns = {
+        ExpenseRollupGroupEnum.PROJECT: ExpenseRollup.project_id,
+        ExpenseRollupGroupEnum.PROPERTY: ExpenseRollup.property_id,
+        ExpenseRollupGroupEnum.CATEGORY: ExpenseRollup.category,
+        ExpenseRollupGroupEnum.MONTH: ExpenseRollup.month,
+    }
+    keys = [columns[group] for group in groups]
+    statement = select(*keys, func.sum(ExpenseRollup.total), func.sum(ExpenseRollup.count))
+    if filters.get("company_id") is not None:
+        statement = statement.join(Project, Project.id == ExpenseRollup.project_id).where(
+            Project.company_id == filters["company_id"]
+        )
+    if filters.get("project_id") is not None:
+        statement = statement.where(ExpenseRollup.project_id == filters["project_id"])
+    if filters.get("property_id") is not None:
+        statement = statement.where(ExpenseRollup.property_id == filters["property_id"])
+    if filters.get("category") is not None:
+        statement = statement.where(ExpenseRollup.category == filters["category"])
+    month_from, month_to = period
+    if month_from is not None:
+        statement = statement.where(ExpenseRollup.month >= month_from)
+    if month_to is not None:
+        statement = statement.where(ExpenseRollup.month <= month_to)
+    if keys:
+        statement = statement.group_by(*keys)
+    return db.execute(statement).all()
+
+
+def expense_statement(
+    groups: Sequence[ExpenseRollupGroupEnum],
+    filters: Dict[str, Any],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    month,
+):
+    """Consulta de soma e quantidade direto nas despesas (``month`` é a expressão do mês no dialeto)."""
+    columns = {
+        ExpenseRollupGroupEnum.PROJECT: Expense.project_id,
+        ExpenseRollupGroupEnum.PROPERTY: Expense.property_id,
+        ExpenseRollupGroupEnum.CATEGORY: Expense.category,
+        ExpenseRollupGroupEnum.SUPPLIER: Expense.supplier_name,
+        ExpenseRollupGroupEnum.MONTH: month,
+    }
+    keys = [columns[group] for group in groups]
+    statement = select(*keys, func.sum(Expense.amount), func.count(Expense.id))
+    if filters.get("company_id") is not None:
+        statement = statement.join(Project, Project.id == Expense.project_id).where(
+            Project.company_id == filters["company_id"]
+        )
+    if filters.get("project_id") is not None:
+        statement = statement.where(Expense.project_id == filters["project_id"])
+    if filters.get("property_id") is not None:
+        statement = statement.where(Expense.property_id == filters["property_id"])
+    if filters.get("category") is not None:
+        statement = statement.where(Expense.category == filters["category"])
+    if date_from is not None:
+        statement = statement.where(Expense.date >= date_from)
+    if date_to is not None:
+        statement = statement.where(Expense.date <= date_to)
+    if keys:
+        statement = statement.group_by(*keys)
+    return statement
+
+
+def _expense_rows(
+    db: Session,
+    groups: Sequence[ExpenseRollupGroupEnum],
+    filters: Dict[str, Any],
+    date_from: Optional[date],
+    date_to: Optional[date],
+) -> List[Tuple]:
+    statement = expense_statement(groups, filters, date_from, date_to, _month_expression(db, Expense.date))
+    return db.execute(statement).all()
+
+
+def _normalize_key(group: ExpenseRollupGroupEnum, value: Any) -> Any:
+    if group == ExpenseRollupGroupEnum.PROPERTY:
+        return value or None
+    if group == ExpenseRollupGroupEnum.MONTH and value is not None:
+        return month_start(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def query_rollup(
+    db: Session,
+    *,
+    group_by: Sequence[ExpenseRollupGroupEnum],
+    company_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    category: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """Soma e quantidade de despesas agrupadas por ``group_by`` no período."""
+    groups = list(dict.fromkeys(ExpenseRollupGroupEnum(group) for group in group_by))
+    filters = {
+        "company_id": company_id,
+        "project_id": project_id,
+        "property_id": property_id,
+        "category": category,
+    }
+
+    if ExpenseRollupGroupEnum.SUPPLIER in groups:
+        sources = _expense_rows(db, groups, filters, date_from, date_to)
+    else:
+        period, partial = _split_period(date_from, date_to)
+        sources = _rollup_rows(db, groups, filters, period) if period is not None else []
+        for start, end in partial:
+            sources += _expense_rows(db, groups, filters, start, end)
+
+    return combine_rows(groups, sources)
+
+
+def combine_rows(groups: Sequence[ExpenseRollupGroupEnum], sources: Sequence[Tuple]) -> List[Dict[str, Any]]:
+    """Soma as linhas (chaves..., total, quantidade) das várias fontes e monta o resultado ordenado."""
+    totals: Dict[Tuple, List] = defaultdict(lambda: [0.0, 0])
+    for row in sources:
+        key = tuple(_normalize_key(group, value) for group, value in zip(groups, row))
+        totals[key][0] += row[-2] or 0.0
+        totals[key][1] += row[-1] or 0
+
+    results = []
+    for key, (total, count) in totals.items():
+        if not count:
+            continue
+        item = {GROUP_FIELDS[group]: value for group, value in zip(groups, key)}
+        item.update(total=round(total, 2), count=count)
+        results.append(item)
+    # Ordena pelos campos de agrupamento (valores nulos por último). Valores vazios ("", 0)
+    # ficam como estão: substituí-los misturaria tipos no mesmo campo
+    fields = [GROUP_FIELDS[group] for group in groups]
+    results.sort(key=lambda item: [
+        (item[field] is None, item[field] if item[field] is not None else 0) for field in fields
+    ])
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recalcula os totais mensais de despesas")
+    parser.add_argument("--project-id", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        rows = rebuild_rollups(db, project_id=args.project_id)
+    finally:
+        db.close()
+    logger.info(f"Totais mensais recalculados: {rows} linhas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Caminho rápido de serialização JSON.
+
+A aplicação responde com ``ORJSONResponse`` por padrão. Mesmo assim, uma
+lista devolvida como objetos do ORM passa pela validação do
+``response_model`` (leitura atributo a atributo de cada entidade) antes
+de ser convertida. Para listas grandes cujas colunas já têm os tipos do
+schema, ``summary_statement`` seleciona só as colunas dos campos do schema
+e ``trusted_response`` devolve as linhas direto para o orjson, sem validar
+de novo; o ``response_model`` continua no endpoint para a documentação.
+``json_response`` faz o mesmo para conteúdo já montado (ex.: ``expand``).
+"""
+from typing import Any, Optional, Type
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+
+def summary_statement(model: Any, schema: Type[BaseModel]) -> Select:
+    """``SELECT`` das colunas de ``model`` com os nomes dos campos de ``schema``."""
+    return select(*(getattr(model, name) for name in schema.model_fields))
+
+
+def json_response(content: Any, response: Optional[Response] = None) -> ORJSONResponse:
+    """
+    Devolve ``content`` sem a validação do ``response_model``. Os cabeçalhos
+    definidos em ``response`` (ETag, Cache-Control, ...) são mantidos.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return ORJSONResponse(content, headers=headers)
+
+
+def trusted_response(db: Session, statement: Select, response: Optional[Response] = None) -> ORJSONResponse:
+    """Executa ``statement`` e devolve as linhas (colunas do banco, já com os tipos do schema)."""
+    return json_response([dict(row._mapping) for row in db.execute(statement)], response)
@@ -0,0 +1,103 @@
+"""
+Tarefas executadas pela fila de jobs (``app.services.jobs``).
+
+Cada tarefa recebe a sessão do banco do worker, o ``JobContext`` (progresso
+e cancelamento) e os parâmetros gravados no job.
+"""
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.schemas.imports import ImportEntityEnum, ImportReport
+from app.schemas.parquet_export import ParquetExportEntityEnum
+from app.services import parquet_export
+from app.services.analytics import analytics_store
+from app.services.deletion import delete_company, delete_project
+from app.services.importer import import_file
+from app.services.jobs import JobContext, task
+from app.services.previews import guess_content_type, is_supported, render_previews
+
+logger = logging.getLogger(__name__)
+
+IMPORT_UPLOAD_DIR = "imports"
+
+
+def import_upload_path(filename: str, token: str) -> str:
+    """Caminho onde a planilha enviada aguarda o job de importação."""
+    directory = os.path.join(settings.UPLOAD_DIR, IMPORT_UPLOAD_DIR)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{token}_{os.path.basename(filename)}")
+
+
+@task("imports.run")
+def run_import(
+    db: Session,
+    job: JobContext,
+    *,
+    entity: str,
+    path: str,
+    filename: str,
+    company_id: int,
+    user_id: int,
+    dry_run: bool = False,
+    atomic: bool = False,
+) -> Dict[str, Any]:
+    def on_batch(report: ImportReport) -> None:
+        job.progress(message=f"{report.total_rows} linhas lidas, {report.imported} gravadas")
+
+    try:
+        with open(path, "rb") as stream:
+            report = import_file(
+                db,
+                ImportEntityEnum(entity),
+                stream,
+                filename,
+                company_id=company_id,
+                user_id=user_id,
+                dry_run=dry_run,
+                atomic=atomic,
+                on_batch=on_batch,
+            )
+    except Exception:
+        if job.last_attempt and os.path.exists(path):
+            os.remove(path)
+        raise
+    os.remove(path)
+    return report.model_dump()
+
+
+@task("exports.parquet", max_attempts=2)
+def run_parquet_export(
+    db: Session, job: JobContext, *, entities: Optional[List[str]] = None, incremental: bool = True
+) -> Dict[str, Any]:
+    selected = [ParquetExportEntityEnum(entity) for entity in entities or list(ParquetExportEntityEnum)]
+    manifest: Dict[str, Any] = {}
+    for index, entity in enumerate(selected):
+        job.progress(index / len(selected), f"Exportando {entity.value}")
+        manifest = parquet_export.run_export(db, entities=[entity], incremental=incremental)
+    return manifest
+
+
+@task("analytics.resync", max_attempts=2)
+def run_analytics_resync(db: Session, job: JobContext) -> Dict[str, Any]:
+    return analytics_store.sync(db, full=True)
+
+
+@task("previews.render")
+def run_previews(db: Session, job: JobContext, *, path: str, content_type: Optional[str] = None) -> Dict[str, str]:
+    if not os.path.exists(path) or not is_supported(path, content_type):
+        return {}
+    return render_previews(path, guess_content_type(path, content_type))
+
+
+@task("deletion.project")
+def run_project_deletion(db: Session, job: JobContext, *, project_id: int) -> Dict[str, int]:
+    return delete_project(db, project_id, progress=job.progress)
+
+
+@task("deletion.company")
+def run_company_deletion(db: Session, job: JobContext, *, company_id: int) -> Dict[str, int]:
+    return delete_company(db, company_id, progress=job.progress)
@@ -0,0 +1,371 @@
+"""
+Rastreamento das requisições (spans no formato OTLP JSON).
+
+Cada requisição amostrada gera um trace com os spans:
+
+- ``HTTP <método> <rota>``: a requisição inteira, desde o primeiro middleware;
+- ``get_db`` e ``get_current_user``: as dependências de ``app.api.deps``
+  (``get_db`` inclui a espera por uma conexão livre no pool);
+- ``handler <endpoint>``: a função do endpoint (``instrument_routes``);
+- ``<operação> <tabela>``: cada consulta SQL, pelos eventos do engine;
+- ``serialize``: do retorno do endpoint ao início da resposta (validação do
+  ``response_model`` e conversão para JSON).
+
+A amostragem é decidida no início da requisição (head-based): uma fração
+``TRACING_SAMPLE_RATE`` das requisições, ou a decisão do cliente quando ele
+envia ``traceparent`` (W3C). Requisições fora da amostra não criam spans.
+As respostas amostradas levam ``X-Trace-Id``. Sub-requisições de ``/batch``
+entram no trace do lote.
+
+Os traces terminados vão para uma fila e uma thread de fundo grava em
+``TRACING_FILE`` (um lote OTLP JSON por linha, como o file exporter do
+OpenTelemetry Collector) ou envia para ``TRACING_OTLP_ENDPOINT`` (OTLP/HTTP
+com JSON). Com a fila cheia, os traces são descartados.
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+from app.services.metrics import UNMATCHED_ROUTE, route_template, statement_shape
+
+logger = logging.getLogger(__name__)
+
+# Tipos de span do OTLP
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+EXEMPT_PATHS = ("/health", "/metrics")
+MAX_STATEMENT_LENGTH = 2000
+EXPORT_BATCH_SIZE = 100  # Traces por gravação/envio
+QUEUE_SIZE = 1000
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Trace:
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span") -> None:
+        # Spans de threads diferentes (dependências e endpoints síncronos)
+        with self._lock:
+            self.spans.append(span)
+
+
+class Span:
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        parent_id: Optional[str],
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        start: Optional[int] = None,
+    ):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start = start or time.time_ns()
+        self.end: Optional[int] = None
+        self.error: Optional[str] = None
+        self.handler_end: Optional[int] = None  # Spans de requisição: quando o endpoint retornou
+
+    def child(self, name: str, kind: int = KIND_INTERNAL, **attributes) -> "Span":
+        return Span(self.trace, name, self.span_id, kind, attributes)
+
+    def finish(self, end: Optional[int] = None) -> None:
+        self.end = end or time.time_ns()
+        self.trace.add(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        data = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": [_attribute(key, value) for key, value in self.attributes.items() if value is not None],
+            "status": {"code": STATUS_ERROR, "message": self.error} if self.error else {"code": STATUS_OK},
+        }
+        if self.parent_id:
+            data["parentSpanId"] = self.parent_id
+        return data
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+# Span atual e span da requisição (o contexto acompanha o threadpool do Starlette)
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+_request: ContextVar[Optional[Span]] = ContextVar("trace_request", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Span filho do atual; fora de uma requisição amostrada não faz nada."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, **attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.error = repr(e)
+        raise
+    finally:
+        _current.reset(token)
+        child.finish()
+
+
+# ---------------------------------------------------------------------------
+# Endpoints e consultas
+# ---------------------------------------------------------------------------
+
+def _traced(call, name: str):
+    def handler_returned() -> None:
+        request_span = _request.get()
+        if request_span is not None:
+            request_span.handler_end = time.time_ns()
+
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_endpoint(*args, **kwargs):
+            with span(name):
+                result = await call(*args, **kwargs)
+            handler_returned()
+            return result
+
+        return async_endpoint
+
+    @functools.wraps(call)
+    def endpoint(*args, **kwargs):
+        with span(name):
+            result = call(*args, **kwargs)
+        handler_returned()
+        return result
+
+    return endpoint
+
+
+def instrument_routes(app) -> None:
+    """Envolve a função de cada endpoint do FastAPI em um span ``handler``."""
+    for route in app.routes:
+        dependant = getattr(route, "dependant", None)
+        if dependant is None or getattr(dependant.call, "_traced", False):
+            continue
+        dependant.call = _traced(dependant.call, f"handler {route.name}")
+        dependant.call._traced = True
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    if parent is None:
+        return
+    context._trace_span = parent.child(
+        " ".join(part for part in statement_shape(statement) if part),
+        KIND_CLIENT,
+        **{"db.system": conn.dialect.name, "db.statement": statement[:MAX_STATEMENT_LENGTH]},
+    )
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    statement_span = getattr(context, "_trace_span", None)
+    if statement_span is not None:
+        context._trace_span = None
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            statement_span.attributes["db.rows"] = cursor.rowcount
+        statement_span.finish()
+
+
+@event.listens_for(Engine, "handle_error")
+def _statement_failed(context):
+    statement_span = getattr(context.execution_context, "_trace_span", None)
+    if statement_span is not None:
+        context.execution_context._trace_span = None
+        statement_span.error = repr(context.original_exception)
+        statement_span.finish()
+
+
+# ---------------------------------------------------------------------------
+# Exportação
+# ---------------------------------------------------------------------------
+
+class TraceExporter:
+    """Grava (ou envia) os traces terminados em uma thread de fundo."""
+
+    def __init__(self):
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.exported = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        if settings.TRACING_SAMPLE_RATE <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def submit(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch: List[List[Span]] = []
+            try:
+                batch.append(self._queue.get(timeout=1))
+                while len(batch) < EXPORT_BATCH_SIZE:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if batch:
+                try:
+                    self.export(batch)
+                    self.exported += len(batch)
+                except Exception as e:
+                    self.dropped += len(batch)
+                    logger.error(f"Erro ao exportar traces: {e}")
+            elif self._stop.is_set():
+                break
+
+    def export(self, traces: List[List[Span]]) -> None:
+        payload = json.dumps(otlp_payload([span for spans in traces for span in spans]), separators=(",", ":"))
+        if settings.TRACING_OTLP_ENDPOINT:
+            request = urllib.request.Request(
+                settings.TRACING_OTLP_ENDPOINT,
+                data=payload.encode(),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            with urllib.request.urlopen(request, timeout=5):
+                pass
+            return
+        directory = os.path.dirname(settings.TRACING_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(settings.TRACING_FILE, "a", encoding="utf-8") as f:
+            f.write(payload + "\n")
+
+
+def otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", settings.PROJECT_NAME)]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+
+trace_exporter = TraceExporter()
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+def _sampling(headers: Headers) -> Tuple[str, Optional[str], bool]:
+    """(trace id, span pai remoto, amostrado) a partir do ``traceparent`` ou do sorteio."""
+    match = _TRACEPARENT.match(headers.get("traceparent", ""))
+    if match and match.group(1) != "0" * 32:
+        return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+    return secrets.token_hex(16), None, random.random() < settings.TRACING_SAMPLE_RATE
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or settings.TRACING_SAMPLE_RATE <= 0 or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        parent = _current.get()
+        attributes = {"http.request.method": scope["method"], "url.path": scope["path"]}
+        if parent is not None:
+            # Sub-requisição de /batch: entra no trace do lote
+            request_span = parent.child(f"HTTP {scope['method']}", KIND_SERVER, **attributes)
+        else:
+            trace_id, remote_parent, sampled = _sampling(Headers(scope=scope))
+            if not sampled:
+                await self.app(scope, receive, send)
+                return
+            request_span = Span(Trace(trace_id), f"HTTP {scope['method']}", remote_parent, KIND_SERVER, attributes)
+
+        async def traced_send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                request_span.attributes["http.response.status_code"] = message["status"]
+                if request_span.handler_end is not None:
+                    serialize = request_span.child("serialize")
+                    serialize.start = request_span.handler_end
+                    serialize.finish()
+                if parent is None:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Trace-Id"] = request_span.trace.trace_id
+            await send(message)
+
+        current_token = _current.set(request_span)
+        request_token = _request.set(request_span)
+        try:
+            await self.app(scope, receive, traced_send)
+        except Exception as e:
+            request_span.error = repr(e)
+            raise
+        finally:
+            _request.reset(request_token)
+            _current.reset(current_token)
+            route = route_template(scope)
+            if route != UNMATCHED_ROUTE:
+                request_span.name = f"HTTP {scope['method']} {route}"
+                request_span.attributes["http.route"] = route
+            if request_span.attributes.get("http.response.status_code", 500) >= 500:
+                request_span.error = request_span.error or "HTTP 5xx"
+            request_span.finish()
+            if parent is None:
+                trace_exporter.submit(request_span.trace.spans)
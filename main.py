@@ -1,10 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 
 from app.api.api import api_router
 from app.core.config import settings
 from app.db.init_db import init_db
+from app.services.analytics import analytics_store
+from app.services.deadline import DeadlineMiddleware
+from app.services.idempotency import IdempotencyMiddleware
+from app.services.events import event_dispatcher
+from app.services.jobs import job_workers
+from app.services.metrics import MetricsMiddleware, metrics_response
+from app.services.previews import preview_pool
+from app.services.rate_limit import ExpensiveRouteLimitMiddleware, RateLimitMiddleware
+from app.services.reports import pnl_refresher
+from app.services.response_cache import ResponseCacheMiddleware
+from app.services.tracing import TracingMiddleware, instrument_routes, trace_exporter
 
 # Inicializa o banco de dados
 init_db()
@@ -14,10 +26,26 @@ app = FastAPI(
     title="API de Gestão de Projetos Imobiliários",
     description="API para gerenciamento de projetos e imóveis para construtoras",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
 )
 
 
+# Dentro do prazo: com 504 ou desconexão o endpoint é cancelado e a chave fica pendente
+# (o INSERT pode já ter sido gravado); dentro do GZip: a resposta guardada é a original
+app.add_middleware(IdempotencyMiddleware)
+# O prazo conta a partir da admissão e não se aplica a acertos no cache
+app.add_middleware(DeadlineMiddleware)
 app.add_middleware(GZipMiddleware, minimum_size=1000)
+# Dentro do cache: acertos não consomem o balde das rotas caras
+app.add_middleware(ExpensiveRouteLimitMiddleware)
+# Antes do GZip: respostas em cache já guardam a variante comprimida
+app.add_middleware(ResponseCacheMiddleware, minimum_size=1000)
+# Limites por usuário e empresa antes do cache: acertos no cache também contam
+app.add_middleware(RateLimitMiddleware)
+# Mede também as requisições recusadas pelos limites
+app.add_middleware(MetricsMiddleware)
+# Mais externo: o span da requisição cobre todos os middlewares
+app.add_middleware(TracingMiddleware)
 
 # Configure CORS
 app.add_middleware(
@@ -31,6 +59,25 @@ app.add_middleware(
 # Inclui as rotas da API
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+def start_workers():
+    pnl_refresher.start()
+    analytics_store.start()
+    event_dispatcher.start()
+    job_workers.start()
+    trace_exporter.start()
+
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    preview_pool.shutdown(wait=False)
+    pnl_refresher.stop()
+    analytics_store.stop()
+    event_dispatcher.stop()
+    job_workers.stop()
+    trace_exporter.stop()
+
+
 @app.get("/")
 async def root():
     return {"message": "Bem-vindo à API de Gestão de Projetos Imobiliários"}
@@ -39,10 +86,17 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    return metrics_response(request)
+
 @app.get("/print")
 async def print_message():
     return {"message": "Hello, World!"}
 
+# Spans dos endpoints (depois de todas as rotas registradas)
+instrument_routes(app)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, timeout_keep_alive=65) 
\ No newline at end of file
@@ -45,6 +45,27 @@ def api_get(endpoint: str, token: str, params: Dict = None) -> Optional[Any]:
         st.error(f"Erro ao acessar API ({endpoint}): {str(e)}")
         return None
 
+def api_batch(endpoints: Dict[str, str], token: str) -> Dict[str, Any]:
+    """Vários GET em uma só chamada (/batch). Retorna o corpo de cada endpoint pela chave, ou None se falhou."""
+    try:
+        response = requests.post(
+            f"{API_URL}/batch/",
+            headers=get_headers(token),
+            json={"requests": [{"id": key, "path": f"/{endpoint}"} for key, endpoint in endpoints.items()]}
+        )
+        response.raise_for_status()
+    except requests.RequestException as e:
+        st.error(f"Erro ao acessar API (batch): {str(e)}")
+        return {key: None for key in endpoints}
+    results = {}
+    for item in response.json()["responses"]:
+        if item["status"] != 200:
+            st.error(f"Erro ao acessar API ({endpoints[item['id']]}): {item['status']}")
+            results[item["id"]] = None
+        else:
+            results[item["id"]] = item["body"]
+    return results
+
 def api_post(endpoint: str, token: str, data: Dict) -> Optional[Any]:
     try:
         response = requests.post(
@@ -309,7 +330,7 @@ def user_form():
     user = st.session_state.get("user_edit_item", {}) if edit_mode else {}
     
     # Obter empresas para o dropdown
-    companies = api_get("companies", st.session_state["token"]) or []
+    companies = api_get("companies/summary", st.session_state["token"]) or []
     company_options = {company["id"]: company["name"] for company in companies}
     company_options[None] = "Nenhuma empresa"
     
@@ -442,10 +463,11 @@ def team_form():
     team = st.session_state.get("team_edit_item", {}) if edit_mode else {}
     
     # Obter empresas e usuários para os dropdowns
-    companies = api_get("companies", st.session_state["token"]) or []
+    data = api_batch({"companies": "companies/summary", "users": "users/summary"}, st.session_state["token"])
+    companies = data["companies"] or []
     company_options = {company["id"]: company["name"] for company in companies}
     
-    users = api_get("users", st.session_state["token"]) or []
+    users = data["users"] or []
     user_options = {user["id"]: f"{user['full_name']} ({user['email']})" for user in users}
     
     with st.form("team_form"):
@@ -504,7 +526,7 @@ def team_form():
 
 def add_team_member_form(team_id):
     # Obter usuários para o dropdown
-    users = api_get("users", st.session_state["token"]) or []
+    users = api_get("users/summary", st.session_state["token"]) or []
     user_options = {user["id"]: f"{user['full_name']} ({user['email']})" for user in users}
     
     with st.form("add_member_form"):
@@ -583,10 +605,11 @@ def project_form():
     project = st.session_state.get("project_edit_item", {}) if edit_mode else {}
     
     # Obter empresas e usuários para os dropdowns
-    companies = api_get("companies", st.session_state["token"]) or []
+    data = api_batch({"companies": "companies/summary", "users": "users/summary"}, st.session_state["token"])
+    companies = data["companies"] or []
     company_options = {company["id"]: company["name"] for company in companies}
     
-    users = api_get("users", st.session_state["token"]) or []
+    users = data["users"] or []
     user_options = {user["id"]: f"{user['full_name']} ({user['email']})" for user in users}
     
     status_options = ["planning", "in_progress", "on_hold", "completed", "cancelled"]
@@ -726,7 +749,7 @@ def property_form():
     property_item = st.session_state.get("property_edit_item", {}) if edit_mode else {}
     
     # Obter projetos para o dropdown
-    projects = api_get("projects", st.session_state["token"]) or []
+    projects = api_get("projects/summary", st.session_state["token"]) or []
     project_options = {project["id"]: f"{project['name']} ({project['city']})" for project in projects}
     
     property_types = ["apartment", "house", "commercial", "land", "industrial"]
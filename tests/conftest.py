@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+# As configurações são lidas na importação de app.core.config
+_directory = tempfile.mkdtemp(prefix="app-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ["UPLOAD_DIR"] = os.path.join(_directory, "uploads")
+os.environ["JOB_WORKER_THREADS"] = "0"
+
+import pytest  # noqa: E402
+
+from app.db.init_db import init_db  # noqa: E402
+from app.db.seed_db import seed_db  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    init_db()
+    seed_db()
+    yield
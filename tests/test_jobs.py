@@ -0,0 +1,63 @@
+import csv
+import uuid
+
+from app.db.session import SessionLocal
+from app.models.client import Client
+from app.models.company import Company
+from app.models.job import Job, JobStatus
+from app.models.user import User
+from app.services import jobs
+from app.services.importer import IMPORT_BATCH_SIZE
+from app.services.tasks import import_upload_path
+
+
+def test_import_larger_than_a_batch_runs_through_the_queue():
+    rows = IMPORT_BATCH_SIZE + 500
+    db = SessionLocal()
+    try:
+        company_id = db.query(Company.id).first()[0]
+        user_id = db.query(User.id).first()[0]
+        path = import_upload_path("clients.csv", uuid.uuid4().hex)
+        with open(path, "w", newline="") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(["name", "client_type", "document"])
+            for index in range(rows):
+                writer.writerow([f"Cliente {index}", "individual", f"job-test-{index:06d}"])
+        job = jobs.enqueue(
+            db,
+            "imports.run",
+            {
+                "entity": "clients",
+                "path": path,
+                "filename": "clients.csv",
+                "company_id": company_id,
+                "user_id": user_id,
+            },
+            company_id=company_id,
+            created_by_id=user_id,
+        )
+        assert jobs.claim(db, "test") == job.id
+
+        jobs.run_job(job.id)
+
+        db.expire_all()
+        job = db.get(Job, job.id)
+        assert job.status == JobStatus.SUCCEEDED, job.error
+        assert job.result["imported"] == rows
+        assert job.message == f"{rows} linhas lidas, {rows} gravadas"
+        assert db.query(Client).filter(Client.document.like("job-test-%")).count() == rows
+    finally:
+        db.close()
+
+
+def test_list_jobs_without_company_only_shows_the_users_own_jobs():
+    db = SessionLocal()
+    try:
+        owner_id = db.query(User.id).first()[0]
+        other_id = owner_id + 1000
+        job = jobs.enqueue(db, "previews.render", {"path": "missing.pdf"}, created_by_id=owner_id)
+
+        assert job.id in [listed.id for listed in jobs.list_jobs(db, user_id=owner_id)]
+        assert job.id not in [listed.id for listed in jobs.list_jobs(db, company_id=None, user_id=other_id)]
+    finally:
+        db.close()